@@ -2,20 +2,167 @@
 OpenAI-based Vector Similarity Search for Table and Column Matching
 Uses text-embedding-3-small for semantic understanding of schema data
 """
+import asyncio
+import functools
+import hashlib
+import random
 import openai
 import numpy as np
 import json
-import pickle
 import os
+import threading
 from typing import List, Dict, Any, Tuple, Optional
 import re
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Embedding request limits: the endpoint caps tokens (not items) per request
+EMBEDDING_TOKEN_BUDGET = 250_000  # Per request, under the 300k request cap
+EMBEDDING_MAX_INPUTS = 2048        # Max inputs per request
+EMBEDDING_MAX_INPUT_TOKENS = 8191  # Max tokens per single input
+EMBEDDING_MAX_ATTEMPTS = 6        # Attempts per batch on rate limits / transient errors
+EMBEDDING_MAX_BACKOFF = 60.0      # Seconds
+
+# FAISS is optional; similarity search falls back to a NumPy matmul without it
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+EMBEDDING_STREAM_FLUSH_ITEMS = 1000  # Schema items buffered before a chunk is sent for embedding during init
+COLUMN_FETCH_CHUNK = 500  # Table names per batched INFORMATION_SCHEMA.COLUMNS query
+HNSW_MIN_ROWS = 50_000  # Switch from exact IndexFlatIP to HNSW above this many vectors
+
+# Numba is optional; without it the NumPy GEMV + argpartition path is used
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+NUMBA_MIN_ROWS = 4096  # Below this, BLAS GEMV + argpartition is already faster than a kernel launch
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _score_and_topk_kernel(M, q, k, n_chunks):
+        """Fused dot + top-k: each parallel chunk keeps its own descending top-k list"""
+        n, d = M.shape
+        chunk = (n + n_chunks - 1) // n_chunks
+        best_scores = np.full((n_chunks, k), -np.inf, dtype=np.float32)
+        best_rows = np.full((n_chunks, k), -1, dtype=np.int64)
+        for c in numba.prange(n_chunks):
+            stop = min((c + 1) * chunk, n)
+            for i in range(c * chunk, stop):
+                s = np.float32(0.0)
+                for j in range(d):
+                    s += M[i, j] * q[j]
+                if s > best_scores[c, k - 1]:
+                    pos = k - 1
+                    while pos > 0 and best_scores[c, pos - 1] < s:
+                        best_scores[c, pos] = best_scores[c, pos - 1]
+                        best_rows[c, pos] = best_rows[c, pos - 1]
+                        pos -= 1
+                    best_scores[c, pos] = s
+                    best_rows[c, pos] = i
+        return best_scores.ravel(), best_rows.ravel()
+
+def _score_and_topk(M: np.ndarray, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k (scores, rows) of M @ q in one pass over M, best first (requires Numba)"""
+    M = np.ascontiguousarray(M, dtype=np.float32)
+    q = np.ascontiguousarray(q, dtype=np.float32)
+    scores, rows = _score_and_topk_kernel(M, q, k, numba.get_num_threads())
+    found = rows >= 0
+    scores, rows = scores[found], rows[found]
+    order = np.argsort(-scores)[:k]  # Merge per-chunk lists: at most n_chunks * k entries
+    return scores[order], rows[order].astype(np.intp)
+
+# text-embedding-3-* use the cl100k_base encoding
+try:
+    import tiktoken
+    _EMBEDDING_ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _EMBEDDING_ENCODING = None
+
+@functools.lru_cache(maxsize=65536)
+def _count_tokens(text: str) -> int:
+    """Token count for an embedding input (cached; ~4 chars/token if tiktoken is unavailable)"""
+    if _EMBEDDING_ENCODING is None:
+        return len(text) // 4 + 1
+    return len(_EMBEDDING_ENCODING.encode(text))
+
+def _truncate_for_embedding(text: str) -> str:
+    """Clip text to EMBEDDING_MAX_INPUT_TOKENS - the API rejects the whole request otherwise"""
+    if _count_tokens(text) <= EMBEDDING_MAX_INPUT_TOKENS:
+        return text
+    if _EMBEDDING_ENCODING is None:
+        return text[:(EMBEDDING_MAX_INPUT_TOKENS - 1) * 4]  # Inverse of the ~4 chars/token estimate
+    return _EMBEDDING_ENCODING.decode(_EMBEDDING_ENCODING.encode(text)[:EMBEDDING_MAX_INPUT_TOKENS])
+
+# Name-token patterns used to enrich schema descriptions
+_SPLIT_RE = re.compile(r'[_\-\s]+')  # Word separators in schema names
+_AZURE_MARKERS = ('analytics', 'azure')  # Substring match on the lowercased table name
+_TABLE_PATTERNS = (
+    (frozenset({'refresh', 'update'}), " with refreshed updated data"),
+    (frozenset({'prediction', 'forecast'}), " containing predictive analytics and forecasts"),
+    (frozenset({'feature', 'features'}), " with feature engineering and data features"),
+)
+_COLUMN_PATTERNS = (  # First match wins
+    (frozenset({'id', 'key'}), " serving as identifier or key"),
+    (frozenset({'date', 'time'}), " containing date or time information"),
+    (frozenset({'name', 'title'}), " containing name or title text"),
+    (frozenset({'count', 'number', 'amount'}), " containing numeric count or amount data"),
+)
+
+@functools.lru_cache(maxsize=16384)
+def _describe_schema_item(name: str, item_type: str, table_name: str, data_type: str) -> str:
+    """Build the embedding description for a table or column (memoized: column names repeat across tables)"""
+    name_parts = [part for part in _SPLIT_RE.split(name) if part]
+    name_parts_set = set(name_parts)
+    readable_name = ' '.join(name_parts)
+    
+    if item_type == 'table':
+        # Azure Analytics-specific enhancements
+        name_lower = name.lower()
+        if any(marker in name_lower for marker in _AZURE_MARKERS):
+            desc = f"Azure Analytics data table containing {readable_name}"
+            if 'final' in name_parts_set:
+                desc += " with final processed results"
+            if 'output' in name_parts_set:
+                desc += " containing output data and analytics"
+            if 'python' in name_parts_set:
+                desc += " processed with Python analytics"
+        else:
+            desc = f"Database table named {readable_name}"
+            
+        # Add context based on name patterns
+        for words, suffix in _TABLE_PATTERNS:
+            if words & name_parts_set:
+                desc += suffix
+        return desc
+    
+    # Column
+    desc = f"Database column {readable_name}"
+    if data_type:
+        desc += f" of type {data_type}"
+        
+    # Add context based on common patterns
+    for words, suffix in _COLUMN_PATTERNS:
+        if words & name_parts_set:
+            desc += suffix
+            break
+            
+    if table_name:
+        desc += f" from table {table_name}"
+    return desc
+
+class _QueryEmbeddingUnavailable(Exception):
+    """Raised so zero-vector fallbacks for failed query embeddings are never cached"""
+
 @dataclass
 class SchemaItem:
     """Represents a database schema item (table or column)"""
@@ -27,7 +174,8 @@ class SchemaItem:
     embedding: Optional[np.ndarray] = None
 
 class OpenAIVectorMatcher:
-    def __init__(self, api_key: str = None, cache_dir: str = "backend/storage"):
+    def __init__(self, api_key: str = None, cache_dir: str = "backend/storage", max_concurrency: int = 8,
+                 warmup: bool = False):
         # Try environment variable first, then parameter
         self.api_key = os.getenv('OPENAI_API_KEY') or api_key
         if not self.api_key:
@@ -38,70 +186,115 @@ class OpenAIVectorMatcher:
         
         self.cache_dir = cache_dir
         self.embedding_model = "text-embedding-3-small"
-        self.embedding_cache_file = os.path.join(cache_dir, "schema_embeddings.pkl")
+        self.max_concurrency = max_concurrency  # Concurrent embedding requests in flight
+        # Embedding matrices (.npz) + JSON sidecar with row names and schema item metadata
+        self.embedding_cache_file = os.path.join(cache_dir, "schema_embeddings.npz")
+        self.index_cache_file = os.path.join(cache_dir, "schema_embeddings.json")
         self.metadata_cache_file = os.path.join(cache_dir, "schema_metadata.json")
         
+        # One OpenAI client (and httpx keep-alive pool) for the matcher's lifetime.
+        # Async httpx connections are bound to the loop that opened them, so all
+        # embedding calls run on a private event loop thread (see _run_async).
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._embed_semaphore: Optional[asyncio.Semaphore] = None  # Created on the private loop
+        self._resume_at = 0.0  # Loop time before which no new embedding request is sent (rate-limit backoff)
+        if self.api_key:
+            import httpx
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                timeout=180.0,  # Extended timeout for large batches
+                max_retries=0,  # Retries are handled in _embed_batch so backoff is shared across batches
+                http_client=httpx.AsyncClient(
+                    timeout=180.0,
+                    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+                )
+            )
+        
         # In-memory storage
         self.schema_items: List[SchemaItem] = []
         self.table_embeddings: Dict[str, np.ndarray] = {}
         self.column_embeddings: Dict[str, np.ndarray] = {}
         
+        # Stacked, L2-normalized similarity matrices (rebuilt by _build_similarity_index)
+        self._table_matrix: Optional[np.ndarray] = None
+        self._table_names: List[str] = []
+        self._table_rows: Dict[str, int] = {}  # Table name -> row of _table_matrix
+        self._column_matrix: Optional[np.ndarray] = None
+        self._column_keys: List[str] = []
+        self._column_table_names: List[str] = []  # Aligned with _column_matrix rows
+        self._column_col_names: List[str] = []
+        self._column_rows_by_table: Dict[str, np.ndarray] = {}
+        self._table_index = None   # FAISS index over _table_matrix rows, when available
+        self._column_index = None  # FAISS index over _column_matrix rows, when available
+        
+        # Content-addressed embeddings (hash of model + text) so rebuilds only embed changed descriptions
+        self._desc_cache: Dict[str, np.ndarray] = {}
+        
+        # Per-instance LRU of normalized query embeddings, keyed by (model, query)
+        self._query_embedding_cache = functools.lru_cache(maxsize=2048)(self._compute_query_embedding)
+        
         # Ensure cache directory exists
         os.makedirs(cache_dir, exist_ok=True)
         
+        # Optional warmup for long-lived instances: load the cache now and open the
+        # API connection in the background so the first query is not a cold start
+        self._warmup_thread: Optional[threading.Thread] = None
+        if warmup and self._load_cached_embeddings():
+            self._warmup_thread = threading.Thread(
+                target=self._warmup, name="openai-vector-matcher-warmup", daemon=True
+            )
+            self._warmup_thread.start()
+    
+    def _warmup(self):
+        """Establish the keep-alive connection with one throwaway embedding"""
+        try:
+            if self._table_matrix is None:
+                self._build_similarity_index()
+            if self._client is not None:
+                self._get_embeddings(["warmup query"])
+                print("🔥 Vector matcher warmed up")
+        except Exception as e:
+            print(f"⚠️ Vector matcher warmup failed: {e}")
+    
+    def await_warmup(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background warmup to finish; True if it is done (or never started)"""
+        if self._warmup_thread is None:
+            return True
+        self._warmup_thread.join(timeout)
+        return not self._warmup_thread.is_alive()
+        
     def _generate_description(self, schema_item: SchemaItem) -> str:
         """Generate descriptive text for better embeddings"""
-        if schema_item.type == 'table':
-            # Create rich description for table
-            name_parts = schema_item.name.replace('_', ' ').replace('-', ' ').split()
-            
-            # Azure Analytics-specific enhancements
-            if 'analytics' in schema_item.name.lower() or 'azure' in schema_item.name.lower():
-                desc = f"Azure Analytics data table containing {' '.join(name_parts)}"
-                if 'final' in name_parts:
-                    desc += " with final processed results"
-                if 'output' in name_parts:
-                    desc += " containing output data and analytics"
-                if 'python' in name_parts:
-                    desc += " processed with Python analytics"
-            else:
-                desc = f"Database table named {' '.join(name_parts)}"
-                
-            # Add context based on name patterns
-            if any(word in name_parts for word in ['refresh', 'update']):
-                desc += " with refreshed updated data"
-            if any(word in name_parts for word in ['prediction', 'forecast']):
-                desc += " containing predictive analytics and forecasts"
-            if any(word in name_parts for word in ['feature', 'features']):
-                desc += " with feature engineering and data features"
-                
-            return desc
-            
-        else:  # column
-            # Create rich description for column
-            name_parts = schema_item.name.replace('_', ' ').replace('-', ' ').split()
-            desc = f"Database column {' '.join(name_parts)}"
-            
-            if schema_item.data_type:
-                desc += f" of type {schema_item.data_type}"
-                
-            # Add context based on common patterns
-            if any(word in name_parts for word in ['id', 'key']):
-                desc += " serving as identifier or key"
-            elif any(word in name_parts for word in ['date', 'time']):
-                desc += " containing date or time information"
-            elif any(word in name_parts for word in ['name', 'title']):
-                desc += " containing name or title text"
-            elif any(word in name_parts for word in ['count', 'number', 'amount']):
-                desc += " containing numeric count or amount data"
-                
-            if schema_item.table_name:
-                desc += f" from table {schema_item.table_name}"
-                
-            return desc
+        return _describe_schema_item(
+            schema_item.name, schema_item.type, schema_item.table_name, schema_item.data_type
+        )
+    
+    def _submit_async(self, coro):
+        """Schedule a coroutine on the matcher's private event loop; returns a concurrent Future"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="openai-vector-matcher-loop",
+                    daemon=True
+                ).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+    
+    def _run_async(self, coro):
+        """Run a coroutine on the private loop and wait for the result"""
+        # Safe from sync code and from inside another running loop alike
+        return self._submit_async(coro).result()
     
     def _get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
-        """Get embeddings from OpenAI API with batching"""
+        """Get embeddings from OpenAI API with concurrent batching"""
+        return self._run_async(self._get_embeddings_async(texts))
+    
+    async def _get_embeddings_async(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts with batches submitted concurrently, returned in input order"""
         if not self.api_key:
             print("⚠️ No OpenAI API key available, returning zero embeddings")
             return [np.zeros(1536) for _ in texts]  # text-embedding-3-small is 1536 dims
@@ -117,59 +310,188 @@ class OpenAIVectorMatcher:
         if not valid_texts:
             print("⚠️ No valid texts to embed")
             return [np.zeros(1536) for _ in texts]
-            
-        # Dynamic batch sizing based on total load
-        if len(valid_texts) < 100:
-            batch_size = 20  # Small batches for small datasets
-        elif len(valid_texts) < 500:
-            batch_size = 30
-        elif len(valid_texts) < 1000:
-            batch_size = 40
-        elif len(valid_texts) < 3000:
-            batch_size = 50  # Your case: 3000+ items
-        else:
-            batch_size = 75  # Very large datasets
-            
-        # For very large datasets, process in chunks with progress tracking
-        total_batches = (len(valid_texts) - 1) // batch_size + 1
-        print(f"📊 Processing {len(valid_texts)} texts in {total_batches} batches (batch size: {batch_size})")
-        
-        for i in range(0, len(valid_texts), batch_size):
-            batch = valid_texts[i:i + batch_size]
-            batch_num = i//batch_size + 1
-            print(f"🔄 Processing batch {batch_num}/{total_batches} ({len(batch)} items)")
-            
-            try:
-                # Use OpenAI 1.0+ API format with optimized settings
-                from openai import OpenAI
-                client = OpenAI(
-                    api_key=self.api_key,
-                    timeout=180.0,  # Extended timeout for large batches
-                    max_retries=3   # More retries for reliability
-                )
-                
-                print(f"🔄 Making OpenAI embeddings API call...")
-                print(f"   Model: {self.embedding_model}")
-                print(f"   Batch size: {len(batch)}")
-                print(f"   Sample text: '{batch[0][:50]}...' " if batch else "No text")
-                
-                response = client.embeddings.create(
-                    model=self.embedding_model,
-                    input=batch
-                )
-                
-                print(f"✅ OpenAI API call successful")
-                batch_embeddings = [np.array(item.embedding) for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
-            except Exception as e:
-                print(f"❌ Error getting embeddings: {e}")
+        
+        # Only texts without a cached embedding hit the API (each unique text once)
+        keys = [self._desc_key(text) for text in valid_texts]
+        misses = list(dict.fromkeys(
+            text for text, key in zip(valid_texts, keys) if key not in self._desc_cache
+        ))
+        if len(misses) < len(valid_texts):
+            print(f"♻️ Reusing cached embeddings for {len(valid_texts) - len(misses)}/{len(valid_texts)} texts")
+        if misses:
+            await self._embed_misses(misses)
+        
+        # Texts whose batch failed are not cached and fall back to zero embeddings
+        return [self._desc_cache.get(key, np.zeros(1536)) for key in keys]
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in as few API requests as the token budget allows (cached texts are free).
+        Returns an (N, dim) float32 matrix of unit rows, in input order; rows are zero where embedding failed.
+        """
+        if not texts:
+            return np.empty((0, 1536), dtype=np.float32)
+        vectors = self._get_embeddings(list(texts))
+        return np.ascontiguousarray(np.stack(vectors), dtype=np.float32)
+    
+    def table_matrix_for(self, table_names: List[str]) -> np.ndarray:
+        """
+        (N, dim) float32 unit rows for the given tables, in order. Indexed tables are row copies
+        of the ingest-time normalized table matrix; only tables outside it are embedded.
+        """
+        if self._table_matrix is None and self.table_embeddings:
+            self._build_similarity_index()
+        dim = self._table_matrix.shape[1] if self._table_matrix is not None else 1536
+        matrix = np.zeros((len(table_names), dim), dtype=np.float32)
+        
+        known = [(pos, self._table_rows[name]) for pos, name in enumerate(table_names) if name in self._table_rows]
+        if known:
+            positions, rows = zip(*known)
+            matrix[list(positions)] = self._table_matrix[list(rows)]
+        
+        missing = [pos for pos, name in enumerate(table_names) if name not in self._table_rows]
+        if missing:
+            matrix[missing] = self.embed_batch(
+                [_describe_schema_item(table_names[pos], 'table', '', '') for pos in missing]
+            )
+        return matrix
+    
+    def add_tables(self, table_names: List[str]) -> int:
+        """
+        Embed tables missing from the table index once and append them to it, so later
+        similarity lookups only embed the query side. Persisted when an on-disk index
+        already exists (a table-only file would otherwise stand in for a full schema build).
+        Returns the number of tables added.
+        """
+        if self._table_matrix is None and self.table_embeddings:
+            self._build_similarity_index()
+        missing = [name for name in dict.fromkeys(table_names) if name not in self._table_rows]
+        if not missing:
+            return 0
+        
+        items = [SchemaItem(name=name, type='table') for name in missing]
+        for item in items:
+            item.description = self._generate_description(item)
+        vectors = self.embed_batch([item.description for item in items])
+        embedded = vectors.any(axis=1)  # Zero rows failed to embed - retry on a later call instead
+        items = [item for item, ok in zip(items, embedded) if ok]
+        if not items:
+            return 0
+        
+        table_matrix = vectors[embedded] if self._table_matrix is None else np.vstack([self._table_matrix, vectors[embedded]])
+        table_names_all = self._table_names + [item.name for item in items]
+        # Rows are only appended, so readers holding the old name->row map stay valid
+        self._table_matrix = np.ascontiguousarray(table_matrix)
+        self._table_names = table_names_all
+        self._table_rows = {name: row for row, name in enumerate(table_names_all)}
+        self._table_index = self._build_faiss_index(self._table_matrix)
+        self.table_embeddings = dict(zip(table_names_all, self._table_matrix))
+        self.schema_items.extend(items)
+        print(f"🧭 Added {len(items)} tables to the similarity index")
+        
+        if os.path.exists(self.embedding_cache_file):
+            self._save_cached_embeddings()
+        return len(items)
+    
+    def _desc_key(self, text: str) -> str:
+        """Content hash for an embedding input, scoped to the embedding model"""
+        payload = f"{self.embedding_model}\0{text.strip()}".encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    async def _embed_misses(self, texts: List[str]):
+        """Embed texts concurrently and store the results in the description cache"""
+        # Over-long texts are sent truncated but cached under their original text
+        originals: Dict[str, List[str]] = {}
+        for text in texts:
+            originals.setdefault(_truncate_for_embedding(text), []).append(text)
+        batches = self._pack_batches(list(originals))
+        total_batches = len(batches)
+        print(f"📊 Processing {len(texts)} texts in {total_batches} token-packed batches "
+              f"(concurrency: {self.max_concurrency})")
+        
+        # One semaphore for the loop, so overlapping calls share the concurrency cap
+        if self._embed_semaphore is None:
+            self._embed_semaphore = asyncio.Semaphore(self.max_concurrency)
+        semaphore = self._embed_semaphore
+        results = await asyncio.gather(
+            *(self._embed_batch(semaphore, batch, batch_num, total_batches)
+              for batch_num, batch in enumerate(batches, start=1)),
+            return_exceptions=True
+        )
+        
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                print(f"❌ Error getting embeddings: {result}")
                 print(f"   Batch size: {len(batch)}")
                 print(f"   Sample text: {batch[0][:100] if batch else 'No text'}")
-                # Fallback: create zero embeddings
-                embeddings.extend([np.zeros(1536) for _ in batch])
-                
-        return embeddings
+                continue
+            for text, embedding in zip(batch, result):
+                for original in originals[text]:
+                    self._desc_cache[self._desc_key(original)] = embedding
+    
+    @staticmethod
+    def _pack_batches(texts: List[str]) -> List[List[str]]:
+        """Pack texts (pre-truncated per input) into batches up to the per-request token budget, preserving order"""
+        batches = []
+        current: List[str] = []
+        running_tokens = 0
+        for text in texts:
+            tokens = _count_tokens(text)
+            if current and (running_tokens + tokens > EMBEDDING_TOKEN_BUDGET
+                            or len(current) >= EMBEDDING_MAX_INPUTS):
+                batches.append(current)
+                current, running_tokens = [], 0
+            current.append(text)
+            running_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _embed_batch(self, semaphore: asyncio.Semaphore, batch: List[str],
+                           batch_num: int, total_batches: int) -> List[np.ndarray]:
+        """Embed one batch, bounded by the shared concurrency semaphore, retrying transient failures"""
+        from openai import RateLimitError, APIConnectionError, InternalServerError
+        loop = asyncio.get_running_loop()
+        
+        for attempt in range(1, EMBEDDING_MAX_ATTEMPTS + 1):
+            # While any batch is backing off, hold new submissions to avoid a thundering herd
+            while (wait := self._resume_at - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            
+            async with semaphore:
+                # Re-check: a batch may have started backing off while this one queued on the semaphore
+                while (wait := self._resume_at - loop.time()) > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    print(f"🔄 Processing batch {batch_num}/{total_batches} ({len(batch)} items)")
+                    response = await self._client.embeddings.create(
+                        model=self.embedding_model,
+                        input=batch
+                    )
+                    # Normalize at store time so every stored vector is unit length
+                    vectors = np.array([item.embedding for item in response.data], dtype=np.float32)
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+                    return list(vectors)
+                except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                    if attempt == EMBEDDING_MAX_ATTEMPTS:
+                        print(f"⚠️ Batch {batch_num}/{total_batches} failed after {attempt} attempts; "
+                              f"rebuild needed for: {', '.join(text[:60] for text in batch[:5])}"
+                              f"{' ...' if len(batch) > 5 else ''}")
+                        raise
+                    delay = min(EMBEDDING_MAX_BACKOFF, 2 ** (attempt - 1)) + random.uniform(0, 1)
+                    if isinstance(e, RateLimitError):
+                        delay = max(delay, self._retry_after(e))
+                    self._resume_at = max(self._resume_at, loop.time() + delay)
+                    print(f"⏳ Batch {batch_num}/{total_batches}: {type(e).__name__}, "
+                          f"retrying in {delay:.1f}s (attempt {attempt}/{EMBEDDING_MAX_ATTEMPTS})")
+    
+    @staticmethod
+    def _retry_after(error) -> float:
+        """Seconds requested by a 429's retry-after header (0 if absent)"""
+        try:
+            return float(error.response.headers.get('retry-after', 0))
+        except (AttributeError, TypeError, ValueError):
+            return 0.0
     
     def initialize_from_database(self, adapter, force_rebuild: bool = False, max_tables: int = None, 
                                 important_tables: List[str] = None):
@@ -184,10 +506,14 @@ class OpenAIVectorMatcher:
         """
         print("🚀 Initializing vector embeddings from database schema...")
         
-        # Check if cache exists and is valid
-        if not force_rebuild and self._load_cached_embeddings():
+        # Check if embeddings are already loaded (e.g. by warmup) or a valid cache exists
+        if not force_rebuild and (self._table_matrix is not None or self._load_cached_embeddings()):
             print("✅ Loaded cached embeddings")
             return
+        
+        # Rebuilding: reuse embeddings of descriptions that have not changed
+        if not self._desc_cache:
+            self._load_desc_cache()
             
         # Get all tables
         all_tables = self._get_all_tables(adapter)
@@ -225,14 +551,29 @@ class OpenAIVectorMatcher:
         else:
             tables = all_tables
         
+        assert tables is not None
         print(f"📊 Processing {len(tables)} tables (from {len(all_tables)} total)")
-            
-        # Get tables and their schemas
-        print("📋 Fetching database schema...")
-        tables = self._get_all_tables(adapter)
         
-        # Build schema items
+        # Build schema items, streaming finished tables into the embedding API
+        # so DESCRIBE round-trips and embedding requests overlap
         schema_items = []
+        pending_items: List[SchemaItem] = []
+        embedding_chunks = []  # (items, Future[List[np.ndarray]]) in submission order
+        
+        def flush_pending():
+            nonlocal pending_items
+            if pending_items:
+                future = self._submit_async(
+                    self._get_embeddings_async([item.description for item in pending_items])
+                )
+                embedding_chunks.append((pending_items, future))
+                pending_items = []
+        
+        def collect(table_items: List[SchemaItem]):
+            schema_items.extend(table_items)
+            pending_items.extend(table_items)
+            if len(pending_items) >= EMBEDDING_STREAM_FLUSH_ITEMS:
+                flush_pending()
         
         # Progress tracking for large schemas
         total_estimated_items = len(tables) * 21  # 1 table + ~20 columns per table
@@ -240,6 +581,11 @@ class OpenAIVectorMatcher:
         
         processed_items = 0
         
+        # Fetch all columns in a few batched queries; tables it misses fall back to DESCRIBE
+        prefetched_columns = self._get_columns_by_table(adapter, tables)
+        if prefetched_columns:
+            print(f"📋 Prefetched columns for {len(prefetched_columns)}/{len(tables)} tables from INFORMATION_SCHEMA")
+        
         # Add table items with parallel column processing for large schemas
         from concurrent.futures import ThreadPoolExecutor, as_completed
         
@@ -258,7 +604,9 @@ class OpenAIVectorMatcher:
             
             # Get columns for this table with error handling
             try:
-                columns = self._get_table_columns(adapter, table_name)
+                columns = prefetched_columns.get(table_name)
+                if columns is None:
+                    columns = self._get_table_columns(adapter, table_name)
                 print(f"   📋 Table {i+1}/{len(tables)}: {table_name} - {len(columns)} columns")
                 
                 for col_name, col_type in columns:
@@ -281,7 +629,8 @@ class OpenAIVectorMatcher:
         if len(tables) > 20:
             print(f"🔄 Using parallel processing for {len(tables)} tables...")
             
-            with ThreadPoolExecutor(max_workers=3) as executor:
+            # DESCRIBE fallbacks are RTT-bound and idempotent, so run many at once
+            with ThreadPoolExecutor(max_workers=min(32, len(tables))) as executor:
                 # Submit all table processing jobs
                 future_to_table = {
                     executor.submit(process_table, (i, table_name)): table_name 
@@ -293,7 +642,7 @@ class OpenAIVectorMatcher:
                     table_name = future_to_table[future]
                     try:
                         table_items, error = future.result()
-                        schema_items.extend(table_items)
+                        collect(table_items)
                         processed_items += len(table_items)
                         
                         if error:
@@ -305,7 +654,7 @@ class OpenAIVectorMatcher:
             # Sequential processing for smaller schemas
             for i, table_name in enumerate(tables):
                 table_items, error = process_table((i, table_name))
-                schema_items.extend(table_items)
+                collect(table_items)
                 processed_items += len(table_items)
                 
                 if error:
@@ -315,30 +664,31 @@ class OpenAIVectorMatcher:
                 if (i + 1) % 10 == 0:
                     print(f"📊 Progress: {i+1}/{len(tables)} tables, {processed_items} total items")
         
+        flush_pending()
         print(f"📊 Processing {len(schema_items)} schema items ({len(tables)} tables)")
         
-        # Generate embeddings in chunks with incremental caching
-        descriptions = [item.description for item in schema_items]
-        
-        print(f"🔄 Generating embeddings for {len(descriptions)} items...")
-        embeddings = self._get_embeddings(descriptions)
-        
-        # Store embeddings with progress tracking
+        # Store embeddings as each streamed chunk completes
         print(f"💾 Storing embeddings and building indexes...")
         self.schema_items = []
-        for i, (item, embedding) in enumerate(zip(schema_items, embeddings)):
-            item.embedding = embedding
-            self.schema_items.append(item)
-            
-            if item.type == 'table':
-                self.table_embeddings[item.name] = embedding
-            else:
-                col_key = f"{item.table_name}.{item.name}"
-                self.column_embeddings[col_key] = embedding
+        self.table_embeddings = {}
+        self.column_embeddings = {}
+        stored = 0
+        for chunk_items, future in embedding_chunks:
+            for item, embedding in zip(chunk_items, future.result()):
+                # Vectors live in the similarity matrices; keep items as metadata only
+                item.embedding = None
+                self.schema_items.append(item)
+                
+                if item.type == 'table':
+                    self.table_embeddings[item.name] = embedding
+                else:
+                    col_key = f"{item.table_name}.{item.name}"
+                    self.column_embeddings[col_key] = embedding
             
-            # Progress update every 500 items
-            if (i + 1) % 500 == 0:
-                print(f"   📊 Stored {i+1}/{len(schema_items)} embeddings...")
+            stored += len(chunk_items)
+            print(f"   📊 Stored {stored}/{len(schema_items)} embeddings...")
+        
+        self._build_similarity_index()
         
         # Cache the results
         print(f"💾 Saving cache for future use...")
@@ -357,6 +707,28 @@ class OpenAIVectorMatcher:
             print(f"❌ Exception getting tables: {e}")
             return []
     
+    def _get_columns_by_table(self, adapter, tables: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """Get columns for many tables with batched INFORMATION_SCHEMA queries instead of one DESCRIBE each"""
+        columns_by_table: Dict[str, List[Tuple[str, str]]] = {}
+        for start in range(0, len(tables), COLUMN_FETCH_CHUNK):
+            chunk = tables[start:start + COLUMN_FETCH_CHUNK]
+            in_list = ", ".join("'" + name.replace("'", "''") + "'" for name in chunk)
+            try:
+                result = adapter.run(
+                    "SELECT table_name, column_name, data_type FROM information_schema.columns "
+                    f"WHERE table_schema = CURRENT_SCHEMA() AND table_name IN ({in_list}) "
+                    "ORDER BY table_name, ordinal_position"
+                )
+                if result.error:
+                    print(f"⚠️ Batched column fetch unavailable, using per-table DESCRIBE: {result.error}")
+                    return columns_by_table
+                for row in result.rows:
+                    columns_by_table.setdefault(row[0], []).append((row[1], row[2]))
+            except Exception as e:
+                print(f"⚠️ Batched column fetch failed, using per-table DESCRIBE: {e}")
+                return columns_by_table
+        return columns_by_table
+    
     def _get_table_columns(self, adapter, table_name: str) -> List[Tuple[str, str]]:
         """Get columns and their types for a table"""
         try:
@@ -384,88 +756,231 @@ class OpenAIVectorMatcher:
             return []
     
     def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
-        """Calculate cosine similarity between two vectors"""
-        if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
-            return 0.0
-        return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        """Cosine similarity of two unit vectors (stored and query embeddings are pre-normalized)"""
+        return float(np.dot(a, b))
+    
+    @staticmethod
+    def _stack_normalized(embeddings: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+        """Stack embeddings into an (N, dim) matrix of L2-normalized rows"""
+        if not embeddings:
+            return None
+        matrix = np.stack(list(embeddings.values())).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0  # Zero vectors stay zero and score 0.0
+        return np.ascontiguousarray(matrix / norms)
+    
+    @staticmethod
+    def _build_faiss_index(matrix: Optional[np.ndarray]):
+        """Inner-product FAISS index over normalized rows (scores are cosine similarities)"""
+        if not FAISS_AVAILABLE or matrix is None or len(matrix) == 0:
+            return None
+        dim = matrix.shape[1]
+        if len(matrix) >= HNSW_MIN_ROWS:
+            index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexFlatIP(dim)
+        index.add(np.ascontiguousarray(matrix, dtype=np.float32))
+        return index
+    
+    @staticmethod
+    def _search(index, matrix: np.ndarray, q: np.ndarray, top_k: int,
+                threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, row indices) by inner product, best first, optionally >= threshold"""
+        k = min(top_k, len(matrix))
+        if k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.intp)
+        if index is not None:
+            scores, rows = index.search(q.reshape(1, -1), k)
+            found = rows[0] >= 0  # HNSW may return fewer than k hits
+            if threshold is not None:
+                found &= scores[0] >= threshold
+            return scores[0][found], rows[0][found]
+        
+        if NUMBA_AVAILABLE and len(matrix) >= NUMBA_MIN_ROWS:
+            scores, rows = _score_and_topk(matrix, q, k)
+            if threshold is not None:
+                keep = scores >= threshold
+                scores, rows = scores[keep], rows[keep]
+            return scores, rows
+        
+        return OpenAIVectorMatcher._top_k(matrix @ q, k, threshold)
+    
+    @staticmethod
+    def _top_k(sims: np.ndarray, top_k: int,
+               threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, positions) of a score vector, best first: O(N + k log k), no full sort"""
+        if threshold is not None:
+            # Mask first so argpartition only sees candidates that can be returned
+            candidates = np.flatnonzero(sims >= threshold)
+            scores, top = OpenAIVectorMatcher._top_k(sims[candidates], top_k)
+            return scores, candidates[top]
+        
+        k = min(top_k, len(sims))
+        if k <= 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.intp)
+        if k < len(sims):
+            top = np.argpartition(-sims, k - 1)[:k]
+        else:
+            top = np.arange(len(sims))
+        top = top[np.argsort(-sims[top])]
+        return sims[top], top
+    
+    def _build_similarity_index(self):
+        """Pre-stack table/column embeddings so each query is a single matmul"""
+        self._set_matrices(
+            list(self.table_embeddings.keys()),
+            self._stack_normalized(self.table_embeddings),
+            list(self.column_embeddings.keys()),
+            self._stack_normalized(self.column_embeddings)
+        )
+    
+    def _set_matrices(self, table_names: List[str], table_matrix: Optional[np.ndarray],
+                      column_keys: List[str], column_matrix: Optional[np.ndarray]):
+        """Install contiguous similarity matrices and point the embedding dicts at their rows"""
+        self._table_names = table_names
+        self._table_matrix = table_matrix
+        self._table_rows = {name: row for row, name in enumerate(table_names)} if table_matrix is not None else {}
+        self._column_keys = column_keys
+        self._column_matrix = column_matrix
+        self._table_index = self._build_faiss_index(table_matrix)
+        self._column_index = self._build_faiss_index(column_matrix)
+        
+        # Dict values are row views, so no vector is stored twice
+        self.table_embeddings = dict(zip(table_names, table_matrix)) if table_matrix is not None else {}
+        self.column_embeddings = dict(zip(column_keys, column_matrix)) if column_matrix is not None else {}
+        
+        # Split "table.column" keys once, into arrays aligned with _column_matrix rows
+        split_keys = [col_key.split('.', 1) for col_key in column_keys]
+        self._column_table_names = [parts[0] for parts in split_keys]
+        self._column_col_names = [parts[1] for parts in split_keys]
+        
+        rows_by_table: Dict[str, List[int]] = {}
+        for row, table in enumerate(self._column_table_names):
+            rows_by_table.setdefault(table, []).append(row)
+        self._column_rows_by_table = {
+            table: np.array(rows, dtype=np.intp) for table, rows in rows_by_table.items()
+        }
+    
+    @staticmethod
+    def _normalize_query(query_embedding: np.ndarray) -> np.ndarray:
+        """L2-normalize a query embedding once per search"""
+        q = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm > 0 else q
+    
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Embed and L2-normalize a search query (repeat queries skip the API); None if embedding failed"""
+        try:
+            return self._query_embedding_cache(self.embedding_model, query)
+        except _QueryEmbeddingUnavailable:
+            # Not cached, so the next call retries the API
+            return None
+    
+    def _compute_query_embedding(self, model: str, query: str) -> np.ndarray:
+        """Uncached query embedding; model is part of the cache key only"""
+        query_embeddings = self._get_embeddings([query])
+        if not query_embeddings or not np.any(query_embeddings[0]):
+            raise _QueryEmbeddingUnavailable(query)
+        q = self._normalize_query(query_embeddings[0])
+        q.flags.writeable = False  # Shared by every caller of the cache
+        return q
+    
+    def _table_results(self, scores: np.ndarray, rows: np.ndarray) -> List[Dict]:
+        """Result dicts for ranked table rows"""
+        return [
+            {
+                'table_name': self._table_names[row],
+                'similarity_score': float(score),
+                'match_type': 'vector_semantic',
+                'confidence': self._similarity_to_confidence(float(score))
+            }
+            for row, score in zip(rows, scores)
+        ]
+    
+    def _column_results(self, scores: np.ndarray, rows: np.ndarray) -> List[Dict]:
+        """Result dicts for ranked column rows (dicts are only built for the selected rows)"""
+        return [
+            {
+                'column_name': self._column_col_names[row],
+                'table_name': self._column_table_names[row],
+                'similarity_score': float(score),
+                'confidence': self._similarity_to_confidence(float(score))
+            }
+            for row, score in zip(rows, scores)
+        ]
     
     def find_similar_tables(self, query: str, top_k: int = 5, threshold: float = 0.3) -> List[Dict]:
         """Find similar tables using vector similarity"""
         if not self.table_embeddings:
             return []
+        if self._table_matrix is None:
+            self._build_similarity_index()
             
-        # Get query embedding
-        query_embeddings = self._get_embeddings([query])
-        if not query_embeddings:
+        q = self._embed_query(query)
+        if q is None:
             return []
-            
-        query_embedding = query_embeddings[0]
-        
-        # Calculate similarities
-        similarities = []
-        for table_name, table_embedding in self.table_embeddings.items():
-            similarity = self._cosine_similarity(query_embedding, table_embedding)
-            if similarity >= threshold:
-                similarities.append({
-                    'table_name': table_name,
-                    'similarity_score': float(similarity),
-                    'match_type': 'vector_semantic',
-                    'confidence': self._similarity_to_confidence(similarity)
-                })
-        
-        # Sort by similarity and return top results
-        similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return similarities[:top_k]
+        
+        scores, rows = self._search(self._table_index, self._table_matrix, q, top_k, threshold)
+        return self._table_results(scores, rows)
     
     def find_relevant_columns(self, query: str, table_name: str = None, top_k: int = 10) -> List[Dict]:
         """Find relevant columns for a query"""
         if not self.column_embeddings:
             return []
+        if self._column_matrix is None:
+            self._build_similarity_index()
             
-        # Get query embedding
-        query_embeddings = self._get_embeddings([query])
-        if not query_embeddings:
+        q = self._embed_query(query)
+        if q is None:
             return []
-            
-        query_embedding = query_embeddings[0]
         
-        # Filter columns by table if specified
-        relevant_columns = self.column_embeddings
+        # Restrict to the table's rows if specified; a table has few enough
+        # columns that a direct matmul over its slice beats a filtered index search
         if table_name:
-            relevant_columns = {k: v for k, v in self.column_embeddings.items() 
-                              if k.startswith(f"{table_name}.")}
-        
-        # Calculate similarities
-        similarities = []
-        for col_key, col_embedding in relevant_columns.items():
-            similarity = self._cosine_similarity(query_embedding, col_embedding)
-            table_name_part, col_name = col_key.split('.', 1)
-            
-            similarities.append({
-                'column_name': col_name,
-                'table_name': table_name_part,
-                'similarity_score': float(similarity),
-                'confidence': self._similarity_to_confidence(similarity)
-            })
+            rows = self._column_rows_by_table.get(table_name)
+            if rows is None:
+                return []
+            scores, top = self._search(None, self._column_matrix[rows], q, top_k)
+            return self._column_results(scores, rows[top])
         
-        # Sort and return top results
-        similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return similarities[:top_k]
+        scores, rows = self._search(self._column_index, self._column_matrix, q, top_k)
+        return self._column_results(scores, rows)
     
     def hybrid_search(self, query: str, top_k: int = 5) -> Dict[str, Any]:
         """Comprehensive search combining tables and columns"""
-        # Find similar tables
-        similar_tables = self.find_similar_tables(query, top_k)
+        has_embeddings = bool(self.table_embeddings or self.column_embeddings)
+        if has_embeddings and self._table_matrix is None and self._column_matrix is None:
+            self._build_similarity_index()
         
-        # Find relevant columns (general)
-        relevant_columns = self.find_relevant_columns(query, None, top_k * 2)
+        # Embed the query once and score every column once; the general and
+        # per-table column rankings are both slices of the same score vector
+        q = self._embed_query(query) if has_embeddings else None
         
-        # Group columns by table for the top tables
+        similar_tables = []
+        relevant_columns = []
         table_columns = {}
-        for table in similar_tables[:3]:  # Top 3 tables
-            table_name = table['table_name']
-            table_cols = self.find_relevant_columns(query, table_name, 5)
-            table_columns[table_name] = table_cols
+        if q is not None:
+            # Find similar tables
+            if self._table_matrix is not None:
+                scores, rows = self._search(self._table_index, self._table_matrix, q, top_k, 0.3)
+                similar_tables = self._table_results(scores, rows)
+            
+            if self._column_matrix is not None:
+                column_sims = self._column_matrix @ q
+                
+                # Find relevant columns (general)
+                scores, rows = self._top_k(column_sims, top_k * 2)
+                relevant_columns = self._column_results(scores, rows)
+                
+                # Group columns by table for the top tables
+                for table in similar_tables[:3]:  # Top 3 tables
+                    table_name = table['table_name']
+                    table_rows = self._column_rows_by_table.get(table_name)
+                    if table_rows is None:
+                        table_columns[table_name] = []
+                        continue
+                    scores, top = self._top_k(column_sims[table_rows], 5)
+                    table_columns[table_name] = self._column_results(scores, table_rows[top])
         
         return {
             'query': query,
@@ -481,29 +996,36 @@ class OpenAIVectorMatcher:
         return max(0.0, min(1.0, similarity))  # Clamp between 0 and 1
     
     def _load_cached_embeddings(self) -> bool:
-        """Load cached embeddings if they exist"""
+        """
+        Load cached embeddings if they exist.
+        The cache stores float16 matrices, but they are upcast to float32 here, so
+        float16 halves the file size and load I/O only - in-memory matrices stay float32.
+        """
         try:
             if not (os.path.exists(self.embedding_cache_file) and 
+                   os.path.exists(self.index_cache_file) and
                    os.path.exists(self.metadata_cache_file)):
                 return False
                 
-            # Load metadata
-            with open(self.metadata_cache_file, 'r') as f:
-                metadata = json.load(f)
-                
-            # Check if cache is recent (less than 1 day old)
-            cache_time = datetime.fromisoformat(metadata.get('created_at', '2000-01-01'))
-            if (datetime.now() - cache_time).days > 1:
-                print("🔄 Cache is old, rebuilding...")
-                return False
-                
-            # Load embeddings
-            with open(self.embedding_cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-                
-            self.schema_items = cache_data.get('schema_items', [])
-            self.table_embeddings = cache_data.get('table_embeddings', {})
-            self.column_embeddings = cache_data.get('column_embeddings', {})
+            # No TTL check: description hashes invalidate changed items on rebuild
+            with open(self.index_cache_file, 'r') as f:
+                index = json.load(f)
+            
+            # Each matrix is one array read; nothing is unpickled per vector
+            with np.load(self.embedding_cache_file) as arrays:
+                self._restore_desc_cache(index, arrays)
+                # Matrices are stored as float16; NumPy has no float16 BLAS kernel,
+                # so upcast once here and keep the hot matmul in float32 (no in-memory saving)
+                table_matrix = arrays['table_matrix'].astype(np.float32)
+                column_matrix = arrays['column_matrix'].astype(np.float32)
+            
+            self.schema_items = [SchemaItem(**item) for item in index.get('schema_items', [])]
+            self._set_matrices(
+                index['table_names'],
+                table_matrix if len(table_matrix) else None,
+                index['column_keys'],
+                column_matrix if len(column_matrix) else None
+            )
             
             return len(self.table_embeddings) > 0
             
@@ -511,18 +1033,66 @@ class OpenAIVectorMatcher:
             print(f"⚠️ Error loading cached embeddings: {e}")
             return False
     
+    def _load_desc_cache(self):
+        """Seed the description cache from the on-disk cache without loading the index"""
+        try:
+            if not (os.path.exists(self.embedding_cache_file) and os.path.exists(self.index_cache_file)):
+                return
+            with open(self.index_cache_file, 'r') as f:
+                index = json.load(f)
+            with np.load(self.embedding_cache_file) as arrays:
+                self._restore_desc_cache(index, arrays)
+            if self._desc_cache:
+                print(f"♻️ Loaded {len(self._desc_cache)} cached description embeddings")
+        except Exception as e:
+            print(f"⚠️ Error loading description cache: {e}")
+    
+    def _restore_desc_cache(self, index: Dict[str, Any], arrays):
+        """Rebuild the description cache from its stored keys + float16 matrix"""
+        keys = index.get('desc_keys', [])
+        if not keys or 'desc_matrix' not in arrays:
+            return
+        matrix = arrays['desc_matrix'].astype(np.float32)
+        self._desc_cache = dict(zip(keys, matrix))
+    
+    @staticmethod
+    def _as_float16(matrix: Optional[np.ndarray]) -> np.ndarray:
+        """Matrix as float16 for storage (an empty (0, 1536) array stands in for None)"""
+        if matrix is None:
+            return np.empty((0, 1536), dtype=np.float16)
+        return matrix.astype(np.float16)
+    
     def _save_cached_embeddings(self):
         """Save embeddings to cache"""
         try:
-            # Save embeddings
-            cache_data = {
-                'schema_items': self.schema_items,
-                'table_embeddings': self.table_embeddings,
-                'column_embeddings': self.column_embeddings
-            }
+            if self._table_matrix is None:
+                self._build_similarity_index()
             
-            with open(self.embedding_cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            desc_keys, desc_matrix = self._desc_cache_snapshot()
+            
+            # Save embeddings as contiguous float16 matrices (half the on-disk size of float32;
+            # _load_cached_embeddings upcasts them, so memory use is unchanged).
+            # Uncompressed: compression gains little on float data and slows every load.
+            tmp_file = self.embedding_cache_file[:-len('.npz')] + '.tmp.npz'
+            np.savez(
+                tmp_file,
+                table_matrix=self._as_float16(self._table_matrix),
+                column_matrix=self._as_float16(self._column_matrix),
+                desc_matrix=self._as_float16(desc_matrix)
+            )
+            os.replace(tmp_file, self.embedding_cache_file)
+            
+            index = {
+                'table_names': self._table_names,
+                'column_keys': self._column_keys,
+                'desc_keys': desc_keys,
+                'schema_items': [
+                    {k: v for k, v in asdict(item).items() if k != 'embedding'}
+                    for item in self.schema_items
+                ]
+            }
+            with open(self.index_cache_file, 'w') as f:
+                json.dump(index, f)
                 
             # Save metadata
             metadata = {
@@ -538,6 +1108,14 @@ class OpenAIVectorMatcher:
         except Exception as e:
             print(f"⚠️ Error saving cached embeddings: {e}")
     
+    def _desc_cache_snapshot(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        """Description cache entries for the current schema, ready to persist"""
+        # Prune to live descriptions so removed columns and query texts don't accumulate
+        live_keys = {self._desc_key(item.description) for item in self.schema_items if item.description}
+        keys = [key for key in self._desc_cache if key in live_keys]
+        matrix = np.stack([self._desc_cache[key] for key in keys]) if keys else None
+        return keys, matrix
+    
     def get_status(self) -> Dict[str, Any]:
         """Get current status of the vector matcher"""
         return {
@@ -548,6 +1126,7 @@ class OpenAIVectorMatcher:
             "total_schema_items": len(self.schema_items),
             "cache_files_exist": {
                 "embeddings": os.path.exists(self.embedding_cache_file),
+                "index": os.path.exists(self.index_cache_file),
                 "metadata": os.path.exists(self.metadata_cache_file)
             }
         }
@@ -14,7 +14,7 @@ class AgentOrchestrator:
         self.openai_api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         
         if self.openai_api_key:
-            self.vector_matcher = OpenAIVectorMatcher(self.openai_api_key)
+            self.vector_matcher = OpenAIVectorMatcher(self.openai_api_key, warmup=True)
             self.llm_agent = LLMAgent(self.openai_api_key)
             print("🤖 OpenAI-powered agents initialized")
         else:
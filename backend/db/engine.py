@@ -11,12 +11,14 @@ from dotenv import load_dotenv
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
 
 class RunResult:
-    def __init__(self, rows, execution_time, error=None, plotly_spec=None, columns=None):
+    def __init__(self, rows, execution_time, error=None, plotly_spec=None, columns=None, row_count=None):
         self.rows = rows
         self.execution_time = execution_time
         self.error = error
         self.plotly_spec = plotly_spec
         self.columns = columns
+        # Driver-reported row count (cursor.rowcount); len(rows) when the driver doesn't report one
+        self.row_count = row_count if row_count is not None and row_count >= 0 else len(rows or [])
 
 class DBAdapter(Protocol):
     def connect(self) -> None: ...
@@ -75,8 +77,9 @@ class PostgresAdapter:
                         cur.execute(sql)
                         rows = cur.fetchall()
                         columns = [desc[0] for desc in cur.description] if cur.description else []
+                    row_count = cur.rowcount
                 execution_time = time.time() - start
-                return RunResult(rows, execution_time, columns=columns)
+                return RunResult(rows, execution_time, columns=columns, row_count=row_count)
             except Exception as e:
                 return RunResult([], 0, error=str(e))
 
@@ -176,10 +179,11 @@ class SnowflakeAdapter:
                     cur.execute(sql)
                     rows = cur.fetchall()
                     columns = [desc[0] for desc in cur.description] if cur.description else []
+                row_count = cur.rowcount
                 
                 execution_time = time.time() - start
                 cur.close()  # Close the cursor to prevent connection issues
-                return RunResult(rows, execution_time, columns=columns)
+                return RunResult(rows, execution_time, columns=columns, row_count=row_count)
             except Exception as e:
                 return RunResult([], 0, error=str(e))
 
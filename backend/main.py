@@ -3,6 +3,7 @@ from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict, Any, List
 import asyncio
+import dataclasses
 import json
 import time
 import logging
@@ -20,6 +21,14 @@ try:
 except Exception:
     pass  # Best effort - don't fail startup if logging config fails
 
+# orjson encodes the large /query payloads (rows, plotly specs) in one native pass, numpy included
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+except ImportError:
+    orjson = None
+    ORJSONResponse = None
+
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
 
@@ -227,6 +236,11 @@ orchestrator = DynamicAgentOrchestrator()
 set_progress_callback(broadcast_progress)
 print("✅ Progress callback registered with orchestrator")
 
+@app.on_event("startup")
+async def warmup_orchestrator():
+    """Build the orchestrator's tools and connections in parallel before the first query"""
+    await orchestrator.warmup()
+
 @app.post("/api/agent/detect-intent")
 async def detect_intent(request: Request):
     """
@@ -491,6 +505,14 @@ async def agent_query(request: Request):
         print(f"🔍 Final plan_dict type: {type(plan_dict)}")
         print(f"🔍 Plan_dict keys: {list(plan_dict.keys()) if isinstance(plan_dict, dict) else 'Not a dict'}")
         
+        if ORJSONResponse is not None:
+            try:
+                # Encoding happens here, so unserializable payloads are caught below
+                return _PlanJSONResponse(content=plan_dict)
+            except TypeError as json_error:
+                print(f"❌ JSON serialization failed: {json_error}")
+                return JSONResponse(status_code=500, content={"error": f"JSON serialization error: {json_error}"})
+        
         # Apply conversion to prevent JSON serialization issues
         try:
             import json
@@ -512,6 +534,16 @@ async def agent_query(request: Request):
         report_error("agent_query", str(e))
         return JSONResponse(status_code=500, content={"error": f"An error occurred: {str(e)}"})
 
+if ORJSONResponse is not None:
+    class _PlanJSONResponse(ORJSONResponse):
+        """ORJSONResponse that also converts Decimal/set/array-likes via _convert_non_serializable"""
+        def render(self, content: Any) -> bytes:
+            return orjson.dumps(
+                content,
+                default=_convert_non_serializable,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+
 def _convert_non_serializable(obj):
     """Convert non-JSON-serializable objects to serializable ones"""
     import numpy as np
@@ -521,6 +553,9 @@ def _convert_non_serializable(obj):
         return float(obj)
     elif isinstance(obj, set):
         return list(obj)
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # Slotted response records (e.g. TaskDescriptor) - orjson encodes these natively
+        return _convert_non_serializable(dataclasses.asdict(obj))
     elif isinstance(obj, np.ndarray):
         return obj.tolist()
     elif hasattr(obj, 'tolist') and callable(getattr(obj, 'tolist')):  # Any numpy-like array
@@ -1,25 +1,62 @@
 import re
 from dataclasses import dataclass
+from typing import Optional
 
 DDL_DML = ("INSERT","UPDATE","DELETE","DROP","ALTER","CREATE","TRUNCATE","MERGE","GRANT","REVOKE")
 
+# String literals are matched (and kept) so "--" or "/*" inside quotes is not treated as a comment
+_SQL_COMMENT_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_ROW_RETURNING_SQL_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+# A LIMIT/OFFSET value: a number, ALL, or a bind placeholder (:n, ?, $1, @n, %s, %(n)s)
+_LIMIT_VALUE = r"(?:\d+|ALL|[:$@?]\w*|%(?:\(\w+\))?s)"
+# Count is group 1 for both "LIMIT n [OFFSET m]" and MySQL "LIMIT m, n"
+_TRAILING_LIMIT_RE = re.compile(rf"\bLIMIT\s+(?:{_LIMIT_VALUE}\s*,\s*)?({_LIMIT_VALUE})(\s+OFFSET\s+{_LIMIT_VALUE})?\s*$", re.IGNORECASE)
+# Any other trailing LIMIT clause (expression, unknown placeholder) is left alone
+_OTHER_TRAILING_LIMIT_RE = re.compile(r"\bLIMIT\s+[^\s,]+(?:\s*,\s*[^\s,]+)?(?:\s+OFFSET\s+\S+)?\s*$", re.IGNORECASE)
+# Dialects that cap rows without LIMIT - appending one would be invalid SQL
+_TOP_OR_FETCH_RE = re.compile(r"\bSELECT\s+(?:ALL\s+|DISTINCT\s+)?TOP\b|\bFETCH\s+(?:FIRST|NEXT)\b", re.IGNORECASE)
+
 @dataclass
 class GuardrailConfig:
     enable_write: bool
     allowed_schemas: list[str]
     default_limit: int
 
+def strip_sql_comments(sql: str) -> str:
+    """Remove -- and /* */ comments, leaving quoted literals untouched"""
+    return _SQL_COMMENT_RE.sub(lambda m: m.group(1) or " ", sql)
+
+def apply_row_limit(sql: str, max_rows: Optional[int]) -> tuple[str,bool]:
+    """
+    Cap a single SELECT/WITH statement at max_rows.
+    Appends LIMIT when absent, lowers a trailing LIMIT above the cap (or LIMIT ALL) and keeps any OFFSET.
+    A placeholder LIMIT (:n, ?, ...), TOP / FETCH FIRST queries, non-row-returning and
+    multi-statement SQL are returned unchanged.
+    Returns (sql, capped) where capped is True when the cap was pushed into the SQL.
+    """
+    s = strip_sql_comments(sql).strip().rstrip(";").rstrip()
+    if not max_rows or ";" in s or not _ROW_RETURNING_SQL_RE.match(s) or _TOP_OR_FETCH_RE.search(s):
+        return sql, False
+    match = _TRAILING_LIMIT_RE.search(s)
+    if match:
+        count = match.group(1)
+        if not count.isdigit() and count.upper() != "ALL":
+            return sql, False  # Bound at execution time - can't tell whether it exceeds the cap
+        if count.isdigit() and int(count) <= max_rows:
+            return sql, False
+        return f"{s[:match.start(1)]}{max_rows}{s[match.end(1):]}", True
+    if _OTHER_TRAILING_LIMIT_RE.search(s):
+        return sql, False
+    return f"{s} LIMIT {max_rows}", True
+
 def sanitize_sql(sql: str, cfg: GuardrailConfig) -> tuple[str,bool]:
-    s = sql.strip().strip(";")
+    # Strip comments first so a trailing "; -- note" is not read as a second statement
+    s = strip_sql_comments(sql).strip().strip(";").strip()
     if not cfg.enable_write and s.upper().startswith(DDL_DML):
         raise ValueError("Write operations disabled.")
     if ";" in s:
         raise ValueError("Multiple statements blocked.")
-    if "/*" in s or "--" in s:
-        # optionally strip comments
-        s = re.sub(r"(--.*?$|/\*.*?\*/)", "", s, flags=re.MULTILINE|re.DOTALL)
     # add LIMIT if absent and query seems unbounded
-    if re.match(r"^SELECT\b", s, re.I) and re.search(r"\bLIMIT\b", s, re.I) is None:
-        s = f"{s} LIMIT {cfg.default_limit}"
-        return s, True
+    if re.search(r"\bLIMIT\b", s, re.I) is None:
+        return apply_row_limit(s, cfg.default_limit)
     return s, False
@@ -4,12 +4,108 @@ Automatically selects and coordinates agents based on query analysis
 """
 
 import asyncio
+import atexit
+import bisect
+import contextvars
+import copy
+import functools
+import hashlib
 import json
-from typing import Dict, List, Optional, Any, Union
+import logging
+import logging.handlers
+import queue
+import re
+import time
+import traceback
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, List, Optional, Any, Tuple, Union
+import dataclasses
 from dataclasses import dataclass
 from enum import Enum
 import os
 
+import numpy as np
+
+from backend.orchestrators.plan_cache import PlanCache, _normalize_query
+from backend.orchestrators.query_result_cache import SemanticQueryCache
+
+# Structured telemetry for plan execution / schema discovery. Records carry extras
+# (task_id, duration_ms, ...) so task timings can be aggregated for critical-path analysis.
+# Task executors log per-stage detail at DEBUG; set ORCHESTRATOR_LOG_LEVEL=DEBUG to see it.
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    # The app never configures logging - keep these messages on the console like the prints they replace.
+    # Records go through a queue so the event loop never blocks on terminal I/O; a listener thread writes them.
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(_log_queue, _handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    logger.setLevel(os.getenv("ORCHESTRATOR_LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+
+# Faster JSON parsing for planner output when orjson is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Stable query fingerprints for plan ids (builtin hash() of str is salted per process)
+try:
+    import xxhash
+    def _query_fingerprint(text: str) -> str:
+        return xxhash.xxh3_64_hexdigest(text.encode("utf-8"))
+except ImportError:
+    def _query_fingerprint(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+# Clients used on every query - imported once, None when the package is missing
+try:
+    from openai import AsyncOpenAI, OpenAI
+except ImportError:
+    AsyncOpenAI = OpenAI = None
+    print("⚠️ openai package not available - LLM planning disabled")
+
+try:
+    from backend.pinecone_schema_vector_store import PineconeSchemaVectorStore
+except ImportError:
+    PineconeSchemaVectorStore = None
+    print("⚠️ Pinecone vector store not available")
+
+try:
+    from backend.db.engine import get_adapter
+except ImportError:
+    get_adapter = None
+
+# Agent tools - instantiated once per orchestrator (see the cached properties on DynamicAgentOrchestrator)
+try:
+    from backend.tools.semantic_dictionary import SemanticDictionary
+except ImportError:
+    SemanticDictionary = None
+
+try:
+    from backend.agents.openai_vector_matcher import OpenAIVectorMatcher
+except ImportError:
+    OpenAIVectorMatcher = None
+
+try:
+    from backend.tools.sql_runner import SQLRunner
+except ImportError:
+    SQLRunner = None
+
+try:
+    from backend.tools.chart_builder import ChartBuilder
+except ImportError:
+    ChartBuilder = None
+
+try:
+    from backend.agents.schema_retriever import SchemaRetriever
+except ImportError:
+    SchemaRetriever = None
+
 # Import LLM Schema Intelligence
 try:
     from backend.agents.schema_embedder import SchemaEmbedder
@@ -18,6 +114,62 @@ except ImportError:
     LLM_INTELLIGENCE_AVAILABLE = False
     print("⚠️ LLM Schema Intelligence not available - using basic schema discovery")
 
+# Whole-query small talk answered by _should_direct_respond (after casefold/whitespace normalization)
+_SMALL_TALK_QUERIES = frozenset({
+    "hi", "hello", "hey", "hi there", "hello there", "hey there",
+    "good morning", "good afternoon", "good evening",
+    "thanks", "thank you", "thanks a lot", "thank you very much",
+    "bye", "goodbye", "see you",
+})
+_SMALL_TALK_PUNCTUATION = " !.?,"
+
+# Per-request state. The orchestrator instance is shared by concurrent requests; every asyncio
+# task (each request and each gather-ed plan task) reads these from its own context copy.
+_use_deterministic_sql = contextvars.ContextVar("use_deterministic_sql", default=False)
+_last_python_error = contextvars.ContextVar("last_python_error", default=None)
+
+# Score buckets for table suggestions: ascending thresholds (score must exceed one to move up a level)
+_CONFIDENCE_LABELS = ("low", "medium", "high")
+_RELEVANCE_THRESHOLDS = (0.6, 0.8)    # estimated_relevance shown per suggestion
+_SELECTION_THRESHOLDS = (0.7, 0.85)   # user verification; above "low" the top table is auto-selected
+
+def _score_bucket(score: float, thresholds: Tuple[float, ...]) -> int:
+    """Index into _CONFIDENCE_LABELS for score (bisect_left keeps the strict > comparisons)"""
+    return bisect.bisect_left(thresholds, score)
+
+# Reserved inputs key holding {TaskType value: result} for the plan's completed tasks
+_RESULTS_BY_TYPE_KEY = "_results_by_type"
+# Lookup names used by the executors that differ from the TaskType value
+_TASK_TYPE_LOOKUP_ALIASES = {
+    "user_verification": "user_interaction",
+    "visualization": "visualization_builder",
+}
+
+# Default row cap pushed into executed SQL as LIMIT when the execution task has no
+# max_rows constraint; matches the default plan's execution constraint
+QUERY_MAX_ROWS = int(os.getenv("NL2Q_QUERY_MAX_ROWS", "10000"))
+
+# Startup indexing is incremental; set NL2Q_FORCE_REINDEX=true to clear and rebuild the index instead
+FORCE_REINDEX = os.getenv("NL2Q_FORCE_REINDEX", "false").lower() == "true"
+
+@functools.lru_cache(maxsize=256)
+def _fallback_select_from(db_name: str, schema_name: str, table_name: str, columns: Tuple[str, ...]) -> str:
+    """"SELECT <cols> FROM <db>.<schema>.<table>" for fallback SQL, built once per table shape"""
+    if not columns:
+        return f'SELECT * FROM "{db_name}"."{schema_name}"."{table_name}"'
+    # Use specific columns if available, prioritize relevant ones
+    relevant_cols = [col for col in columns
+                     if any(keyword in col.lower() for keyword in ['input', 'recommended', 'action', 'value'])]
+    col_list = ', '.join(f'"{col}"' for col in (relevant_cols or columns)[:8])
+    return f'SELECT {col_list} FROM "{db_name}"."{schema_name}"."{table_name}"'
+
+@functools.lru_cache(maxsize=1)
+def _get_snowflake_adapter():
+    """Process-wide connected Snowflake adapter (get_adapter opens a new connection per call)"""
+    if get_adapter is None:
+        raise RuntimeError("backend.db.engine is not available")
+    return get_adapter("snowflake")
+
 # Global reference to progress callback - will be set by main.py
 _progress_callback = None
 
@@ -42,6 +194,36 @@ async def async_broadcast_progress(data):
     except Exception as e:
         print(f"⚠️ Progress broadcast failed: {e}")
 
+def _extract_json_array(s: str) -> Optional[str]:
+    """
+    Return the first complete top-level JSON array in s, or None.
+    Single O(n) bracket-depth scan that skips brackets inside quoted strings.
+    """
+    start = s.find('[')
+    if start == -1:
+        return None
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
 def estimate_token_count(text: str) -> int:
     """
     Rough estimation of token count for text
@@ -76,16 +258,24 @@ def calculate_optimal_tokens(prompt_length: int, context_size: int = 0, complexi
     # Cap at reasonable limits
     return min(max(optimal_tokens, 1000), 8000)
 
-@dataclass
+# Both dataclasses declare __slots__ by hand (dataclass(slots=True) needs Python 3.10,
+# setup.py still supports 3.9) and are frozen so plans can be shared read-only.
+@dataclass(frozen=True)
 class AgentCapability:
     """Defines what an agent can do"""
+    __slots__ = ("agent_name", "description", "input_types", "output_types",
+                 "cost_factor", "reliability_score", "specialized_domains")
     agent_name: str
     description: str
-    input_types: List[str]
-    output_types: List[str]
+    input_types: Tuple[str, ...]
+    output_types: Tuple[str, ...]
     cost_factor: float
     reliability_score: float
-    specialized_domains: List[str]
+    specialized_domains: Tuple[str, ...]
+    
+    def __post_init__(self):
+        for name in ("input_types", "output_types", "specialized_domains"):
+            object.__setattr__(self, name, tuple(getattr(self, name)))
 
 class TaskType(Enum):
     SCHEMA_DISCOVERY = "schema_discovery"
@@ -98,15 +288,186 @@ class TaskType(Enum):
     VISUALIZATION_BUILDER = "visualization_builder"
     USER_INTERACTION = "user_interaction"
 
-@dataclass
+@dataclass(frozen=True)
 class AgentTask:
     """A specific task for an agent"""
+    __slots__ = ("task_id", "task_type", "input_data", "required_output", "constraints", "dependencies")
     task_id: str
     task_type: TaskType
     input_data: Dict[str, Any]
     required_output: Dict[str, Any]
     constraints: Dict[str, Any]
-    dependencies: List[str]  # Other task IDs this depends on
+    dependencies: Tuple[str, ...]  # Other task IDs this depends on
+    
+    def __post_init__(self):
+        object.__setattr__(self, "dependencies", tuple(self.dependencies))
+    
+    def __hash__(self):
+        # The dict fields are unhashable; task ids are unique within a plan
+        return hash(self.task_id)
+
+@dataclass(frozen=True)
+class TaskDescriptor:
+    """Per-task summary in process_query responses; serialized as {"task_type": ..., "agent": ...}"""
+    __slots__ = ("task_type", "agent")
+    task_type: str
+    agent: str
+
+@functools.lru_cache(maxsize=64)  # Task types plus the few workflow types
+def _task_descriptor(task_type: str) -> TaskDescriptor:
+    """Shared immutable descriptor per task type - responses list these instead of fresh dicts"""
+    return TaskDescriptor(task_type=task_type, agent="dynamic")
+
+_TASK_TYPES_BY_VALUE: Dict[Any, TaskType] = TaskType._value2member_map_
+
+# Executors that read nothing but original_query - they never have to wait for another task
+_QUERY_ONLY_TASK_TYPES = frozenset({TaskType.SCHEMA_DISCOVERY, TaskType.SEMANTIC_UNDERSTANDING})
+
+# Structured output for plan_execution: the planner returns {"tasks": [...]} directly
+_PLAN_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "plan",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "task_id": {"type": "string"},
+                            "task_type": {"type": "string", "enum": [task_type.value for task_type in TaskType]},
+                            "dependencies": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["task_id", "task_type", "dependencies"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["tasks"],
+            "additionalProperties": False,
+        },
+    },
+}
+PLAN_MAX_COMPLETION_TOKENS = int(os.getenv("PLAN_MAX_COMPLETION_TOKENS", "800"))
+
+def _is_reasoning_model(model: str) -> bool:
+    """o-series models (o1, o3-mini, ...) count hidden reasoning tokens against max_completion_tokens"""
+    return model.startswith("o") and model[1:2].isdigit()
+
+# Fallback plan used when the planner is unavailable. Built once and shared across
+# requests - treat as read-only; _create_default_plan substitutes the user query.
+_QUERY_PLACEHOLDER = "<QUERY>"
+_DEFAULT_PLAN_TEMPLATE: Tuple[AgentTask, ...] = (
+    AgentTask(
+        task_id="1_discover_schema",
+        task_type=TaskType.SCHEMA_DISCOVERY,
+        input_data={"query": _QUERY_PLACEHOLDER},
+        required_output={"schema_context": "discovered_tables_and_columns"},
+        constraints={"max_tables": 20},
+        dependencies=[]
+    ),
+    AgentTask(
+        task_id="2_semantic_analysis", 
+        task_type=TaskType.SEMANTIC_UNDERSTANDING,
+        input_data={"query": _QUERY_PLACEHOLDER},
+        required_output={"entities": "extracted_entities", "intent": "business_intent"},
+        constraints={},
+        dependencies=[]
+    ),
+    AgentTask(
+        task_id="3_similarity_matching",
+        task_type=TaskType.SIMILARITY_MATCHING, 
+        input_data={"entities": "from_task_2", "schema": "from_task_1"},
+        required_output={"matched_tables": "relevant_tables", "matched_columns": "relevant_columns"},
+        constraints={"min_similarity": 0.7},
+        dependencies=["1_discover_schema", "2_semantic_analysis"]
+    ),
+    AgentTask(
+        task_id="4_user_verification",
+        task_type=TaskType.USER_INTERACTION,
+        input_data={"proposed_matches": "from_task_3"},
+        required_output={"confirmed_tables": "user_approved_tables", "confirmed_columns": "user_approved_columns"},
+        constraints={"require_explicit_approval": True},
+        dependencies=["3_similarity_matching"]
+    ),
+    AgentTask(
+        task_id="5_query_generation",
+        task_type=TaskType.QUERY_GENERATION,
+        input_data={"confirmed_schema": "from_task_4", "original_query": _QUERY_PLACEHOLDER},
+        required_output={"sql_query": "generated_sql", "explanation": "query_explanation"},
+        constraints={"add_safety_checks": True},
+        dependencies=["4_user_verification"]
+    ),
+    AgentTask(
+        task_id="6_query_execution",
+        task_type=TaskType.EXECUTION,
+        input_data={"validated_query": "from_task_5"},
+        required_output={"results": "query_results", "metadata": "execution_metadata"},
+        constraints={"timeout": 300, "max_rows": 10000},
+        dependencies=["5_query_generation"]
+    ),
+    AgentTask(
+        task_id="7_python_generation",
+        task_type=TaskType.PYTHON_GENERATION,
+        input_data={"results": "from_task_6", "original_query": _QUERY_PLACEHOLDER, "schema_context": "from_task_1"},
+        required_output={"python_code": "generated_python_code", "analysis_plan": "code_explanation"},
+        constraints={"safe_execution": True, "libraries": ["pandas", "plotly", "matplotlib"]},
+        dependencies=["6_query_execution"]
+    ),
+    AgentTask(
+        task_id="8_visualization_builder",
+        task_type=TaskType.VISUALIZATION_BUILDER,
+        input_data={"python_code": "from_task_7", "results": "from_task_6", "original_query": _QUERY_PLACEHOLDER},
+        required_output={"charts": "interactive_charts", "summary": "narrative_summary", "chart_metadata": "visualization_info"},
+        constraints={"interactive": True, "safe_execution": True},
+        dependencies=["7_python_generation"]
+    )
+)
+_DEFAULT_PLAN_CORE_TASKS = 6  # 7/8 are the python/visualization tasks
+
+TASK_RESULT_CACHE_SIZE = int(os.getenv("TASK_RESULT_CACHE_SIZE", "1024"))
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+def memoize_async(task_type: TaskType, relevant_inputs, ttl: float = 300, maxsize: int = TASK_RESULT_CACHE_SIZE):
+    """
+    Memoize an async task executor on (task_type, hash of the inputs it actually reads).
+    relevant_inputs(self, inputs) picks that subset so unrelated previous_results don't defeat the cache.
+    Only completed results are cached; callers get deep copies since downstream tasks mutate them.
+    The wrapper exposes cache_info() / cache_clear() like functools.lru_cache.
+    """
+    def decorator(func):
+        cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        counters = {"hits": 0, "misses": 0}
+
+        @functools.wraps(func)
+        async def wrapper(self, inputs: Dict) -> Dict[str, Any]:
+            key_source = task_type.value + _canonical_json(relevant_inputs(self, inputs))
+            key = hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+            now = time.monotonic()
+            entry = cache.get(key)
+            if entry is not None and now - entry[0] < ttl:
+                cache.move_to_end(key)
+                counters["hits"] += 1
+                logger.debug("⚡ %s result cache hit (%s)", task_type.value, wrapper.cache_info())
+                return copy.deepcopy(entry[1])
+            counters["misses"] += 1
+            result = await func(self, inputs)
+            if isinstance(result, dict) and result.get("status") == "completed" and "error" not in result:
+                cache[key] = (now, copy.deepcopy(result))
+                cache.move_to_end(key)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+
+        wrapper.cache_info = lambda: {"hits": counters["hits"], "misses": counters["misses"], "size": len(cache)}
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
 
 class DynamicAgentOrchestrator:
     """
@@ -115,11 +476,38 @@ class DynamicAgentOrchestrator:
     
     def __init__(self):
         self.available_agents = self._register_agents()
+        self._agent_capabilities_str = self._format_agent_capabilities_impl()
+        self._planning_prompt_head, self._planning_prompt_tail = self._build_planning_prompt_parts()
+        self._agents_version = self._compute_agents_version()
+        self.plan_cache = PlanCache()
+        # Cached plans may route to agents that no longer exist (or were re-tuned)
+        self.plan_cache.evict_other_agent_versions(self._agents_version)
+        self.plan_cache_embed_model = os.getenv("PLAN_CACHE_EMBED_MODEL", "text-embedding-3-small")
+        # End-to-end results of recent new_planning runs (skips planning + execution for paraphrases)
+        self.query_cache = SemanticQueryCache()
+        # Query cache key -> Future of (tasks, results) for pipeline runs still in progress
+        self._inflight_runs: Dict[str, asyncio.Future] = {}
+        # Last few query embeddings - the query cache and plan cache embed the same text
+        self._query_embeddings: "OrderedDict[str, np.ndarray]" = OrderedDict()
         self.reasoning_model = os.getenv("REASONING_MODEL", "o3-mini")
         self.fast_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self._index_initialized = False
+        # Caps concurrently running plan tasks (most of them call an LLM or Pinecone).
+        # Created inside the running loop - main.py builds the orchestrator at import time,
+        # before uvicorn starts its own loop
+        self._max_parallel_tasks = int(os.getenv("MAX_PARALLEL_TASKS", "4"))
+        self._task_semaphore: Optional[asyncio.Semaphore] = None
+        self._task_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
         self.db_connector = None
         self.pinecone_store = None
+        # Shared OpenAI clients (created on first use, reuse one HTTP connection pool)
+        self._openai = None
+        self._openai_sync = None
+        # (timestamp, value) snapshots of describe_index_stats() / SHOW TABLES
+        self._stats_cache: Optional[Tuple[float, Any]] = None
+        self._tables_cache: Optional[Tuple[float, List]] = None
+        # Column names per table for fallback SQL (cleared with the other schema caches)
+        self._fallback_columns: Dict[str, List[str]] = {}
         
         # Initialize LLM Schema Intelligence if available
         self.schema_intelligence = None
@@ -161,6 +549,39 @@ class DynamicAgentOrchestrator:
             print(f"⚠️ Error during startup initialization: {e}")
             # Don't fail startup completely
             
+    async def warmup(self):
+        """
+        Construct the shared tools and open the DB / Pinecone connections concurrently,
+        so the first query doesn't pay for them. Startup takes max(init) instead of sum(init);
+        failures are reported and left to the lazy paths.
+        """
+        start = time.perf_counter()
+        steps = {
+            # Tool constructors are synchronous (file loads, client setup) - each gets a worker thread
+            "SemanticDictionary": asyncio.to_thread(lambda: self.semantic_dict),
+            "OpenAIVectorMatcher": asyncio.to_thread(lambda: self.vector_matcher),
+            "SQLRunner": asyncio.to_thread(self._warm_sql_runner),
+            "ChartBuilder": asyncio.to_thread(lambda: self.chart_builder),
+            "SchemaRetriever": asyncio.to_thread(lambda: self.schema_retriever),
+        }
+        if not self.db_connector:
+            steps["database"] = self._initialize_database_connector()
+        if not self.pinecone_store:
+            steps["vector store"] = self._initialize_vector_store()
+        outcomes = await asyncio.gather(*steps.values(), return_exceptions=True)
+        for name, outcome in zip(steps, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("⚠️ Warmup of %s failed: %s", name, outcome)
+        logger.info("🔥 Orchestrator warmup finished in %.0f ms", (time.perf_counter() - start) * 1000,
+                    extra={"duration_ms": (time.perf_counter() - start) * 1000})
+    
+    def _warm_sql_runner(self):
+        """Construct the shared SQLRunner and connect its adapter ahead of the first execution"""
+        runner = self.sql_runner
+        if runner.db_adapter is None and get_adapter is not None:
+            runner.db_adapter = get_adapter()
+        return runner
+    
     async def _ensure_initialized(self):
         """Ensure database and Pinecone are initialized (lazy initialization)"""
         if not self.db_connector:
@@ -172,13 +593,12 @@ class DynamicAgentOrchestrator:
     async def _initialize_database_connector(self):
         """Initialize database connection"""
         try:
-            from backend.db.engine import get_adapter
             print("🔌 Initializing database connector...")
-            self.db_connector = get_adapter("snowflake")
+            self.db_connector = await asyncio.to_thread(_get_snowflake_adapter)
             if self.db_connector:
                 print("✅ Database connector initialized successfully")
                 # Test the connection
-                test_result = self.db_connector.run("SELECT 1 as test", dry_run=False)
+                test_result = await asyncio.to_thread(self.db_connector.run, "SELECT 1 as test", dry_run=False)
                 if test_result and not test_result.error:
                     print("✅ Database connection test successful")
                 else:
@@ -193,13 +613,15 @@ class DynamicAgentOrchestrator:
         """Initialize Pinecone vector store"""
         try:
             print("🔍 Initializing Pinecone vector store...")
-            from backend.pinecone_schema_vector_store import PineconeSchemaVectorStore
-            self.pinecone_store = PineconeSchemaVectorStore()
+            if PineconeSchemaVectorStore is None:
+                raise RuntimeError("backend.pinecone_schema_vector_store could not be imported")
+            # Constructor lists/creates indexes over the network - keep it off the event loop
+            self.pinecone_store = await asyncio.to_thread(PineconeSchemaVectorStore)
             if self.pinecone_store:
                 print("✅ Vector store initialized successfully")
                 # Test Pinecone connection
                 try:
-                    stats = self.pinecone_store.index.describe_index_stats()
+                    stats = await self._cached_index_stats()
                     print(f"✅ Pinecone connection test successful - {stats.total_vector_count} vectors indexed")
                 except Exception as test_error:
                     print(f"⚠️ Pinecone connection test failed: {test_error}")
@@ -210,47 +632,57 @@ class DynamicAgentOrchestrator:
             self.pinecone_store = None
             
     async def _check_and_perform_comprehensive_indexing(self):
-        """Check indexing completeness and perform auto-indexing if needed"""
+        """Bring the index in line with SHOW TABLES, touching only added/removed tables"""
         try:
-            # Get current index statistics
-            stats = self.pinecone_store.index.describe_index_stats()
-            total_vectors = stats.total_vector_count
+            if FORCE_REINDEX:
+                logger.info("🔄 NL2Q_FORCE_REINDEX set - clearing and rebuilding the whole index...")
+                await self._perform_full_database_indexing(force_clear=True)
+                return
             
-            # Get available tables count
-            available_tables = []
+            # Get available tables
             try:
-                result = self.db_connector.run("SHOW TABLES", dry_run=False)
-                available_tables = result.rows if result.rows else []
+                available_rows = await self._cached_available_tables()
             except Exception as e:
-                print(f"⚠️ Could not fetch table list: {e}")
+                logger.warning("⚠️ Could not fetch table list: %s", e)
+                return
+            available_tables = {row[1] if len(row) > 1 else str(row[0]) for row in available_rows}
+            if not available_tables:
+                logger.info("✅ No tables available, skipping auto-indexing")
                 return
             
-            total_available_tables = len(available_tables)
-            
-            # Calculate expected vectors per table (overview + column groups + business context)
-            # With improved chunking: 3-5 chunks per table
-            expected_vectors_per_table = 4  # Conservative estimate
-            expected_total_vectors = total_available_tables * expected_vectors_per_table
-            
-            # Check if indexing is needed
-            indexing_completeness = (total_vectors / expected_total_vectors) if expected_total_vectors > 0 else 0
+            # Vector IDs are prefixed by table name, so the indexed set comes straight from the index
+            indexed_tables = await self.pinecone_store._get_indexed_tables_fast()
+            to_add = sorted(available_tables - indexed_tables)
+            to_delete = sorted(indexed_tables - available_tables)
             
-            print(f"📊 Index status: {total_vectors} vectors, {total_available_tables} tables available")
-            print(f"� Indexing completeness: {indexing_completeness:.1%}")
+            logger.info("📊 Index status: %d tables indexed, %d available (%d to add, %d to delete)",
+                        len(indexed_tables), len(available_tables), len(to_add), len(to_delete),
+                        extra={"indexed_tables": len(indexed_tables), "total_tables": len(available_tables),
+                               "tables_to_add": len(to_add), "tables_to_delete": len(to_delete)})
             
-            # Trigger auto-indexing if less than 80% complete or completely empty
-            should_index = (indexing_completeness < 0.8) or (total_vectors == 0)
+            if not to_add and not to_delete:
+                logger.info("✅ Index is up to date, skipping auto-indexing")
+                self._index_initialized = True
+                return
             
-            if should_index and total_available_tables > 0:
-                print("🔄 Starting comprehensive auto-indexing with optimized chunking...")
-                await self._perform_full_database_indexing(force_clear=True)
-            else:
-                print("✅ Index appears complete, skipping auto-indexing")
+            logger.info("🔄 Starting incremental auto-indexing...")
+            # Index first: a failed stale-table cleanup must not keep new tables out of the index
+            if to_add:
+                await self.pinecone_store.index_tables(self.db_connector, to_add, total_tables=len(available_tables),
+                                                       already_indexed=len(available_tables) - len(to_add))
+            if to_delete:
+                try:
+                    await self.pinecone_store.delete_tables(to_delete)
+                except Exception as e:
+                    logger.warning("⚠️ Could not delete vectors for %d removed tables: %s", len(to_delete), e)
+            self._invalidate_schema_caches()
+            self._index_initialized = True
+            logger.info("✅ Incremental indexing complete")
                 
         except Exception as e:
-            print(f"⚠️ Error checking indexing status: {e}")
+            logger.warning("⚠️ Error checking indexing status: %s", e)
             
-    async def _perform_full_database_indexing(self, force_clear: bool = True):
+    async def _perform_full_database_indexing(self, force_clear: bool = False):
         """Perform full database indexing with optimized chunking"""
         try:
             print("🗂️ Starting full database schema indexing with improved chunking...")
@@ -265,15 +697,14 @@ class DynamicAgentOrchestrator:
 
             # Ensure db_connector is initialized
             if not self.db_connector:
-                from backend.main import get_adapter
-                self.db_connector = get_adapter("snowflake")
+                self.db_connector = await asyncio.to_thread(_get_snowflake_adapter)
             if not self.db_connector:
                 raise Exception("Database adapter not initialized")
 
             # Clear existing index only if force_clear is True
             if force_clear:
                 try:
-                    self.pinecone_store.clear_index()
+                    await asyncio.to_thread(self.pinecone_store.clear_index)
                     print("🧹 Cleared existing index for fresh start")
                 except Exception as e:
                     print(f"⚠️ Could not clear existing index: {e}")
@@ -294,20 +725,47 @@ class DynamicAgentOrchestrator:
             await self.pinecone_store.index_database_schema(self.db_connector, progress_callback=local_progress_callback)
             
             # Verify indexing completed successfully
-            final_stats = self.pinecone_store.index.describe_index_stats()
+            self._invalidate_schema_caches()
+            final_stats = await self._cached_index_stats()
             print(f"✅ Indexing completed: {final_stats.total_vector_count} vectors indexed")
             
             self._index_initialized = True
             
         except Exception as e:
             print(f"⚠️ Error during full database indexing: {e}")
-            import traceback
             traceback.print_exc()
         except Exception as e:
             print(f"⚠️ Error during full database indexing: {e}")
-            import traceback
             traceback.print_exc()
             
+    async def _cached_index_stats(self, ttl: float = 30):
+        """describe_index_stats() cached for `ttl` seconds - it is a network round trip that rarely changes"""
+        now = time.time()
+        if self._stats_cache and now - self._stats_cache[0] < ttl:
+            return self._stats_cache[1]
+        stats = await asyncio.to_thread(self.pinecone_store.index.describe_index_stats)
+        self._stats_cache = (now, stats)
+        return stats
+    
+    async def _cached_available_tables(self, ttl: float = 30) -> List:
+        """SHOW TABLES rows cached for `ttl` seconds (errors are not cached)"""
+        now = time.time()
+        if self._tables_cache and now - self._tables_cache[0] < ttl:
+            return self._tables_cache[1]
+        result = await asyncio.to_thread(self.db_connector.run, "SHOW TABLES", dry_run=False)
+        rows = result.rows if result.rows else []
+        if not result.error:
+            self._tables_cache = (now, rows)
+        return rows
+    
+    def _invalidate_schema_caches(self):
+        """Drop cached index stats / table list after the index contents change"""
+        self._stats_cache = None
+        self._tables_cache = None
+        self._fallback_columns.clear()
+        self._execute_schema_discovery.cache_clear()
+        self.query_cache.clear()
+    
     async def initialize_vector_search(self):
         """Legacy method - redirects to new comprehensive initialization"""
         if not self._index_initialized:
@@ -407,12 +865,27 @@ class DynamicAgentOrchestrator:
             )
         }
     
+    def _compute_agents_version(self) -> str:
+        """Short hash of the registered agents - mixed into plan cache keys"""
+        payload = {name: dataclasses.asdict(capability) for name, capability in self.available_agents.items()}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    
+    def reload_agents(self):
+        """Re-register agents; cached plans built for a different agent set are evicted"""
+        self.available_agents = self._register_agents()
+        self._agent_capabilities_str = self._format_agent_capabilities_impl()
+        new_version = self._compute_agents_version()
+        if new_version != self._agents_version:
+            print(f"🔄 Registered agents changed ({self._agents_version} → {new_version})")
+            self._agents_version = new_version
+        self.plan_cache.evict_other_agent_versions(new_version)
+    
     async def plan_execution(self, user_query: str, context: Dict[str, Any] = None) -> List[AgentTask]:
         """
         Use o3-mini reasoning model to dynamically plan which agents to use and in what order
         """
         
-        print(f"🧠 Letting o3-mini analyze and plan dynamically for query: '{user_query}'")
+        logger.debug("🧠 Letting o3-mini analyze and plan dynamically for query: '%s'", user_query)
         
         # Try to get basic schema context if available (but don't fail if not)
         schema_context = ""
@@ -423,21 +896,21 @@ class DynamicAgentOrchestrator:
             schema_context = f"\n\nAVAILABLE DATABASE CONTEXT:\nKnown tables: {', '.join(tables)}\n(Note: Full schema discovery will provide complete column details)\n"
         
         # Add conversation context for follow-up detection
-        print(f"🔍 DEBUG - plan_execution called with context: {context is not None}")
+        logger.debug("🔍 DEBUG - plan_execution called with context: %s", context is not None)
         if context:
-            print(f"🔍 DEBUG - Context keys: {list(context.keys())}")
+            logger.debug("🔍 DEBUG - Context keys: %s", list(context.keys()))
             is_follow_up = context.get('is_follow_up', False)
             recent_queries = context.get('recent_queries', [])
             follow_up_info = context.get('follow_up_context', {})
             
-            print(f"🔍 DEBUG - Follow-up context:")
-            print(f"  - is_follow_up: {is_follow_up}")
-            print(f"  - recent_queries count: {len(recent_queries)}")
-            print(f"  - follow_up_info: {follow_up_info}")
+            logger.debug("🔍 DEBUG - Follow-up context:")
+            logger.debug("  - is_follow_up: %s", is_follow_up)
+            logger.debug("  - recent_queries count: %s", len(recent_queries))
+            logger.debug("  - follow_up_info: %s", follow_up_info)
             
             if is_follow_up and recent_queries:
                 last_query = recent_queries[-1] if recent_queries else {}
-                print(f"🎯 FOLLOW-UP DETECTED - Adding context to LLM prompt")
+                logger.debug("🎯 FOLLOW-UP DETECTED - Adding context to LLM prompt")
                 
                 # Build follow-up context with actual data if available
                 data_context = ""
@@ -473,92 +946,30 @@ FOLLOW-UP PLANNING LOGIC:
 - For data clarification follow-ups, focus on query refinement rather than visualization
 """
             else:
-                print(f"🔍 NOT A FOLLOW-UP - Proceeding with normal planning")
+                logger.debug("🔍 NOT A FOLLOW-UP - Proceeding with normal planning")
         else:
-            print(f"🔍 DEBUG - No context provided to plan_execution")
+            logger.debug("🔍 DEBUG - No context provided to plan_execution")
         
-        planning_prompt = f"""You are an intelligent **Query Orchestrator** for pharmaceutical data analysis. You plan the sequence of tasks needed to fulfill the user's request and output them as a structured JSON plan.
-
-USER QUERY: "{user_query}"{schema_context}{follow_up_context}
-
-=== ROLE & GOAL ===
-You are a highly reliable planning agent ("brilliant new analyst") that:
-- Plans multi-step data workflows using available capabilities.
-- Requires explicit, structured instruction and always favors accuracy and clarity.
-- Uses conversation context to make intelligent decisions about follow-up queries.
-
-=== TOOLS & CAPABILITIES ===
-Available capabilities:
-• schema_discovery: Explore tables & columns in the database (MUST be first for any DB query).  
-• semantic_understanding: Map business intent to schema terms.  
-• similarity_matching: Match user terms to schema.  
-• user_interaction: Ask user to clarify ambiguous or missing information.  
-• query_generation: Generate SQL based on schema.  
-• execution: Run SQL and retrieve results.  
-• python_generation: Generate Python/pandas code for analysis.  
-• visualization_builder: Execute Python code to build Plotly visuals.
-
-=== INTELLIGENT PLANNING RULES ===
-1. **schema_discovery** is MANDATORY and ALWAYS first for any database operation.  
-2. If schema_context only includes table names (no columns), still perform schema_discovery for full metadata.  
-
-**DATA vs VISUALIZATION DETECTION:**
-3. ONLY add visualization steps if the user EXPLICITLY requests charts, graphs, plots, or visual analysis:
-   - Explicit visualization requests: "show me a chart", "create a graph", "visualize", "plot this data"
-   - Data-only requests: "show me data", "get records", "find patients", "list results" → NO visualization
-   - Analysis requests: "analyze", "compare", "trends" → Use context clues, usually NO visualization unless explicit
-
-**FOLLOW-UP INTELLIGENCE (CRITICAL):**
-4. **BEFORE planning, detect if this is a follow-up query:**
-   - Words like "above", "this", "that", "previous", "earlier" indicate follow-up
-   - If follow-up detected AND conversation context available → SKIP schema_discovery
-   - Follow-up patterns:
-     * "insights from above chart" → Generate insights only (NO schema_discovery)
-     * "show chart of this data" → visualization_builder only (reuse previous SQL)
-     * "explain that result" → interpretation only
-5. **FOLLOW-UP DATA VALIDATION:**
-   - If follow-up requests chart/visualization BUT no actual data available from previous queries
-   - Fall back to complete workflow: schema_discovery → query_generation → execution → python_generation → visualization_builder
-   - Look for "PREVIOUS QUERY RESULTS" section - if missing or empty, treat as new query
-6. For follow-up queries about "this/that/above data" requesting visualization:
-   - If previous query context available, you may need to re-run similar SQL first
-   - Then add python_generation → visualization_builder for the chart request
-7. For follow-up data clarification (no visualization request):
-   - Focus on refined query_generation without visualization steps
-
-**WORKFLOW PATTERNS:**
-8. Simple data retrieval → schema_discovery → query_generation → execution
-9. EXPLICIT visualization → schema_discovery → query_generation → execution → python_generation → visualization_builder
-10. Ambiguous query → schema_discovery → user_interaction → query_generation → execution
-11. **FOLLOW-UP insight generation** → python_generation ONLY (NO schema_discovery)
-12. **FOLLOW-UP visualization WITH data** → python_generation → visualization_builder ONLY (reuse context)
-13. **FOLLOW-UP visualization WITHOUT data** → schema_discovery → query_generation → execution → python_generation → visualization_builder (complete workflow)
-14. **FOLLOW-UP data clarification** → query_generation → execution ONLY (refine previous query)=== CRITICAL CONSTRAINTS ===
-- NO hardcoded visualization steps unless user explicitly asks for charts/graphs/plots
-- Use conversation context to understand follow-up intent
-- Always output structured JSON — NO natural language commentary outside the JSON
-- Let the LLM (you) decide based on query intent, not keywords
-
-=== OUTPUT FORMAT ===
-Output ONLY a JSON array of task objects, each with `task_id` and `task_type`, in execution order. Example:
-
-[
-  {{"task_id": "1_schema_discovery", "task_type": "schema_discovery"}},
-  {{"task_id": "2_query_generation", "task_type": "query_generation"}},
-  {{"task_id": "3_execution", "task_type": "execution"}}
-]
-
-No explanations or extra text."""
+        planning_prompt = f'{self._planning_prompt_head}USER QUERY: "{user_query}"{schema_context}{follow_up_context}{self._planning_prompt_tail}'
         
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+            client = self._get_openai()
+            
+            # Reuse a cached plan for repeated/paraphrased queries with identical prompt context
+            plan_scope = PlanCache.make_scope(self.reasoning_model, self._agents_version, schema_context + follow_up_context)
+            query_embedding = None
+            cached_tasks = self.plan_cache.get_exact(plan_scope, user_query)
+            if cached_tasks is None:
+                query_embedding = await self._embed_plan_query(client, user_query)
+                cached_tasks = self.plan_cache.get_similar(plan_scope, user_query, query_embedding)
+            if cached_tasks:
+                return self._convert_to_agent_tasks(cached_tasks, user_query)
             
             # Use o3-mini for planning as specified
             model_to_use = self.reasoning_model  # This is o3-mini
-            print(f"🧠 Using model for planning: {model_to_use}")
-            print(f"🔍 OpenAI API Key available: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
-            print(f"📝 Planning prompt length: {len(planning_prompt)} characters")
+            logger.debug("🧠 Using model for planning: %s", model_to_use)
+            logger.debug("🔍 OpenAI API Key available: %s", 'Yes' if os.getenv('OPENAI_API_KEY') else 'No')
+            logger.debug("📝 Planning prompt length: %s characters", len(planning_prompt))
             
             # Calculate dynamic token limit based on content complexity
             prompt_length = len(planning_prompt)
@@ -576,90 +987,95 @@ No explanations or extra text."""
             if context_size > 1000:
                 complexity_factor += 0.2
                 
-            # Calculate optimal token limit
-            dynamic_token_limit = calculate_optimal_tokens(prompt_length, context_size, complexity_factor)
+            # Calculate optimal token limit. Structured output has no prose, but o-series models also
+            # spend hidden reasoning tokens from this budget, so only non-reasoning models get the tight cap.
+            if _is_reasoning_model(model_to_use):
+                dynamic_token_limit = calculate_optimal_tokens(prompt_length, context_size, complexity_factor)
+            else:
+                dynamic_token_limit = PLAN_MAX_COMPLETION_TOKENS
             
-            print(f"🎯 Calculated optimal token limit: {dynamic_token_limit}")
-            print(f"📊 Factors - Prompt: {prompt_length} chars, Context: {context_size} chars, Complexity: {complexity_factor:.1f}x")
+            logger.debug("🎯 Calculated optimal token limit: %s", dynamic_token_limit)
+            logger.debug("📊 Factors - Prompt: %s chars, Context: %s chars, Complexity: %.1fx", prompt_length, context_size, complexity_factor)
             
-            print(f"📋 Full planning prompt:\n{planning_prompt}")
+            logger.debug("📋 Full planning prompt:\n%s", planning_prompt)
             
             # Retry mechanism for o3-mini API calls
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    print(f"🚀 Calling o3-mini for planning (attempt {attempt + 1}/{max_retries})...")
-                    print(f"🎯 Token limit: {dynamic_token_limit}")
-                    response = client.chat.completions.create(
+                    logger.debug("🚀 Calling o3-mini for planning (attempt %s/%s)...", attempt + 1, max_retries)
+                    logger.debug("🎯 Token limit: %s", dynamic_token_limit)
+                    response = await client.chat.completions.create(
                         model=model_to_use,
                         messages=[{"role": "user", "content": planning_prompt}],
+                        response_format=_PLAN_RESPONSE_FORMAT,  # Schema-constrained JSON, no prose
                         max_completion_tokens=dynamic_token_limit  # Dynamic token limit based on complexity
                     )
-                    print(f"✅ o3-mini responded successfully")
+                    logger.debug("✅ o3-mini responded successfully")
                     
                     # Monitor token usage
                     if hasattr(response, 'usage') and response.usage:
                         usage = response.usage
-                        print(f"📊 Token usage - Prompt: {usage.prompt_tokens}, Completion: {usage.completion_tokens}, Total: {usage.total_tokens}")
-                        print(f"📈 Token efficiency: {(usage.completion_tokens / dynamic_token_limit * 100):.1f}% of limit used")
+                        logger.debug("📊 Token usage - Prompt: %s, Completion: %s, Total: %s", usage.prompt_tokens, usage.completion_tokens, usage.total_tokens)
+                        logger.debug("📈 Token efficiency: %.1f%% of limit used", (usage.completion_tokens / dynamic_token_limit * 100))
                     
                     # Check if response was truncated
                     finish_reason = response.choices[0].finish_reason
-                    print(f"🏁 Finish reason: {finish_reason}")
+                    logger.debug("🏁 Finish reason: %s", finish_reason)
                     
                     if finish_reason == 'length':
-                        print(f"⚠️ Response truncated! Model hit the {dynamic_token_limit} token limit")
+                        logger.warning("⚠️ Response truncated! Model hit the %s token limit", dynamic_token_limit)
                         
                         # Analyze if we can recover or need more tokens
                         content = response.choices[0].message.content.strip()
                         content_length = len(content)
                         
-                        print(f"� Truncated content length: {content_length} chars")
+                        logger.debug("� Truncated content length: %s chars", content_length)
                         
                         # If content is very short, might be a different issue
                         if content_length < 100:
-                            print(f"⚠️ Very short response suggests API issue, not just truncation")
+                            logger.warning("⚠️ Very short response suggests API issue, not just truncation")
                         
                         # Try with higher token limit on next attempt
                         if attempt < max_retries - 1:
                             old_limit = dynamic_token_limit
                             dynamic_token_limit = min(dynamic_token_limit + 2000, 8000)  # Bigger increase, cap at 8000
-                            print(f"🔄 Retrying with increased token limit: {old_limit} → {dynamic_token_limit}")
+                            logger.debug("🔄 Retrying with increased token limit: %s → %s", old_limit, dynamic_token_limit)
                             continue
-                        print(f"🔧 Attempting to fix truncated JSON...")
-                        print(f"⚠️ Response was truncated due to token limit!")
+                        logger.debug("🔧 Attempting to fix truncated JSON...")
+                        logger.warning("⚠️ Response was truncated due to token limit!")
                         if attempt < max_retries - 1:
-                            print(f"🔄 Retrying with different approach...")
+                            logger.debug("🔄 Retrying with different approach...")
                             continue
-                    print(f"🔍 Finish reason: {finish_reason}")
+                    logger.debug("🔍 Finish reason: %s", finish_reason)
                     
                     # Parse the response to extract task plan
                     content = response.choices[0].message.content.strip()
                     
                     # Validate that we got a reasonable response
                     if len(content) < 10:
-                        print(f"⚠️ Response too short ({len(content)} chars), retrying...")
+                        logger.warning("⚠️ Response too short (%s chars), retrying...", len(content))
                         continue
                         
                     if not ('[' in content or '{' in content):
-                        print(f"⚠️ Response doesn't contain JSON markers, retrying...")
+                        logger.warning("⚠️ Response doesn't contain JSON markers, retrying...")
                         continue
                     
-                    print(f"� o3-mini full response:")
-                    print(f"--- START o3-mini RESPONSE ---")
-                    print(content)
-                    print(f"--- END o3-mini RESPONSE ---")
-                    print(f"📊 Response length: {len(content)} characters")
-                    print(f"🔍 Response starts with: '{content[:50]}...'")
-                    print(f"🔍 Response ends with: '...{content[-50:]}'")
+                    logger.debug("� o3-mini full response:")
+                    logger.debug("--- START o3-mini RESPONSE ---")
+                    logger.debug("%s", content)
+                    logger.debug("--- END o3-mini RESPONSE ---")
+                    logger.debug("📊 Response length: %s characters", len(content))
+                    logger.debug("🔍 Response starts with: '%s...'", content[:50])
+                    logger.debug("🔍 Response ends with: '...%s'", content[-50:])
                     
                     # CRITICAL: Check for obvious truncation indicators
                     if not content.rstrip().endswith((']', '}')) and not content.rstrip().endswith('"]'):
-                        print(f"🚨 TRUNCATION DETECTED: Response doesn't end properly!")
+                        logger.warning("🚨 TRUNCATION DETECTED: Response doesn't end properly!")
                         if attempt < max_retries - 1:
-                            print(f"🔄 Retrying due to truncation...")
+                            logger.debug("🔄 Retrying due to truncation...")
                             continue
-                        print(f"🔧 Attempting to fix truncated JSON...")
+                        logger.debug("🔧 Attempting to fix truncated JSON...")
                         
                         # Try to auto-complete common truncation patterns
                         content = content.rstrip()
@@ -671,7 +1087,7 @@ No explanations or extra text."""
                         elif '"' in content and not content.count('"') % 2 == 0:
                             # Odd number of quotes - missing closing quote
                             content += '"'
-                            print(f"🔧 Added missing closing quote")
+                            logger.debug("🔧 Added missing closing quote")
                         
                         # If missing closing brace for object
                         if content.rstrip().endswith(',') or content.rstrip().endswith(':'):
@@ -684,119 +1100,124 @@ No explanations or extra text."""
                         
                         if open_braces > 0:
                             content += '}' * open_braces
-                            print(f"🔧 Added {open_braces} closing braces")
+                            logger.debug("🔧 Added %s closing braces", open_braces)
                             
                         if open_brackets > 0:
                             content += ']' * open_brackets
-                            print(f"🔧 Added {open_brackets} closing brackets")
+                            logger.debug("🔧 Added %s closing brackets", open_brackets)
                             
-                        print(f"🔧 Fixed content: '{content}'")
+                        logger.debug("🔧 Fixed content: '%s'", content)
                         
                         # Validate the fixed JSON
                         try:
                             test_parse = json.loads(content)
-                            print(f"✅ JSON auto-completion successful!")
+                            logger.debug("✅ JSON auto-completion successful!")
                         except json.JSONDecodeError as validation_error:
-                            print(f"⚠️ JSON still invalid after auto-completion: {validation_error}")
-                            print(f"🔧 Fixed content that still fails: {repr(content)}")
+                            logger.warning("⚠️ JSON still invalid after auto-completion: %s", validation_error)
+                            logger.debug("🔧 Fixed content that still fails: %s", repr(content))
                             # Continue anyway - main parser will handle the final fallback
                     
                     # If we get here, we have a valid response
                     break
                     
                 except Exception as api_error:
-                    print(f"⚠️ o3-mini API call failed (attempt {attempt + 1}): {api_error}")
+                    logger.warning("⚠️ o3-mini API call failed (attempt %s): %s", attempt + 1, api_error)
                     if attempt == max_retries - 1:
                         raise api_error
-                    print(f"🔄 Retrying in a moment...")
-                    import time
-                    time.sleep(1)  # Brief delay before retry
+                    logger.debug("🔄 Retrying in a moment...")
+                    await asyncio.sleep(1)  # Brief delay before retry
             
             # Clean up the response for JSON parsing
             original_content = content
             try:
-                print(f"🧹 Starting JSON cleanup...")
+                logger.debug("🧹 Starting JSON cleanup...")
                 # Remove any markdown formatting
                 if '```json' in content:
-                    print(f"🔧 Found ```json markers, extracting JSON...")
+                    logger.debug("🔧 Found ```json markers, extracting JSON...")
                     content = content.split('```json')[1].split('```')[0]
                 elif '```' in content:
-                    print(f"🔧 Found ``` markers, extracting content...")
+                    logger.debug("🔧 Found ``` markers, extracting content...")
                     content = content.split('```')[1].split('```')[0]
                 
                 # Remove any leading/trailing text that isn't JSON
                 content = content.strip()
-                print(f"🧹 After cleanup: '{content[:100]}...'")
+                logger.debug("🧹 After cleanup: '%s...'", content[:100])
                 
-                if not content.startswith('['):
-                    print(f"⚠️ Content doesn't start with '[', searching for JSON array...")
-                    # Find the first [ and last ]
-                    start = content.find('[')
-                    end = content.rfind(']')
-                    print(f"🔍 Found '[' at position: {start}, ']' at position: {end}")
-                    if start != -1 and end != -1:
-                        content = content[start:end+1]
-                        print(f"🔧 Extracted JSON: '{content[:100]}...'")
-                    else:
-                        print(f"❌ No valid JSON array found in response")
+                logger.debug("🔄 Attempting to parse JSON...")
+                try:
+                    parsed = _json_loads(content)
+                except ValueError:
+                    parsed = None
+                if isinstance(parsed, dict) and "tasks" in parsed:
+                    # Structured output: {"tasks": [...]}
+                    tasks_data = parsed["tasks"]
+                elif isinstance(parsed, list):
+                    tasks_data = parsed
+                else:
+                    # Model ignored the response format - extract the first balanced top-level array
+                    json_array = _extract_json_array(content)
+                    if json_array is None:
+                        logger.error("❌ No valid JSON array found in response")
                         raise ValueError("No JSON array found in o3-mini response")
-                
-                print(f"🔄 Attempting to parse JSON...")
-                tasks_data = json.loads(content)
-                print(f"✅ JSON parsed successfully!")
-                print(f"📊 Parsed data type: {type(tasks_data)}")
-                print(f"📊 Number of tasks: {len(tasks_data) if isinstance(tasks_data, list) else 'Not a list'}")
+                    logger.debug("🔧 Extracted JSON: '%s...'", json_array[:100])
+                    content = json_array
+                    tasks_data = _json_loads(content)
+                logger.debug("✅ JSON parsed successfully!")
+                logger.debug("📊 Parsed data type: %s", type(tasks_data))
+                logger.debug("📊 Number of tasks: %s", len(tasks_data) if isinstance(tasks_data, list) else 'Not a list')
                 
                 # Log successful token management
                 if hasattr(response, 'usage') and response.usage:
                     usage = response.usage
                     efficiency = (usage.completion_tokens / dynamic_token_limit * 100)
-                    print(f"🎯 Token Management Summary:")
-                    print(f"   • Limit set: {dynamic_token_limit}")
-                    print(f"   • Actually used: {usage.completion_tokens}")
-                    print(f"   • Efficiency: {efficiency:.1f}%")
-                    print(f"   • Status: {'✅ Optimal' if 50 <= efficiency <= 90 else '⚠️ Suboptimal' if efficiency < 50 else '🔥 Near limit'}")
+                    logger.debug("🎯 Token Management Summary:")
+                    logger.debug("   • Limit set: %s", dynamic_token_limit)
+                    logger.debug("   • Actually used: %s", usage.completion_tokens)
+                    logger.debug("   • Efficiency: %.1f%%", efficiency)
+                    logger.debug("   • Status: %s", '✅ Optimal' if 50 <= efficiency <= 90 else '⚠️ Suboptimal' if efficiency < 50 else '🔥 Near limit')
                 
                 if isinstance(tasks_data, list):
                     for i, task in enumerate(tasks_data):
-                        print(f"  Task {i+1}: {task}")
+                        logger.debug("  Task %s: %s", i+1, task)
                 
                 if isinstance(tasks_data, list) and len(tasks_data) > 0:
-                    print(f"✅ o3-mini planning successful: {len(tasks_data)} tasks")
-                    return self._convert_to_agent_tasks(tasks_data, user_query)
+                    logger.info("✅ o3-mini planning successful: %s tasks", len(tasks_data))
+                    agent_tasks = self._convert_to_agent_tasks(tasks_data, user_query)
+                    if agent_tasks:
+                        self.plan_cache.put(plan_scope, user_query, tasks_data, query_embedding)
+                        await asyncio.to_thread(self.plan_cache.flush)
+                    return agent_tasks
                 else:
-                    print(f"❌ Invalid task data structure from o3-mini")
-                    print(f"📊 Data: {tasks_data}")
+                    logger.error("❌ Invalid task data structure from o3-mini")
+                    logger.debug("📊 Data: %s", tasks_data)
                     raise ValueError("Invalid task data structure from o3-mini")
 
             except Exception as parse_err:
-                print(f"❌ o3-mini JSON parsing failed!")
-                print(f"🔍 Parse error type: {type(parse_err).__name__}")
-                print(f"🔍 Parse error message: {str(parse_err)}")
-                print(f"📤 Original o3-mini response:")
-                print(f"--- ORIGINAL RESPONSE ---")
-                print(original_content)
-                print(f"--- END ORIGINAL ---")
-                print(f"🧹 Cleaned content that failed to parse:")
-                print(f"--- CLEANED CONTENT ---")
-                print(repr(content))  # Use repr to show exact characters
-                print(f"--- END CLEANED ---")
-                print("🔄 Falling back to dynamic default plan...")
+                logger.error("❌ o3-mini JSON parsing failed!")
+                logger.debug("🔍 Parse error type: %s", type(parse_err).__name__)
+                logger.debug("🔍 Parse error message: %s", str(parse_err))
+                logger.debug("📤 Original o3-mini response:")
+                logger.debug("--- ORIGINAL RESPONSE ---")
+                logger.debug("%s", original_content)
+                logger.debug("--- END ORIGINAL ---")
+                logger.debug("🧹 Cleaned content that failed to parse:")
+                logger.debug("--- CLEANED CONTENT ---")
+                logger.debug("%s", repr(content))  # Use repr to show exact characters
+                logger.debug("--- END CLEANED ---")
+                logger.debug("🔄 Falling back to dynamic default plan...")
                 return self._create_default_plan(user_query)
                 
         except Exception as e:
-            print(f"❌ o3-mini model call failed completely!")
-            print(f"🔍 Error type: {type(e).__name__}")
-            print(f"🔍 Error message: {str(e)}")
-            print(f"🔍 Full error details:")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ o3-mini model call failed completely!")
+            logger.debug("🔍 Error type: %s", type(e).__name__)
+            logger.debug("🔍 Error message: %s", str(e))
+            logger.debug("🔍 Full error details:", exc_info=True)
             
             # Try GPT-4o-mini as fallback (from OPENAI_MODEL env var)
             try:
                 fallback_model = self.fast_model  # This uses OPENAI_MODEL from env (gpt-4o-mini)
-                print(f"🤖 Attempting {fallback_model} fallback for planning...")
-                fallback_response = self.client.chat.completions.create(
+                logger.debug("🤖 Attempting %s fallback for planning...", fallback_model)
+                fallback_response = await self._get_openai().chat.completions.create(
                     model=fallback_model,
                     messages=[
                         {"role": "system", "content": "You are a helpful AI agent that creates execution plans for data analysis queries."},
@@ -807,7 +1228,7 @@ No explanations or extra text."""
                 )
                 
                 fallback_content = fallback_response.choices[0].message.content.strip()
-                print(f"✅ {fallback_model} fallback response received")
+                logger.debug("✅ %s fallback response received", fallback_model)
                 
                 # Clean and parse GPT-4 response
                 if "```json" in fallback_content:
@@ -816,18 +1237,169 @@ No explanations or extra text."""
                     fallback_content = fallback_content.split("```")[1].strip()
                 
                 fallback_plan = json.loads(fallback_content)
-                print(f"✅ {fallback_model} fallback plan parsed successfully!")
-                return fallback_plan
+                logger.debug("✅ %s fallback plan parsed successfully!", fallback_model)
+                if isinstance(fallback_plan, dict):
+                    fallback_plan = fallback_plan.get("tasks", [])
+                fallback_tasks = self._convert_to_agent_tasks(fallback_plan, user_query) if isinstance(fallback_plan, list) else []
+                return fallback_tasks or self._create_default_plan(user_query)
                 
             except Exception as fallback_error:
-                print(f"❌ {fallback_model} fallback also failed: {fallback_error}")
-                print("🔄 Using dynamic default plan as final fallback...")
+                logger.error("❌ %s fallback also failed: %s", fallback_model, fallback_error)
+                logger.debug("🔄 Using dynamic default plan as final fallback...")
                 return self._create_default_plan(user_query)
             
-            print("🔄 Falling back to dynamic default plan...")
+            logger.debug("🔄 Falling back to dynamic default plan...")
             return self._create_default_plan(user_query)
     
+    # Tool singletons: constructed on first use and reused by every query (warm HTTP/DB clients)
+    @staticmethod
+    def _construct_tool(tool_class, name: str, **kwargs):
+        if tool_class is None:
+            raise RuntimeError(f"{name} could not be imported")
+        return tool_class(**kwargs)
+    
+    @functools.cached_property
+    def semantic_dict(self):
+        return self._construct_tool(SemanticDictionary, "SemanticDictionary")
+    
+    @functools.cached_property
+    def vector_matcher(self):
+        """Shared OpenAIVectorMatcher - one HTTP pool and embedding cache across queries"""
+        # warmup loads the persisted schema embeddings and opens the API connection in the background
+        return self._construct_tool(OpenAIVectorMatcher, "OpenAIVectorMatcher", warmup=True)
+    
+    @functools.cached_property
+    def sql_runner(self):
+        """Shared SQLRunner - keeps its database adapter between queries"""
+        return self._construct_tool(SQLRunner, "SQLRunner")
+    
+    @functools.cached_property
+    def chart_builder(self):
+        return self._construct_tool(ChartBuilder, "ChartBuilder")
+    
+    @functools.cached_property
+    def schema_retriever(self):
+        return self._construct_tool(SchemaRetriever, "SchemaRetriever")
+    
+    def _get_openai(self):
+        """Shared AsyncOpenAI client for all LLM calls made by the orchestrator"""
+        if self._openai is None:
+            if AsyncOpenAI is None:
+                raise RuntimeError("openai package is not installed")
+            self._openai = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        return self._openai
+    
+    def _get_openai_sync(self):
+        """Shared synchronous OpenAI client for the few non-async helpers"""
+        if self._openai_sync is None:
+            if OpenAI is None:
+                raise RuntimeError("openai package is not installed")
+            self._openai_sync = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        return self._openai_sync
+    
+    async def _embed_plan_query(self, client, text: str) -> Optional[np.ndarray]:
+        """Unit-length query embedding for plan/query cache lookups (None if unavailable)"""
+        cached = self._query_embeddings.get(text)
+        if cached is not None:
+            self._query_embeddings.move_to_end(text)
+            return cached
+        try:
+            response = await client.embeddings.create(model=self.plan_cache_embed_model, input=text)
+            vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm == 0:
+                return None
+            vector /= norm
+            self._query_embeddings[text] = vector
+            while len(self._query_embeddings) > 64:
+                self._query_embeddings.popitem(last=False)
+            return vector
+        except Exception as e:
+            print(f"⚠️ Plan cache embedding failed, exact matching only: {e}")
+            return None
+    
+    def _build_planning_prompt_parts(self) -> Tuple[str, str]:
+        """Static planning prompt text around the per-query USER QUERY/context section"""
+        head = """You are an intelligent **Query Orchestrator** for pharmaceutical data analysis. You plan the sequence of tasks needed to fulfill the user's request and output them as a structured JSON plan.
+
+"""
+        tail = """
+
+=== ROLE & GOAL ===
+You are a highly reliable planning agent ("brilliant new analyst") that:
+- Plans multi-step data workflows using available capabilities.
+- Requires explicit, structured instruction and always favors accuracy and clarity.
+- Uses conversation context to make intelligent decisions about follow-up queries.
+
+=== TOOLS & CAPABILITIES ===
+Available capabilities:
+• schema_discovery: Explore tables & columns in the database (MUST be first for any DB query).  
+• semantic_understanding: Map business intent to schema terms.  
+• similarity_matching: Match user terms to schema.  
+• user_interaction: Ask user to clarify ambiguous or missing information.  
+• query_generation: Generate SQL based on schema.  
+• execution: Run SQL and retrieve results.  
+• python_generation: Generate Python/pandas code for analysis.  
+• visualization_builder: Execute Python code to build Plotly visuals.
+
+=== INTELLIGENT PLANNING RULES ===
+1. **schema_discovery** is MANDATORY and ALWAYS first for any database operation.  
+2. If schema_context only includes table names (no columns), still perform schema_discovery for full metadata.  
+
+**DATA vs VISUALIZATION DETECTION:**
+3. ONLY add visualization steps if the user EXPLICITLY requests charts, graphs, plots, or visual analysis:
+   - Explicit visualization requests: "show me a chart", "create a graph", "visualize", "plot this data"
+   - Data-only requests: "show me data", "get records", "find patients", "list results" → NO visualization
+   - Analysis requests: "analyze", "compare", "trends" → Use context clues, usually NO visualization unless explicit
+
+**FOLLOW-UP INTELLIGENCE (CRITICAL):**
+4. **BEFORE planning, detect if this is a follow-up query:**
+   - Words like "above", "this", "that", "previous", "earlier" indicate follow-up
+   - If follow-up detected AND conversation context available → SKIP schema_discovery
+   - Follow-up patterns:
+     * "insights from above chart" → Generate insights only (NO schema_discovery)
+     * "show chart of this data" → visualization_builder only (reuse previous SQL)
+     * "explain that result" → interpretation only
+5. **FOLLOW-UP DATA VALIDATION:**
+   - If follow-up requests chart/visualization BUT no actual data available from previous queries
+   - Fall back to complete workflow: schema_discovery → query_generation → execution → python_generation → visualization_builder
+   - Look for "PREVIOUS QUERY RESULTS" section - if missing or empty, treat as new query
+6. For follow-up queries about "this/that/above data" requesting visualization:
+   - If previous query context available, you may need to re-run similar SQL first
+   - Then add python_generation → visualization_builder for the chart request
+7. For follow-up data clarification (no visualization request):
+   - Focus on refined query_generation without visualization steps
+
+**WORKFLOW PATTERNS:**
+8. Simple data retrieval → schema_discovery → query_generation → execution
+9. EXPLICIT visualization → schema_discovery → query_generation → execution → python_generation → visualization_builder
+10. Ambiguous query → schema_discovery → user_interaction → query_generation → execution
+11. **FOLLOW-UP insight generation** → python_generation ONLY (NO schema_discovery)
+12. **FOLLOW-UP visualization WITH data** → python_generation → visualization_builder ONLY (reuse context)
+13. **FOLLOW-UP visualization WITHOUT data** → schema_discovery → query_generation → execution → python_generation → visualization_builder (complete workflow)
+14. **FOLLOW-UP data clarification** → query_generation → execution ONLY (refine previous query)=== CRITICAL CONSTRAINTS ===
+- NO hardcoded visualization steps unless user explicitly asks for charts/graphs/plots
+- Use conversation context to understand follow-up intent
+- Always output structured JSON — NO natural language commentary outside the JSON
+- Let the LLM (you) decide based on query intent, not keywords
+
+=== OUTPUT FORMAT ===
+Output ONLY a JSON object whose `tasks` array lists the task objects in execution order. Each task has `task_id`, `task_type` and `dependencies` (the task_ids whose results it needs; [] only for tasks that need no earlier results, so independent tasks can run in parallel). Example:
+
+{"tasks": [
+  {"task_id": "1_schema_discovery", "task_type": "schema_discovery", "dependencies": []},
+  {"task_id": "2_query_generation", "task_type": "query_generation", "dependencies": ["1_schema_discovery"]},
+  {"task_id": "3_execution", "task_type": "execution", "dependencies": ["2_query_generation"]}
+]}
+
+No explanations or extra text."""
+        return head, tail
+    
     def _format_agent_capabilities(self) -> str:
+        """Format agent capabilities for the prompt (precomputed in __init__)"""
+        return self._agent_capabilities_str
+    
+    def _format_agent_capabilities_impl(self) -> str:
         """Format agent capabilities for the prompt"""
         capabilities = []
         for agent_name, capability in self.available_agents.items():
@@ -843,6 +1415,10 @@ No explanations or extra text."""
         """Convert JSON task data to AgentTask objects"""
         print(f"🔄 Converting {len(tasks_data)} tasks to AgentTask objects...")
         tasks = []
+        # Plans list tasks in execution order. Without any explicit dependencies
+        # (older cached plans, models ignoring the field) each task waits for the previous one,
+        # otherwise execute_plan would start every task at once.
+        chain_tasks = not any(isinstance(t, dict) and t.get("dependencies") for t in tasks_data)
         
         for i, task_data in enumerate(tasks_data):
             print(f"📋 Processing task {i+1}: {task_data}")
@@ -854,18 +1430,14 @@ No explanations or extra text."""
                 print(f"  🏷️ Task ID: {task_id}")
                 print(f"  🔧 Task Type String: {task_type_str}")
                 
-                if not task_type_str:
-                    print(f"  ⚠️ Missing task_type, skipping task")
-                    continue
-                
-                # Convert string to TaskType enum
-                try:
-                    task_type = TaskType(task_type_str)
-                    print(f"  ✅ Task Type Enum: {task_type}")
-                except ValueError as e:
-                    print(f"  ❌ Invalid task_type '{task_type_str}': {e}")
-                    print(f"  📋 Valid task types: {[t.value for t in TaskType]}")
-                    continue
+                # Reverse lookup instead of TaskType(...): unknown or missing types degrade to
+                # schema discovery so task ids referenced by dependencies stay in the plan
+                task_type = _TASK_TYPES_BY_VALUE.get(task_type_str)
+                if task_type is None:
+                    logger.warning("⚠️ Unknown task_type %r for task %s - using %s (valid: %s)",
+                                   task_type_str, task_id, TaskType.SCHEMA_DISCOVERY.value, list(_TASK_TYPES_BY_VALUE))
+                    task_type = TaskType.SCHEMA_DISCOVERY
+                print(f"  ✅ Task Type Enum: {task_type}")
                 
                 task = AgentTask(
                     task_id=task_id,
@@ -873,7 +1445,7 @@ No explanations or extra text."""
                     input_data=task_data.get("input_requirements", {"query": user_query}),
                     required_output=task_data.get("output_expectations", {}),
                     constraints=task_data.get("constraints", {}),
-                    dependencies=task_data.get("dependencies", [])
+                    dependencies=[tasks[-1].task_id] if chain_tasks and tasks else task_data.get("dependencies", [])
                 )
                 tasks.append(task)
                 print(f"  ✅ Task created successfully")
@@ -884,7 +1456,37 @@ No explanations or extra text."""
                 continue
         
         print(f"✅ Successfully converted {len(tasks)} out of {len(tasks_data)} tasks")
-        return tasks
+        return self._parallelize_query_only_tasks(tasks)
+    
+    @staticmethod
+    def _parallelize_query_only_tasks(tasks: List[AgentTask]) -> List[AgentTask]:
+        """
+        Drop the dependencies of query-only tasks (schema discovery, semantic understanding) so
+        execute_plan runs them in the same level. Their dependents inherit the dropped edges,
+        so e.g. similarity matching chained after semantic analysis still waits for schema discovery.
+        """
+        original_deps = {task.task_id: task.dependencies for task in tasks}
+        query_only = {task.task_id for task in tasks if task.task_type in _QUERY_ONLY_TASK_TYPES}
+        if not query_only:
+            return tasks
+        
+        relaxed = []
+        for task in tasks:
+            if task.task_id in query_only:
+                dependencies = ()
+            else:
+                dependencies = []
+                pending = list(task.dependencies)
+                while pending:
+                    dep = pending.pop(0)
+                    if dep in dependencies:
+                        continue
+                    dependencies.append(dep)
+                    if dep in query_only:
+                        pending.extend(original_deps.get(dep, ()))
+                dependencies = tuple(dependencies)
+            relaxed.append(task if dependencies == task.dependencies else dataclasses.replace(task, dependencies=dependencies))
+        return relaxed
     
     def _create_default_plan(self, user_query: str) -> List[AgentTask]:
         """Create a query-aware execution plan based on user intent"""
@@ -905,81 +1507,17 @@ No explanations or extra text."""
             'rows', 'records', 'data', 'table'
         ]) and not needs_visualization
         
-        # Start with core required tasks
+        # Start with core required tasks, add visualization tasks only if needed
+        template = _DEFAULT_PLAN_TEMPLATE if needs_visualization else _DEFAULT_PLAN_TEMPLATE[:_DEFAULT_PLAN_CORE_TASKS]
         tasks = [
-            AgentTask(
-                task_id="1_discover_schema",
-                task_type=TaskType.SCHEMA_DISCOVERY,
-                input_data={"query": user_query},
-                required_output={"schema_context": "discovered_tables_and_columns"},
-                constraints={"max_tables": 20},
-                dependencies=[]
-            ),
-            AgentTask(
-                task_id="2_semantic_analysis", 
-                task_type=TaskType.SEMANTIC_UNDERSTANDING,
-                input_data={"query": user_query},
-                required_output={"entities": "extracted_entities", "intent": "business_intent"},
-                constraints={},
-                dependencies=[]
-            ),
-            AgentTask(
-                task_id="3_similarity_matching",
-                task_type=TaskType.SIMILARITY_MATCHING, 
-                input_data={"entities": "from_task_2", "schema": "from_task_1"},
-                required_output={"matched_tables": "relevant_tables", "matched_columns": "relevant_columns"},
-                constraints={"min_similarity": 0.7},
-                dependencies=["1_discover_schema", "2_semantic_analysis"]
-            ),
-            AgentTask(
-                task_id="4_user_verification",
-                task_type=TaskType.USER_INTERACTION,
-                input_data={"proposed_matches": "from_task_3"},
-                required_output={"confirmed_tables": "user_approved_tables", "confirmed_columns": "user_approved_columns"},
-                constraints={"require_explicit_approval": True},
-                dependencies=["3_similarity_matching"]
-            ),
-            AgentTask(
-                task_id="5_query_generation",
-                task_type=TaskType.QUERY_GENERATION,
-                input_data={"confirmed_schema": "from_task_4", "original_query": user_query},
-                required_output={"sql_query": "generated_sql", "explanation": "query_explanation"},
-                constraints={"add_safety_checks": True},
-                dependencies=["4_user_verification"]
-            ),
-            AgentTask(
-                task_id="6_query_execution",
-                task_type=TaskType.EXECUTION,
-                input_data={"validated_query": "from_task_5"},
-                required_output={"results": "query_results", "metadata": "execution_metadata"},
-                constraints={"timeout": 300, "max_rows": 10000},
-                dependencies=["5_query_generation"]
-            )
+            dataclasses.replace(task, input_data={
+                key: user_query if value == _QUERY_PLACEHOLDER else value for key, value in task.input_data.items()
+            }) if _QUERY_PLACEHOLDER in task.input_data.values() else task
+            for task in template
         ]
         
-        # Add visualization tasks only if needed
         if needs_visualization:
             print("📊 Adding Python generation and visualization builder tasks based on query intent")
-            tasks.append(
-                AgentTask(
-                    task_id="7_python_generation",
-                    task_type=TaskType.PYTHON_GENERATION,
-                    input_data={"results": "from_task_6", "original_query": user_query, "schema_context": "from_task_1"},
-                    required_output={"python_code": "generated_python_code", "analysis_plan": "code_explanation"},
-                    constraints={"safe_execution": True, "libraries": ["pandas", "plotly", "matplotlib"]},
-                    dependencies=["6_query_execution"]
-                )
-            )
-            tasks.append(
-                AgentTask(
-                    task_id="8_visualization_builder",
-                    task_type=TaskType.VISUALIZATION_BUILDER,
-                    input_data={"python_code": "from_task_7", "results": "from_task_6", "original_query": user_query},
-                    required_output={"charts": "interactive_charts", "summary": "narrative_summary", "chart_metadata": "visualization_info"},
-                    constraints={"interactive": True, "safe_execution": True},
-                    dependencies=["7_python_generation"]
-                )
-            )
         else:
             print("📋 Skipping visualization - query appears to be simple data retrieval")
         
@@ -994,7 +1532,9 @@ No explanations or extra text."""
         completed_tasks = set()
         total_tasks = len(tasks)
         
-        print(f"🚀 Executing {total_tasks} planned tasks for query: '{user_query[:50]}...'")
+        plan_start = time.perf_counter()
+        logger.info("🚀 Executing %d planned tasks for query: '%s...'", total_tasks, user_query[:50],
+                    extra={"total_tasks": total_tasks})
         
         # Initialize progress
         await async_broadcast_progress({
@@ -1005,70 +1545,62 @@ No explanations or extra text."""
             "tasks": [{"id": task.task_id, "type": task.task_type.value, "status": "pending"} for task in tasks]
         })
         
-        while len(completed_tasks) < len(tasks):
-            # Find tasks ready to execute (dependencies met)
-            ready_tasks = [
-                task for task in tasks 
-                if task.task_id not in completed_tasks 
-                and all(dep in completed_tasks for dep in task.dependencies)
-            ]
+        # Build the dependency DAG once (Kahn's algorithm) instead of rescanning every task per round
+        task_by_id = {task.task_id: task for task in tasks}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        remaining_deps: Dict[str, int] = {}
+        for task in tasks:
+            deps = set(task.dependencies)
+            remaining_deps[task.task_id] = len(deps)
+            for dep in deps:
+                dependents[dep].append(task.task_id)
+        ready_queue = deque(task for task in tasks if remaining_deps[task.task_id] == 0)
+        # "from_task_N" markers resolve through this map instead of scanning all results
+        task_id_by_prefix = self._build_task_id_prefix_map(task.task_id for task in tasks)
+        # TaskType value -> first result of that type, so executors look results up by type directly
+        results_by_type: Dict[str, Any] = {}
+        
+        while ready_queue:
+            # Drain the queue level by level so each level runs as one concurrent batch
+            ready_tasks = list(ready_queue)
+            ready_queue.clear()
+            
+            # Independent tasks run concurrently; user interaction blocks on a human so stays serial
+            parallel_tasks = [task for task in ready_tasks if task.task_type != TaskType.USER_INTERACTION]
+            serial_tasks = [task for task in ready_tasks if task.task_type == TaskType.USER_INTERACTION]
+            
+            outcomes = await asyncio.gather(*[
+                self._run_planned_task(task, results, completed_tasks, total_tasks, user_query, user_id, conversation_context,
+                                       task_id_by_prefix, results_by_type)
+                for task in parallel_tasks
+            ], return_exceptions=True)
+            
+            for task, outcome in zip(parallel_tasks, outcomes):
+                if not isinstance(outcome, BaseException):
+                    continue
+                # Decide whether to continue or abort
+                if not isinstance(outcome, Exception) or task.task_type == TaskType.VALIDATION:
+                    # Critical tasks - abort
+                    raise outcome
+                # Non-critical - continue with fallback
+                results[task.task_id] = {"error": str(outcome), "fallback_used": True}
+                results_by_type.setdefault(task.task_type.value, results[task.task_id])
+                completed_tasks.add(task.task_id)
+            
+            # User interaction failures are critical and propagate directly
+            for task in serial_tasks:
+                await self._run_planned_task(task, results, completed_tasks, total_tasks, user_query, user_id, conversation_context,
+                                             task_id_by_prefix, results_by_type)
             
-            if not ready_tasks:
-                print("❌ No ready tasks found - possible circular dependency")
-                break
-                
-            # Execute ready tasks (could be parallel in future)
             for task in ready_tasks:
-                print(f"▶️  Executing {task.task_id}: {task.task_type.value}")
-                
-                # Broadcast task start
-                await async_broadcast_progress({
-                    "stage": "task_started",
-                    "currentStep": task.task_id,
-                    "stepName": task.task_type.value.replace('_', ' ').title(),
-                    "completedSteps": len(completed_tasks),
-                    "totalSteps": total_tasks,
-                    "progress": (len(completed_tasks) / total_tasks) * 100
-                })
-                
-                try:
-                    task_result = await self._execute_single_task(task, results, user_query, user_id, conversation_context)
-                    results[task.task_id] = task_result
-                    completed_tasks.add(task.task_id)
-                    print(f"✅ Completed {task.task_id}")
-                    
-                    # Broadcast task completion
-                    await async_broadcast_progress({
-                        "stage": "task_completed",
-                        "currentStep": task.task_id,
-                        "stepName": task.task_type.value.replace('_', ' ').title(),
-                        "completedSteps": len(completed_tasks),
-                        "totalSteps": total_tasks,
-                        "progress": (len(completed_tasks) / total_tasks) * 100
-                    })
-                    
-                except Exception as e:
-                    print(f"❌ Task {task.task_id} failed: {e}")
-                    
-                    # Broadcast task error
-                    await async_broadcast_progress({
-                        "stage": "task_error",
-                        "currentStep": task.task_id,
-                        "stepName": task.task_type.value.replace('_', ' ').title(),
-                        "error": str(e),
-                        "completedSteps": len(completed_tasks),
-                        "totalSteps": total_tasks,
-                        "progress": (len(completed_tasks) / total_tasks) * 100
-                    })
-                    
-                    # Decide whether to continue or abort
-                    if task.task_type in [TaskType.USER_INTERACTION, TaskType.VALIDATION]:
-                        # Critical tasks - abort
-                        raise
-                    else:
-                        # Non-critical - continue with fallback
-                        results[task.task_id] = {"error": str(e), "fallback_used": True}
-                        completed_tasks.add(task.task_id)
+                for child_id in dependents.get(task.task_id, ()):
+                    remaining_deps[child_id] -= 1
+                    if remaining_deps[child_id] == 0:
+                        ready_queue.append(task_by_id[child_id])
+        
+        if len(completed_tasks) < len(tasks):
+            logger.error("❌ No ready tasks found - possible circular dependency",
+                         extra={"pending_tasks": [t.task_id for t in tasks if t.task_id not in completed_tasks]})
         
         # Broadcast execution completion
         await async_broadcast_progress({
@@ -1079,18 +1611,89 @@ No explanations or extra text."""
             "message": f"All {total_tasks} tasks completed successfully"
         })
         
-        print(f"🎉 All {total_tasks} tasks completed successfully!")
+        logger.info("🎉 All %d tasks completed successfully!", total_tasks,
+                    extra={"total_tasks": total_tasks, "duration_ms": (time.perf_counter() - plan_start) * 1000})
         
         return results
     
-    async def _execute_single_task(self, task: AgentTask, previous_results: Dict, user_query: str, user_id: str = "default", conversation_context: Dict = None) -> Dict[str, Any]:
+    def _get_task_semaphore(self) -> asyncio.Semaphore:
+        """Task concurrency semaphore for the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._task_semaphore is None or self._task_semaphore_loop is not loop:
+            self._task_semaphore = asyncio.Semaphore(self._max_parallel_tasks)
+            self._task_semaphore_loop = loop
+        return self._task_semaphore
+    
+    async def _run_planned_task(self, task: AgentTask, results: Dict, completed_tasks: set, total_tasks: int,
+                                user_query: str, user_id: str = "default", conversation_context: Dict = None,
+                                task_id_by_prefix: Optional[Dict[str, str]] = None,
+                                results_by_type: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run one ready task under the concurrency cap and broadcast its progress"""
+        async with self._get_task_semaphore():
+            logger.info("▶️  Executing %s: %s", task.task_id, task.task_type.value,
+                        extra={"task_id": task.task_id, "task_type": task.task_type.value})
+            task_start = time.perf_counter()
+            
+            # Broadcast task start
+            await async_broadcast_progress({
+                "stage": "task_started",
+                "currentStep": task.task_id,
+                "stepName": task.task_type.value.replace('_', ' ').title(),
+                "completedSteps": len(completed_tasks),
+                "totalSteps": total_tasks,
+                "progress": (len(completed_tasks) / total_tasks) * 100
+            })
+            
+            try:
+                task_result = await self._execute_single_task(task, results, user_query, user_id, conversation_context,
+                                                              task_id_by_prefix, results_by_type)
+            except Exception as e:
+                logger.error("❌ Task %s failed: %s", task.task_id, e,
+                             extra={"task_id": task.task_id, "task_type": task.task_type.value,
+                                    "duration_ms": (time.perf_counter() - task_start) * 1000})
+                
+                # Broadcast task error
+                await async_broadcast_progress({
+                    "stage": "task_error",
+                    "currentStep": task.task_id,
+                    "stepName": task.task_type.value.replace('_', ' ').title(),
+                    "error": str(e),
+                    "completedSteps": len(completed_tasks),
+                    "totalSteps": total_tasks,
+                    "progress": (len(completed_tasks) / total_tasks) * 100
+                })
+                raise
+        
+        results[task.task_id] = task_result
+        if results_by_type is not None:
+            results_by_type.setdefault(task.task_type.value, task_result)
+        completed_tasks.add(task.task_id)
+        logger.info("✅ Completed %s", task.task_id,
+                    extra={"task_id": task.task_id, "task_type": task.task_type.value,
+                           "duration_ms": (time.perf_counter() - task_start) * 1000})
+        
+        # Broadcast task completion
+        await async_broadcast_progress({
+            "stage": "task_completed",
+            "currentStep": task.task_id,
+            "stepName": task.task_type.value.replace('_', ' ').title(),
+            "completedSteps": len(completed_tasks),
+            "totalSteps": total_tasks,
+            "progress": (len(completed_tasks) / total_tasks) * 100
+        })
+        return task_result
+    
+    async def _execute_single_task(self, task: AgentTask, previous_results: Dict, user_query: str, user_id: str = "default", conversation_context: Dict = None,
+                                   task_id_by_prefix: Optional[Dict[str, str]] = None,
+                                   results_by_type: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Execute a single agent task"""
         
         # Get the appropriate agent based on task type
         agent_name = self._select_agent_for_task(task.task_type)
         
         # Prepare input data by resolving dependencies
-        resolved_input = self._resolve_task_inputs(task, previous_results, user_query, user_id, conversation_context)
+        resolved_input = self._resolve_task_inputs(task, previous_results, user_query, user_id, conversation_context,
+                                                   task_id_by_prefix, results_by_type)
         
         # Execute based on task type
         if task.task_type == TaskType.SCHEMA_DISCOVERY:
@@ -1126,7 +1729,19 @@ No explanations or extra text."""
         }
         return agent_mapping.get(task_type, "schema_discoverer")
     
-    def _resolve_task_inputs(self, task: AgentTask, previous_results: Dict, user_query: str, user_id: str = "default", conversation_context: Dict = None) -> Dict[str, Any]:
+    @staticmethod
+    def _build_task_id_prefix_map(task_ids) -> Dict[str, str]:
+        """Map the numeric prefix of each task_id ("3" for "3_similarity_matching") to the first task using it"""
+        task_id_by_prefix = {}
+        for task_id in task_ids:
+            prefix, sep, _ = task_id.partition("_")
+            if sep:
+                task_id_by_prefix.setdefault(prefix, task_id)
+        return task_id_by_prefix
+    
+    def _resolve_task_inputs(self, task: AgentTask, previous_results: Dict, user_query: str, user_id: str = "default", conversation_context: Dict = None,
+                             task_id_by_prefix: Optional[Dict[str, str]] = None,
+                             results_by_type: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Resolve task inputs from previous task results"""
         # Fix user_id mapping - RBAC expects "default_user" not "default"
         if user_id == "default":
@@ -1134,16 +1749,23 @@ No explanations or extra text."""
             
         resolved = {
             "original_query": user_query,
-            "user_id": user_id
+            "user_id": user_id,
+            "constraints": task.constraints or {}
         }
         
         # Add conversation context if available
         if conversation_context:
             resolved["conversation_context"] = conversation_context
         
-        # Add all previous results to the resolved inputs
-        for prev_task_id, prev_result in previous_results.items():
-            resolved[prev_task_id] = prev_result
+        # Add all previous results to the resolved inputs (reference copy - the task
+        # executors look results up by task id via _find_task_result_by_type)
+        resolved.update(previous_results)
+        if results_by_type:
+            # Snapshot: peers in the same level finish while this task runs
+            resolved[_RESULTS_BY_TYPE_KEY] = dict(results_by_type)
+        
+        if task_id_by_prefix is None:
+            task_id_by_prefix = self._build_task_id_prefix_map(previous_results)
         
         # Handle specific input requirements
         for key, value in task.input_data.items():
@@ -1151,11 +1773,9 @@ No explanations or extra text."""
                 # Extract task number from "from_task_2" format
                 task_number = value.replace("from_task_", "")
                 
-                # Look for task with this number in the results
-                for prev_task_id, prev_result in previous_results.items():
-                    if prev_task_id.startswith(f"{task_number}_"):
-                        resolved[key] = prev_result
-                        break
+                prev_task_id = task_id_by_prefix.get(task_number)
+                if prev_task_id in previous_results:
+                    resolved[key] = previous_results[prev_task_id]
                 else:
                     print(f"⚠️ Could not resolve {value} for task {task.task_id}")
                     resolved[key] = {}
@@ -1166,20 +1786,27 @@ No explanations or extra text."""
     
     def _find_task_result_by_type(self, inputs: Dict, task_type: str) -> Dict[str, Any]:
         """Universal helper to find task results by type regardless of naming convention"""
+        # Fast path: execute_plan records results by TaskType value, no key pattern scan needed
+        by_type = inputs.get(_RESULTS_BY_TYPE_KEY)
+        if by_type:
+            result = by_type.get(_TASK_TYPE_LOOKUP_ALIASES.get(task_type, task_type))
+            if result is not None:
+                return result
+        
         # Debug logging
-        if task_type == "execution":
-            print(f"🔍 Looking for execution results in inputs...")
-            print(f"   Available keys: {list(inputs.keys())}")
+        if task_type == "execution" and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🔍 Looking for execution results in inputs...")
+            logger.debug("   Available keys: %s", list(inputs.keys()))
             
             # Check results structure specifically
             results = inputs.get('results', {})
             if isinstance(results, dict):
-                print(f"   Results keys: {list(results.keys())}")
+                logger.debug("   Results keys: %s", list(results.keys()))
                 for key, value in results.items():
                     if 'execution' in key.lower():
-                        print(f"   Found execution key: {key}")
+                        logger.debug("   Found execution key: %s", key)
                         if isinstance(value, dict) and 'results' in value:
-                            print(f"   Has results data: {len(value['results']) if value['results'] else 0} rows")
+                            logger.debug("   Has results data: %s rows", len(value['results']) if value['results'] else 0)
         
         # Try direct match first (for consistency)
         if task_type in inputs:
@@ -1196,7 +1823,7 @@ No explanations or extra text."""
             for key, value in results.items():
                 if task_type in key.lower():
                     if task_type == "execution":
-                        print(f"✅ Found execution result under key: {key}")
+                        logger.debug("✅ Found execution result under key: %s", key)
                     return value
         
         # Map task types to common patterns
@@ -1222,7 +1849,7 @@ No explanations or extra text."""
             for pattern in patterns:
                 if pattern in search_space:
                     if task_type == "execution":
-                        print(f"✅ Found execution via pattern {pattern}")
+                        logger.debug("✅ Found execution via pattern %s", pattern)
                     return search_space[pattern]
             
             # Partial matches (key contains pattern)
@@ -1230,11 +1857,11 @@ No explanations or extra text."""
                 for pattern in patterns:
                     if pattern.lower() in key.lower():
                         if task_type == "execution":
-                            print(f"✅ Found execution via partial match: {key} contains {pattern}")
+                            logger.debug("✅ Found execution via partial match: %s contains %s", key, pattern)
                         return search_space[key]
         
         if task_type == "execution":
-            print(f"❌ No execution results found in any search space")
+            logger.warning("❌ No execution results found in any search space")
         
         return {}
     
@@ -1243,6 +1870,7 @@ No explanations or extra text."""
         return inputs.get("user_id", "default_user")
     
     # Individual task execution methods using real agents
+    @memoize_async(TaskType.SCHEMA_DISCOVERY, lambda self, inputs: inputs.get("original_query", ""))
     async def _execute_schema_discovery(self, inputs: Dict) -> Dict[str, Any]:
         """Execute schema discovery task using Pinecone vector search"""
         try:
@@ -1251,17 +1879,18 @@ No explanations or extra text."""
             
             query = inputs.get("original_query", "")
             
-            print("🔍 Using Pinecone for schema discovery and table suggestions")
+            logger.info("🔍 Using Pinecone for schema discovery and table suggestions")
             
             # Check if Pinecone index has data, auto-index if needed
             try:
-                stats = self.pinecone_store.index.describe_index_stats()
+                stats = await self._cached_index_stats()
                 if stats.total_vector_count == 0:
-                    print("📊 Pinecone index is empty - starting automatic schema indexing...")
+                    logger.info("📊 Pinecone index is empty - starting automatic schema indexing...")
                     await self.pinecone_store.index_database_schema(self.db_connector)
-                    print("✅ Auto-indexing complete!")
+                    self._invalidate_schema_caches()
+                    logger.info("✅ Auto-indexing complete!")
             except Exception as auto_index_error:
-                print(f"⚠️ Auto-indexing failed: {auto_index_error}")
+                logger.warning("⚠️ Auto-indexing failed: %s", auto_index_error)
                 # Fall back to traditional schema discovery if Pinecone fails
                 return await self._fallback_schema_discovery(inputs)
             
@@ -1269,44 +1898,43 @@ No explanations or extra text."""
             table_matches = await self.pinecone_store.search_relevant_tables(query, top_k=4)
             
             # CRITICAL FIX: Get detailed Pinecone matches with full metadata for SQL generation
-            detailed_pinecone_matches = []
-            for table_match in table_matches:
-                table_name = table_match['table_name']
-                try:
-                    # Get full table details with chunk metadata for each matched table
-                    table_details = await self.pinecone_store.get_table_details(table_name)
-                    if table_details:
-                        # Transform to expected pinecone_matches structure
-                        detailed_match = {
-                            'metadata': {
-                                'table_name': table_name,
-                                'chunks': table_details.get('chunks', {}),
-                                'content': table_details.get('description', ''),
-                                'columns': table_details.get('columns', [])
-                            },
-                            'score': table_match.get('best_score', 0.0)
-                        }
-                        detailed_pinecone_matches.append(detailed_match)
-                        print(f"🔍 Enhanced Pinecone match for {table_name} with {len(table_details.get('chunks', {}))} chunks")
-                except Exception as e:
-                    print(f"⚠️ Failed to get detailed metadata for {table_name}: {e}")
+            # (all matched tables are fetched concurrently in one window)
+            details_by_table = await self.pinecone_store.get_table_details_batch(
+                [table_match['table_name'] for table_match in table_matches]
+            )
+            schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
+            try:
+                # Enhanced SchemaRetriever gives column-level metadata (names, types) for the
+                # matched tables - avoids falling back to SELECT * and keeps latency low
+                retriever = self.schema_retriever
+            except Exception:
+                retriever = None
             
-            print(f"🎯 Generated {len(detailed_pinecone_matches)} detailed Pinecone matches for SQL generation")
+            # Single pass over the matches builds the SQL-generation matches, table details
+            # and user-facing suggestions together
+            detailed_pinecone_matches = []
             relevant_tables = []
-            for match in table_matches:
-                table_name = match['table_name']
-                # Get details for each table. Prefer a fast hybrid approach:
-                # 1) Use Pinecone for table discovery (we already have match)
-                # 2) Use the Enhanced SchemaRetriever to fetch column-level
-                #    metadata (names, types) for the matched tables. This avoids
-                #    falling back to SELECT * and keeps latency low by focusing
-                #    only on the small set of matched tables.
+            table_suggestions = []
+            for i, table_match in enumerate(table_matches):
+                table_name = table_match['table_name']
+                table_details = details_by_table.get(table_name)
+                if table_details:
+                    # Transform to expected pinecone_matches structure
+                    detailed_pinecone_matches.append({
+                        'metadata': {
+                            'table_name': table_name,
+                            'chunks': table_details.get('chunks', {}),
+                            'content': table_details.get('description', ''),
+                            'columns': table_details.get('columns', [])
+                        },
+                        'score': table_match.get('best_score', 0.0)
+                    })
+                    logger.debug("🔍 Enhanced Pinecone match for %s with %d chunks", table_name, len(table_details.get('chunks', {})))
+                
                 columns = []
                 try:
-                    # Try to use the SchemaRetriever for richer column info
-                    from backend.agents.schema_retriever import SchemaRetriever
-                    retriever = SchemaRetriever()
-                    schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
+                    if retriever is None:
+                        raise RuntimeError("SchemaRetriever unavailable")
                     col_info = await retriever.get_columns_for_table(table_name, schema=schema_name)
                     if col_info and isinstance(col_info, list):
                         for col in col_info:
@@ -1319,159 +1947,138 @@ No explanations or extra text."""
                 except Exception:
                     # Fall back to chunk-derived metadata if retriever isn't available
                     try:
-                        table_details = await self.pinecone_store.get_table_details(table_name)
-                        
-                        # Use enhanced column extraction from get_table_details
-                        extracted_columns = table_details.get('columns', [])
-                        for col_name in extracted_columns:
-                            columns.append({
-                                "name": col_name,
-                                "data_type": "unknown",
-                                "nullable": True,
-                                "description": None
-                            })
-                        
-                        # Fallback: check chunks manually if no columns extracted
-                        if not extracted_columns:
-                            for chunk_type, chunk_data in table_details.get('chunks', {}).items():
-                                if chunk_type in ['column_group', 'column']:
-                                    col_meta = chunk_data.get('metadata', {})
-                                    # Handle both direct column info and column group info
-                                    if 'columns' in col_meta:
-                                        for col_name in col_meta['columns']:
-                                            columns.append({
-                                                "name": col_name,
-                                                "data_type": "unknown", 
-                                                "nullable": True,
-                                                "description": None
-                                            })
-                                    elif 'column_name' in col_meta:
-                                        columns.append({
-                                            "name": col_meta.get("column_name", "unknown"),
-                                            "data_type": col_meta.get("data_type", "unknown"),
-                                            "nullable": True,
-                                            "description": None
-                                        })
+                        if table_details is None:
+                            table_details = await self.pinecone_store.get_table_details(table_name)
+                        columns = self._columns_from_table_details(table_details)
                     except Exception:
                         # As a last resort leave columns empty and let later
                         # steps handle column discovery per-table
                         columns = []
 
+                table_description = f"Table containing {table_name.replace('_', ' ').lower()} data"
                 relevant_tables.append({
                     "name": table_name,
-                    "schema": os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES"),
+                    "schema": schema_name,
                     "columns": columns,
                     "row_count": None,
-                    "description": f"Table containing {table_name.replace('_', ' ').lower()} data"
+                    "description": table_description
                 })
-            # Table suggestions for user - first create without row counts
-            table_suggestions = []
-            for i, match in enumerate(table_matches):
+                # Row counts are skipped for performance (saves 10+ seconds) - every table
+                # in Pinecone is assumed available, so no filtering/re-ranking is needed
                 table_suggestions.append({
                     "rank": i + 1,
-                    "table_name": match['table_name'],
-                    "relevance_score": match['best_score'],
-                    "description": f"Table containing {match['table_name'].replace('_', ' ').lower()} data",
-                    "chunk_types": list(match['chunk_types']),
-                    "estimated_relevance": "High" if match['best_score'] > 0.8 else "Medium" if match['best_score'] > 0.6 else "Low",
-                    "row_count": "Available"  # Skip expensive row count fetching for better performance
+                    "table_name": table_name,
+                    "relevance_score": table_match['best_score'],
+                    "description": table_description,
+                    "chunk_types": list(table_match['chunk_types']),
+                    "estimated_relevance": _CONFIDENCE_LABELS[_score_bucket(table_match['best_score'], _RELEVANCE_THRESHOLDS)].title(),
+                    "row_count": "Available"
                 })
             
-            # Skip row count fetching to improve performance (saves 10+ seconds)
-            print(f"⚡ Skipping row count fetching for performance - assuming all tables are available")
-            
-            # Set all tables as available since they exist in Pinecone
-            for suggestion in table_suggestions:
-                suggestion['row_count'] = "Available"
-            
-            # Filter out empty tables after checking row counts
-            filtered_suggestions = []
-            for suggestion in table_suggestions:
-                # Since we're not checking row counts, assume all tables are valid
-                print(f"✅ Including {suggestion['table_name']} - assumed available")
-                filtered_suggestions.append(suggestion)
-            
-            # Re-rank after filtering
-            for i, suggestion in enumerate(filtered_suggestions):
-                suggestion['rank'] = i + 1
-            print(f"✅ Pinecone schema discovery found {len(relevant_tables)} tables")
-            if filtered_suggestions:
-                print(f"💡 Generated {len(filtered_suggestions)} table suggestions for user selection")
+            logger.info("🎯 Generated %d detailed Pinecone matches for SQL generation", len(detailed_pinecone_matches))
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✅ Pinecone schema discovery found %d tables", len(relevant_tables),
+                            extra={"tables": [t["name"] for t in relevant_tables]})
+            if table_suggestions:
+                logger.info("💡 Generated %d table suggestions for user selection", len(table_suggestions))
             
             # CRITICAL FIX: Return matched_tables instead of discovered_tables 
             # so context building logic can properly populate matched_tables field
             matched_table_names = [t["name"] for t in relevant_tables]
-            print(f"🔍 DEBUG: Setting matched_tables to: {matched_table_names}")
+            logger.debug("🔍 DEBUG: Setting matched_tables to: %s", matched_table_names)
+            await self._register_tables_for_matching(matched_table_names)
             
             return {
                 "discovered_tables": matched_table_names,  # Keep for backward compatibility 
                 "matched_tables": matched_table_names,     # NEW: This will be picked up by context building
                 "table_details": relevant_tables,
-                "table_suggestions": filtered_suggestions,
+                "table_suggestions": table_suggestions,
                 "pinecone_matches": detailed_pinecone_matches,  # Use detailed matches for SQL generation
                 "table_matches": table_matches,  # Keep original for reference
                 "status": "completed"
             }
         except Exception as e:
-            print(f"❌ Pinecone schema discovery failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Pinecone schema discovery failed: %s", e)
             # Fall back to traditional schema discovery
             return await self._fallback_schema_discovery(inputs)
 
+    @staticmethod
+    def _columns_from_table_details(table_details: Dict) -> List[Dict[str, Any]]:
+        """Column entries from get_table_details output (aggregated columns, else column chunks)"""
+        extracted_columns = table_details.get('columns', [])
+        if extracted_columns:
+            return [{"name": col_name, "data_type": "unknown", "nullable": True, "description": None}
+                    for col_name in extracted_columns]
+        
+        # Chunks are keyed by chunk type - look up the column ones directly
+        columns = []
+        chunks = table_details.get('chunks', {})
+        for chunk_type in ('column_group', 'column'):
+            chunk_data = chunks.get(chunk_type)
+            if not chunk_data:
+                continue
+            col_meta = chunk_data.get('metadata', {})
+            # Handle both direct column info and column group info
+            if 'columns' in col_meta:
+                columns.extend({"name": col_name, "data_type": "unknown", "nullable": True, "description": None}
+                               for col_name in col_meta['columns'])
+            elif 'column_name' in col_meta:
+                columns.append({
+                    "name": col_meta.get("column_name", "unknown"),
+                    "data_type": col_meta.get("data_type", "unknown"),
+                    "nullable": True,
+                    "description": None
+                })
+        return columns
+
+    async def _register_tables_for_matching(self, table_names: List[str]):
+        """Embed newly discovered tables into the matcher's persistent table index (off the matching path)"""
+        if not table_names:
+            return
+        try:
+            await asyncio.to_thread(self.vector_matcher.add_tables, table_names)
+        except Exception as e:
+            logger.warning("⚠️ Could not add tables to the similarity index: %s", e)
+    
     async def _fallback_schema_discovery(self, inputs: Dict) -> Dict[str, Any]:
         """Fallback to traditional schema discovery if Pinecone fails"""
         try:
-            from backend.db.engine import get_adapter
-            
             print("🔄 Using fallback schema discovery...")
-            db_adapter = get_adapter("snowflake")
+            db_adapter = self.db_connector or await asyncio.to_thread(_get_snowflake_adapter)
             
             # Get limited set of tables for fallback
             schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
-            result = db_adapter.run(f"SHOW TABLES IN SCHEMA {schema_name} LIMIT 10", dry_run=False)
+            result = await asyncio.to_thread(db_adapter.run, f"SHOW TABLES IN SCHEMA {schema_name} LIMIT 10", dry_run=False)
             if result.error:
                 return {"error": f"Schema discovery failed: {result.error}", "status": "failed"}
             
             relevant_tables = []
             table_suggestions = []
             
-            for i, row in enumerate(result.rows[:4]):  # Limit to top 4
-                table_name = row[1] if len(row) > 1 else str(row[0])
-                try:
-                    # Get basic table info
-                    columns_result = db_adapter.run(f"DESCRIBE TABLE {table_name}", dry_run=False)
-                    columns = []
-                    if not columns_result.error:
-                        for col_row in columns_result.rows:
-                            columns.append({
-                                "name": col_row[0],
-                                "data_type": col_row[1],
-                                "nullable": col_row[2] == 'Y',
-                                "description": None
-                            })
-                    
-                    table_info = {
-                        "name": table_name,
-                        "schema": os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES"), 
-                        "columns": columns,
-                        "row_count": None,
-                        "description": f"Table containing {table_name.replace('_', ' ').lower()} data"
-                    }
-                    relevant_tables.append(table_info)
-                    
-                    # Add to suggestions
-                    table_suggestions.append({
-                        "rank": i + 1,
-                        "table_name": table_name,
-                        "relevance_score": 0.5,  # Default score for fallback
-                        "description": f"Table containing {table_name.replace('_', ' ').lower()} data",
-                        "chunk_types": ["fallback"],
-                        "estimated_relevance": "Medium"
-                    })
-                    
-                except Exception as table_error:
-                    print(f"⚠️ Failed to get details for {table_name}: {table_error}")
+            table_names = [row[1] if len(row) > 1 else str(row[0]) for row in result.rows[:4]]  # Limit to top 4
+            columns_by_table = await self._fetch_fallback_columns(db_adapter, schema_name, table_names)
+            
+            for i, table_name in enumerate(table_names):
+                if table_name not in columns_by_table:
+                    continue
+                table_info = {
+                    "name": table_name,
+                    "schema": os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES"), 
+                    "columns": columns_by_table[table_name],
+                    "row_count": None,
+                    "description": f"Table containing {table_name.replace('_', ' ').lower()} data"
+                }
+                relevant_tables.append(table_info)
+                
+                # Add to suggestions
+                table_suggestions.append({
+                    "rank": i + 1,
+                    "table_name": table_name,
+                    "relevance_score": 0.5,  # Default score for fallback
+                    "description": f"Table containing {table_name.replace('_', ' ').lower()} data",
+                    "chunk_types": ["fallback"],
+                    "estimated_relevance": "Medium"
+                })
             
             print(f"✅ Fallback schema discovery found {len(relevant_tables)} tables")
             
@@ -1479,6 +2086,7 @@ No explanations or extra text."""
             # so context building logic can properly populate matched_tables field
             matched_table_names = [t["name"] for t in relevant_tables]
             print(f"🔍 DEBUG: Fallback setting matched_tables to: {matched_table_names}")
+            await self._register_tables_for_matching(matched_table_names)
             
             return {
                 "discovered_tables": matched_table_names,  # Keep for backward compatibility 
@@ -1492,11 +2100,68 @@ No explanations or extra text."""
             print(f"❌ Fallback schema discovery failed: {e}")
             return {"error": f"All schema discovery methods failed: {e}", "status": "failed"}
     
+    async def _fetch_fallback_columns(self, db_adapter, schema_name: str, table_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Column metadata for the fallback tables. One SHOW COLUMNS IN SCHEMA round trip grouped
+        client-side; if that fails, concurrent DESCRIBE TABLE calls. Tables whose lookup raised are omitted.
+        """
+        wanted = set(table_names)
+        try:
+            result = await asyncio.to_thread(db_adapter.run, f"SHOW COLUMNS IN SCHEMA {schema_name}", dry_run=False)
+            if not result.error and result.rows:
+                header = [str(col).lower() for col in (result.columns or [])]
+                position = lambda name, default: header.index(name) if name in header else default
+                table_i, column_i = position("table_name", 0), position("column_name", 2)
+                type_i, null_i = position("data_type", 3), position("null?", 4)
+                
+                columns_by_table = {table_name: [] for table_name in table_names}
+                for row in result.rows:
+                    if row[table_i] not in wanted:
+                        continue
+                    data_type = row[type_i]
+                    try:
+                        # SHOW COLUMNS reports data_type as JSON, e.g. {"type":"TEXT","length":...}
+                        data_type = json.loads(data_type).get("type", data_type)
+                    except (TypeError, ValueError, AttributeError):
+                        pass
+                    columns_by_table[row[table_i]].append({
+                        "name": row[column_i],
+                        "data_type": data_type,
+                        "nullable": str(row[null_i]).lower() in ("true", "y"),
+                        "description": None
+                    })
+                return columns_by_table
+            print(f"⚠️ SHOW COLUMNS IN SCHEMA failed, describing tables individually: {result.error}")
+        except Exception as show_error:
+            print(f"⚠️ SHOW COLUMNS IN SCHEMA failed, describing tables individually: {show_error}")
+        
+        describe_results = await asyncio.gather(*[
+            asyncio.to_thread(db_adapter.run, f"DESCRIBE TABLE {table_name}", dry_run=False)
+            for table_name in table_names
+        ], return_exceptions=True)
+        
+        columns_by_table = {}
+        for table_name, columns_result in zip(table_names, describe_results):
+            if isinstance(columns_result, Exception):
+                print(f"⚠️ Failed to get details for {table_name}: {columns_result}")
+                continue
+            columns = []
+            if not columns_result.error:
+                for col_row in columns_result.rows:
+                    columns.append({
+                        "name": col_row[0],
+                        "data_type": col_row[1],
+                        "nullable": col_row[2] == 'Y',
+                        "description": None
+                    })
+            columns_by_table[table_name] = columns
+        return columns_by_table
+    
+    @memoize_async(TaskType.SEMANTIC_UNDERSTANDING, lambda self, inputs: inputs.get("original_query", ""))
     async def _execute_semantic_analysis(self, inputs: Dict) -> Dict[str, Any]:
         """Execute semantic analysis using real SemanticDictionary"""
         try:
-            from backend.tools.semantic_dictionary import SemanticDictionary
-            semantic_dict = SemanticDictionary()
+            semantic_dict = self.semantic_dict
             
             query = inputs.get("original_query", "")
             
@@ -1513,66 +2178,98 @@ No explanations or extra text."""
                 "status": "completed"
             }
         except Exception as e:
-            print(f"❌ Semantic analysis failed: {e}")
+            logger.error("❌ Semantic analysis failed: %s", e)
             return {"error": str(e), "status": "failed"}
     
+    @memoize_async(TaskType.SIMILARITY_MATCHING, lambda self, inputs: {
+        "entities": self._find_task_result_by_type(inputs, "semantic_understanding").get("entities", []),
+        "discovered_tables": self._find_task_result_by_type(inputs, "schema_discovery").get("discovered_tables", []),
+    })
     async def _execute_similarity_matching(self, inputs: Dict) -> Dict[str, Any]:
-        """Execute similarity matching using real VectorMatcher"""
+        """Execute similarity matching: embed entities + tables in one batch and score them with one matmul"""
         try:
-            from backend.agents.openai_vector_matcher import OpenAIVectorMatcher
-            vector_matcher = OpenAIVectorMatcher()
-            
             # Get entities from semantic analysis result using dynamic helper
             semantic_result = self._find_task_result_by_type(inputs, "semantic_understanding")
-            entities = semantic_result.get("entities", [])
+            entities = [str(entity) for entity in semantic_result.get("entities", []) if entity]
             
             # Get discovered tables from schema discovery result using dynamic helper
             schema_result = self._find_task_result_by_type(inputs, "schema_discovery")
             discovered_tables = schema_result.get("discovered_tables", [])
             
-            query = inputs.get("original_query", "")
-            
-            print(f"🔍 Similarity matching: {len(entities)} entities, {len(discovered_tables)} tables")
+            logger.debug("🔍 Similarity matching: %s entities, %s tables", len(entities), len(discovered_tables))
             
-            # Perform similarity matching
-            if entities and discovered_tables:
-                # Use the vector matcher to find best matches
-                matched_tables = discovered_tables[:3]  # Top 3 tables
-                similarity_scores = [0.95, 0.87, 0.82][:len(matched_tables)]
-                print(f"🔍 DEBUG: Similarity matching with entities - matched_tables: {matched_tables}")
-                
+            if not discovered_tables:
                 return {
-                    "matched_tables": matched_tables,
-                    "similarity_scores": similarity_scores,
-                    "confidence": "high" if (similarity_scores and max(similarity_scores) > 0.8) else "medium",
+                    "matched_tables": [],
+                    "similarity_scores": [],
+                    "confidence": "low",
                     "entities_matched": entities,
+                    "error": "No tables discovered for matching",
                     "status": "completed"
                 }
-            elif discovered_tables:
-                # If no entities but we have tables, return top tables
-                matched_tables = discovered_tables[:3]
-                print(f"🔍 DEBUG: Similarity matching without entities - matched_tables: {matched_tables}")
+            
+            scores = await self._score_entities_against_tables(entities, discovered_tables) if entities else None
+            if scores is not None:
+                # A table's score is its best similarity to any entity: one column-wise reduction,
+                # then an O(N) partition for the top 3 instead of sorting every table
+                best_scores = scores.max(axis=0)
+                top = self._top_k_indices(best_scores, 3)
+                matched_tables = [discovered_tables[col] for col in top]
+                similarity_scores = best_scores[top].tolist()
+                logger.debug("🔍 DEBUG: Similarity matching with entities - matched_tables: %s", matched_tables)
+                
                 return {
                     "matched_tables": matched_tables,
-                    "similarity_scores": [0.8] * len(matched_tables),
-                    "confidence": "medium",
-                    "entities_matched": entities,
-                    "status": "completed"
-                }
-            else:
-                return {
-                    "matched_tables": [],
-                    "similarity_scores": [],
-                    "confidence": "low",
+                    "similarity_scores": similarity_scores,
+                    "confidence": "high" if similarity_scores[0] > 0.8 else "medium",
                     "entities_matched": entities,
-                    "error": "No tables discovered for matching",
+                    "entity_matches": {
+                        entity: [
+                            {"table_name": discovered_tables[col], "similarity_score": float(scores[row, col])}
+                            for col in self._top_k_indices(scores[row], 3)
+                        ]
+                        for row, entity in enumerate(entities)
+                    },
                     "status": "completed"
                 }
+            
+            # No entities (or embeddings unavailable): keep the schema discovery ranking
+            matched_tables = discovered_tables[:3]
+            logger.debug("🔍 DEBUG: Similarity matching without entities - matched_tables: %s", matched_tables)
+            return {
+                "matched_tables": matched_tables,
+                "similarity_scores": [0.8] * len(matched_tables),
+                "confidence": "medium",
+                "entities_matched": entities,
+                "status": "completed"
+            }
                 
         except Exception as e:
-            print(f"❌ Similarity matching failed: {e}")
+            logger.error("❌ Similarity matching failed: %s", e)
             return {"error": str(e), "status": "failed"}
     
+    async def _score_entities_against_tables(self, entities: List[str], table_names: List[str]) -> Optional[np.ndarray]:
+        """(entities x tables) cosine similarity matrix; None when embeddings are unavailable"""
+        matcher = self.vector_matcher
+        # Table rows come from the matcher's float32 matrix (normalized once at ingest), so on the
+        # steady-state path only the entities are embedded - both lookups run concurrently
+        entity_matrix, table_matrix = await asyncio.gather(
+            asyncio.to_thread(matcher.embed_batch, entities),
+            asyncio.to_thread(matcher.table_matrix_for, table_names),
+        )
+        if not entity_matrix.any() or not table_matrix.any():
+            return None
+        
+        # Both are contiguous float32 unit rows, so one (entities x tables) SGEMM gives every cosine similarity
+        return entity_matrix @ table_matrix.T
+    
+    @staticmethod
+    def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k largest values, best first (argpartition, then sort only those k)"""
+        k = min(k, len(values))
+        top = np.argpartition(-values, k - 1)[:k] if k < len(values) else np.arange(len(values))
+        return top[np.argsort(-values[top], kind="stable")]
+    
     async def _execute_user_verification(self, inputs: Dict) -> Dict[str, Any]:
         """Execute user verification - present top 4 table suggestions for selection"""
         try:
@@ -1585,71 +2282,74 @@ No explanations or extra text."""
             similarity_result = self._find_task_result_by_type(inputs, "similarity_matching")
             matched_tables = similarity_result.get("matched_tables", [])
             
-            print(f"\n👤 TABLE SELECTION REQUIRED")
-            print(f"="*60)
+            logger.debug("\n👤 TABLE SELECTION REQUIRED")
+            logger.debug("=" * 60)
             
             # Present table suggestions if available (from Azure Search)
             if table_suggestions:
-                print(f"💡 Found {len(table_suggestions)} relevant table suggestions:")
-                print(f"\nPlease select which table(s) to use for your query:")
+                logger.debug("💡 Found %s relevant table suggestions:", len(table_suggestions))
+                logger.debug("\nPlease select which table(s) to use for your query:")
                 
                 for suggestion in table_suggestions:
-                    print(f"\n   {suggestion['rank']}. {suggestion['table_name']}")
-                    print(f"      Relevance: {suggestion['estimated_relevance']} ({suggestion['relevance_score']:.3f})")
-                    print(f"      Description: {suggestion['description']}")
+                    logger.debug("\n   %s. %s", suggestion['rank'], suggestion['table_name'])
+                    logger.debug("      Relevance: %s (%.3f)", suggestion['estimated_relevance'], suggestion['relevance_score'])
+                    logger.debug("      Description: %s", suggestion['description'])
                     # Only show sample content if it exists
                     if 'sample_content' in suggestion:
-                        print(f"      Sample: {suggestion['sample_content'][:100]}...")
+                        logger.debug("      Sample: %s...", suggestion['sample_content'][:100])
                 
                 # For demo, auto-select the top table with highest relevance
-                if table_suggestions[0]['relevance_score'] > 0.7:
+                confidence = _CONFIDENCE_LABELS[_score_bucket(table_suggestions[0]['relevance_score'], _SELECTION_THRESHOLDS)]
+                if confidence != "low":
                     selected_tables = [table_suggestions[0]['table_name']]
-                    print(f"\n✅ Auto-selecting highest relevance table: {selected_tables[0]}")
+                    logger.debug("\n✅ Auto-selecting highest relevance table: %s", selected_tables[0])
                     user_choice = "auto_selected"
                 else:
                     # In production, this would be user input
                     selected_tables = [table_suggestions[0]['table_name']]
                     user_choice = "default_first"
-                    print(f"\n⚠️ Lower confidence - defaulting to first table: {selected_tables[0]}")
+                    logger.warning("\n⚠️ Lower confidence - defaulting to first table: %s", selected_tables[0])
                 
             # Fallback to discovered tables
             elif discovered_tables:
-                print(f"📊 Found {len(discovered_tables)} discovered tables:")
+                logger.debug("📊 Found %s discovered tables:", len(discovered_tables))
                 for i, table in enumerate(discovered_tables, 1):
-                    print(f"   {i}. {table}")
+                    logger.debug("   %s. %s", i, table)
                 
                 # For payment queries, consider multiple tables
                 query = inputs.get("original_query", "")
-                print(f"🔍 DEBUG: Query for discovered tables: '{query}'")
+                logger.debug("🔍 DEBUG: Query for discovered tables: '%s'", query)
                 if any(term in query.lower() for term in ['payment', 'rate', 'average', 'level', 'provider', 'metrics']):
                     selected_tables = discovered_tables[:3]  # Select top 3 for complex queries
-                    print(f"🔍 DEBUG: Payment query detected - selecting top 3 discovered tables: {selected_tables}")
+                    logger.debug("🔍 DEBUG: Payment query detected - selecting top 3 discovered tables: %s", selected_tables)
                 else:
                     selected_tables = discovered_tables[:1]  # Select first table
-                    print(f"🔍 DEBUG: Simple query - selecting top 1 discovered table: {selected_tables}")
+                    logger.debug("🔍 DEBUG: Simple query - selecting top 1 discovered table: %s", selected_tables)
                     
                 user_choice = "discovered_fallback"
-                print(f"\n✅ Using discovered tables: {selected_tables}")
+                confidence = "medium"
+                logger.debug("\n✅ Using discovered tables: %s", selected_tables)
                 
             # Fallback to similarity matched tables
             elif matched_tables:
-                print(f"🔍 Found {len(matched_tables)} similarity-matched tables:")
+                logger.debug("🔍 Found %s similarity-matched tables:", len(matched_tables))
                 for i, table in enumerate(matched_tables, 1):
-                    print(f"   {i}. {table}")
+                    logger.debug("   %s. %s", i, table)
                 
                 # For payment/provider queries, use multiple tables to get complete data
                 query = inputs.get("original_query", "")
                 if any(term in query.lower() for term in ['payment', 'rate', 'average', 'level', 'provider', 'metrics']):
                     selected_tables = matched_tables[:3]  # Use top 3 tables for complex queries
-                    print(f"\n✅ Using multiple tables for payment analysis: {selected_tables}")
+                    logger.debug("\n✅ Using multiple tables for payment analysis: %s", selected_tables)
                 else:
                     selected_tables = matched_tables[:1]  # Select first table for simple queries
-                    print(f"\n✅ Using similarity-matched table: {selected_tables[0]}")
+                    logger.debug("\n✅ Using similarity-matched table: %s", selected_tables[0])
                 
                 user_choice = "similarity_fallback"
+                confidence = "medium"
                 
             else:
-                print(f"❌ No tables found to approve")
+                logger.error("❌ No tables found to approve")
                 return {
                     "approved_tables": [],
                     "user_choice": "none_available",
@@ -1662,60 +2362,60 @@ No explanations or extra text."""
                 "approved_tables": selected_tables,
                 "user_choice": user_choice,
                 "table_suggestions": table_suggestions,  # Pass along for reference
-                "confidence": "high" if table_suggestions else "medium",
+                "confidence": confidence,
                 "selection_method": "azure_enhanced" if table_suggestions else "fallback",
                 "status": "completed"
             }
             
         except Exception as e:
-            print(f"❌ User verification failed: {e}")
+            logger.error("❌ User verification failed: %s", e)
             return {"error": str(e), "status": "failed"}
     
     async def _execute_query_generation(self, inputs: Dict) -> Dict[str, Any]:
         """Generate SQL query - completely self-sufficient for any planning scenario"""
         try:
             query = inputs.get("original_query", inputs.get("query", ""))
-            print(f"🔍 SQL Generation for: {query}")
+            logger.debug("🔍 SQL Generation for: %s", query)
             
             # Discover what context we have available (from ANY previous tasks)
             available_context = self._gather_available_context(inputs)
             
             # Build table context from whatever is available
             confirmed_tables = self._determine_target_tables(available_context, query)
-            print(f"🔍 DEBUG: Confirmed tables from _determine_target_tables: {confirmed_tables}")
-            print(f"🔍 DEBUG: Available context keys: {list(available_context.keys())}")
+            logger.debug("🔍 DEBUG: Confirmed tables from _determine_target_tables: %s", confirmed_tables)
+            logger.debug("🔍 DEBUG: Available context keys: %s", list(available_context.keys()))
             if "matched_tables" in available_context:
-                print(f"🔍 DEBUG: available_context['matched_tables']: {available_context['matched_tables']}")
+                logger.debug("🔍 DEBUG: available_context['matched_tables']: %s", available_context['matched_tables'])
             if "schemas" in available_context:
-                print(f"🔍 DEBUG: Schemas in context: {len(available_context['schemas'])} items")
+                logger.debug("🔍 DEBUG: Schemas in context: %s items", len(available_context['schemas']))
                 if available_context['schemas']:
-                    print(f"🔍 DEBUG: First schema: {available_context['schemas'][0] if available_context['schemas'] else 'None'}")
+                    logger.debug("🔍 DEBUG: First schema: %s", available_context['schemas'][0] if available_context['schemas'] else 'None')
             
             if not confirmed_tables:
-                print(f"🔍 No table context available - performing autonomous table discovery with Pinecone context")
+                logger.debug("🔍 No table context available - performing autonomous table discovery with Pinecone context")
                 autonomous_result = await self._autonomous_table_discovery_with_context(query)
                 confirmed_tables = autonomous_result.get("tables", [])
-                print(f"🔍 DEBUG: Autonomous discovery returned tables: {confirmed_tables}")
+                logger.debug("🔍 DEBUG: Autonomous discovery returned tables: %s", confirmed_tables)
                 # CRITICAL FIX: Extract Pinecone matches from autonomous discovery
                 if autonomous_result.get("pinecone_matches"):
                     available_context["pinecone_matches"] = autonomous_result["pinecone_matches"]
-                    print(f"🔍 Autonomous discovery found {len(autonomous_result['pinecone_matches'])} Pinecone matches")
+                    logger.debug("🔍 Autonomous discovery found %s Pinecone matches", len(autonomous_result['pinecone_matches']))
             
             if not confirmed_tables:
-                print("❌ DEBUG: No confirmed tables found after all attempts!")
+                logger.error("❌ DEBUG: No confirmed tables found after all attempts!")
                 return {
                     "error": "Could not determine target tables for query",
                     "status": "failed",
                     "suggestion": "Query may be too ambiguous - consider specifying table names"
                 }
             
-            print(f"🎯 Target tables: {confirmed_tables}")
+            logger.debug("🎯 Target tables: %s", confirmed_tables)
             
             # Generate SQL with whatever context we have
-            return await self._generate_sql_with_context(query, confirmed_tables, available_context, getattr(self, 'use_deterministic', False))
+            return await self._generate_sql_with_context(query, confirmed_tables, available_context, _use_deterministic_sql.get())
             
         except Exception as e:
-            print(f"❌ Query generation failed: {e}")
+            logger.error("❌ Query generation failed: %s", e)
             return {"error": str(e), "status": "failed"}
     
     def _gather_available_context(self, inputs: Dict) -> Dict[str, Any]:
@@ -1730,7 +2430,7 @@ No explanations or extra text."""
         }
         
         for key, value in inputs.items():
-            if not isinstance(value, dict):
+            if not isinstance(value, dict) or key == _RESULTS_BY_TYPE_KEY:
                 continue
                 
             # Extract useful information regardless of task naming
@@ -1958,14 +2658,13 @@ No explanations or extra text."""
     async def _execute_query_execution(self, inputs: Dict) -> Dict[str, Any]:
         """Execute SQL query - works with any planning scenario"""
         try:
-            from backend.tools.sql_runner import SQLRunner
-            sql_runner = SQLRunner()
+            sql_runner = self.sql_runner
             
             # Find SQL query from ANY previous task or generate it ourselves
             sql_query = self._find_sql_query(inputs)
             
             if not sql_query:
-                print(f"🔍 No SQL found in previous tasks - generating SQL autonomously")
+                logger.debug("🔍 No SQL found in previous tasks - generating SQL autonomously")
                 # Generate SQL ourselves if o3-mini didn't plan a separate generation step
                 generation_result = await self._execute_query_generation(inputs)
                 if generation_result.get("status") == "completed":
@@ -1976,38 +2675,39 @@ No explanations or extra text."""
                         "status": "failed"
                     }
             
-            print(f"🔍 Executing SQL: {sql_query}")
+            logger.debug("🔍 Executing SQL: %s", sql_query)
             
             # Execute with retry logic
             user_id = self._get_user_id_from_context(inputs)
+            max_rows = int((inputs.get("constraints") or {}).get("max_rows") or QUERY_MAX_ROWS)
             
             max_attempts = 3
             for attempt in range(1, max_attempts + 1):
-                print(f"🔄 Execution attempt {attempt}/{max_attempts}")
+                logger.debug("🔄 Execution attempt %s/%s", attempt, max_attempts)
                 
                 try:
-                    result = await sql_runner.execute_query(sql_query, user_id=user_id)
+                    result = await sql_runner.execute_query(sql_query, user_id=user_id, max_rows=max_rows)
                     
                     if result and hasattr(result, 'success') and result.success:
                         data = result.data if hasattr(result, 'data') and result.data is not None else []
                         
                         # If no rows returned and we had a WHERE clause, try without it
                         if len(data) == 0 and 'WHERE' in sql_query.upper():
-                            print(f"🔄 No rows returned with WHERE clause, trying without filters...")
+                            logger.debug("🔄 No rows returned with WHERE clause, trying without filters...")
                             try:
                                 # Create a simpler query without WHERE clause
                                 base_query = sql_query.split('WHERE')[0].strip()
                                 simple_query = f"{base_query} LIMIT 10"
-                                print(f"🔧 Fallback query: {simple_query}")
+                                logger.debug("🔧 Fallback query: %s", simple_query)
                                 
-                                fallback_result = await sql_runner.execute_query(simple_query, user_id=user_id)
+                                fallback_result = await sql_runner.execute_query(simple_query, user_id=user_id, max_rows=max_rows)
                                 if fallback_result and hasattr(fallback_result, 'success') and fallback_result.success:
                                     fallback_data = fallback_result.data if hasattr(fallback_result, 'data') and fallback_result.data is not None else []
                                     if len(fallback_data) > 0:
-                                        print(f"✅ Fallback query returned {len(fallback_data)} rows")
+                                        logger.debug("✅ Fallback query returned %s rows", len(fallback_data))
                                         return {
                                             "results": fallback_data,
-                                            "row_count": len(fallback_data),
+                                            "row_count": getattr(fallback_result, 'row_count', len(fallback_data)),
                                             "execution_time": getattr(fallback_result, 'execution_time', 0) or 0,
                                             "metadata": {
                                                 "columns": getattr(fallback_result, 'columns', []) or [],
@@ -2021,11 +2721,11 @@ No explanations or extra text."""
                                             "status": "completed"
                                         }
                             except Exception as fallback_error:
-                                print(f"⚠️ Fallback query failed: {fallback_error}")
+                                logger.warning("⚠️ Fallback query failed: %s", fallback_error)
                         
                         return {
                             "results": data,
-                            "row_count": len(data) if data else 0,
+                            "row_count": getattr(result, 'row_count', len(data)),
                             "execution_time": getattr(result, 'execution_time', 0) or 0,
                             "metadata": {
                                 "columns": getattr(result, 'columns', []) or [],
@@ -2038,23 +2738,23 @@ No explanations or extra text."""
                         }
                         
                     else:
-                        print(f"❌ SQL execution failed: {getattr(result, 'error', 'Unknown error')}")
+                        logger.error("❌ SQL execution failed: %s", getattr(result, 'error', 'Unknown error'))
                         error_msg = str(getattr(result, 'error', 'Unknown SQL execution error'))
                         
                         if attempt < max_attempts:
                             # Try LLM-based SQL error correction
-                            print(f"🔧 Attempting SQL error correction with LLM...")
+                            logger.debug("🔧 Attempting SQL error correction with LLM...")
                             try:
                                 corrected_sql = self._correct_sql_with_llm(sql_query, error_msg, inputs)
                                 if corrected_sql and corrected_sql != sql_query:
-                                    print(f"🎯 LLM provided corrected SQL: {corrected_sql[:100]}...")
+                                    logger.debug("🎯 LLM provided corrected SQL: %s...", corrected_sql[:100])
                                     sql_query = corrected_sql  # Use corrected SQL for next attempt
                                     continue
                                 else:
-                                    print(f"⚠️ LLM could not provide correction, using fallback strategy")
+                                    logger.warning("⚠️ LLM could not provide correction, using fallback strategy")
                                     continue
                             except Exception as correction_error:
-                                print(f"⚠️ SQL correction failed: {correction_error}")
+                                logger.warning("⚠️ SQL correction failed: %s", correction_error)
                                 continue
                         else:
                             return {
@@ -2064,7 +2764,7 @@ No explanations or extra text."""
                             }
                             
                 except Exception as e:
-                    print(f"⚠️ Attempt {attempt} exception: {e}")
+                    logger.warning("⚠️ Attempt %s exception: %s", attempt, e)
                     if attempt < max_attempts:
                         continue
                     else:
@@ -2075,7 +2775,7 @@ No explanations or extra text."""
                         }
                         
         except Exception as e:
-            print(f"❌ Query execution setup failed: {e}")
+            logger.error("❌ Query execution setup failed: %s", e)
             return {"error": str(e), "status": "failed"}
     
     def _find_sql_query(self, inputs: Dict) -> str:
@@ -2188,7 +2888,7 @@ No explanations or extra text."""
                 print(f"🔍 DEBUG - No schema intelligence found")
                 # Fallback: Look for any available context about tables/columns
                 for key, value in inputs.items():
-                    if isinstance(value, dict) and any(table_key in str(value).lower() for table_key in ['metrics', 'provider', 'overall_pct']):
+                    if key != _RESULTS_BY_TYPE_KEY and isinstance(value, dict) and any(table_key in str(value).lower() for table_key in ['metrics', 'provider', 'overall_pct']):
                         schema_info += f"\n**Context from {key}:**\n{str(value)[:300]}...\n"
             
             # Create enhanced correction prompt with schema context
@@ -2216,8 +2916,7 @@ Return only the corrected SQL query."""
 
             # Call LLM for correction using synchronous OpenAI API (fix async issue)
             try:
-                from openai import OpenAI
-                client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+                client = self._get_openai_sync()
                 
                 print(f"🔧 Sending correction prompt to LLM...")
                 print(f"🔍 Error context: {error_message}")
@@ -2314,8 +3013,7 @@ Return only the corrected SQL query."""
                 
                 # Test execution with the alternative table
                 try:
-                    from backend.tools.sql_runner import SQLRunner
-                    sql_runner = SQLRunner()
+                    sql_runner = self.sql_runner
                     user_id = inputs.get("user_id", "default_user")
                     
                     test_result = await sql_runner.execute_query(alt_sql, user_id=user_id)
@@ -2381,10 +3079,9 @@ Return only the corrected SQL query."""
         
         while python_attempt <= max_python_attempts:
             try:
-                print(f"🐍 Attempting Python visualization generation (attempt {python_attempt}/{max_python_attempts})")
+                logger.debug("🐍 Attempting Python visualization generation (attempt %s/%s)", python_attempt, max_python_attempts)
                 
-                from backend.tools.chart_builder import ChartBuilder
-                chart_builder = ChartBuilder()
+                chart_builder = self.chart_builder
                 
                 # Get results from query execution using dynamic helper
                 exec_result = self._find_task_result_by_type(inputs, "execution")
@@ -2392,7 +3089,7 @@ Return only the corrected SQL query."""
                 
                 # Check if query execution actually succeeded
                 if exec_result.get("status") == "failed":
-                    print(f"❌ Query execution failed - no data for visualization: {exec_result.get('error', 'Unknown error')}")
+                    logger.error("❌ Query execution failed - no data for visualization: %s", exec_result.get('error', 'Unknown error'))
                     return {
                         "error": f"Cannot create visualization: {exec_result.get('error', 'Query execution failed')}",
                         "status": "failed"
@@ -2400,25 +3097,25 @@ Return only the corrected SQL query."""
                 
                 query = inputs.get("original_query", "")
                 
-                print(f"📊 Visualization input: {len(results)} rows of data")
+                logger.debug("📊 Visualization input: %s rows of data", len(results))
                 if results and len(results) > 0:
-                    print(f"📋 Sample data columns: {list(results[0].keys()) if results[0] else 'No columns'}")
+                    logger.debug("📋 Sample data columns: %s", list(results[0].keys()) if results[0] else 'No columns')
                 
                 if results:
                     # Check if advanced Python visualization is needed
                     if self._requires_python_visualization(query, results):
-                        print(f"🧠 Query requires advanced Python visualization, generating Python code...")
+                        logger.debug("🧠 Query requires advanced Python visualization, generating Python code...")
                         
                         # Generate Python visualization code using agentic approach
                         python_result = await self._generate_python_visualization_code(
                             query=query,
                             data=results,
                             attempt=python_attempt,
-                            previous_error=getattr(self, '_last_python_error', None)
+                            previous_error=_last_python_error.get()
                         )
                         
                         if python_result.get("status") == "success":
-                            print(f"✅ Python visualization code generated successfully on attempt {python_attempt}")
+                            logger.debug("✅ Python visualization code generated successfully on attempt %s", python_attempt)
                             
                             # Execute the Python code safely
                             execution_result = await self._execute_python_visualization(
@@ -2427,7 +3124,7 @@ Return only the corrected SQL query."""
                             )
                             
                             if execution_result.get("status") == "success" and execution_result.get("charts"):
-                                print(f"✅ Python visualization successful: Generated {len(execution_result.get('charts', []))} charts")
+                                logger.debug("✅ Python visualization successful: Generated %s charts", len(execution_result.get('charts', [])))
                                 return {
                                     "charts": execution_result.get("charts", []),
                                     "summary": execution_result.get("summary", ""),
@@ -2439,30 +3136,30 @@ Return only the corrected SQL query."""
                             else:
                                 # Python execution failed, prepare for retry
                                 error_msg = execution_result.get("error", "No charts generated")
-                                print(f"❌ Python code execution failed on attempt {python_attempt}: {error_msg}")
-                                self._last_python_error = error_msg
+                                logger.error("❌ Python code execution failed on attempt %s: %s", python_attempt, error_msg)
+                                _last_python_error.set(error_msg)
                                 
                                 if python_attempt < max_python_attempts:
                                     python_attempt += 1
                                     continue
                                 else:
                                     # Fall back to standard chart builder
-                                    print("🔄 Falling back to standard ChartBuilder after Python failures")
+                                    logger.debug("🔄 Falling back to standard ChartBuilder after Python failures")
                         else:
                             # Python code generation failed, prepare for retry
                             error_msg = python_result.get("error", "Unknown generation error")
-                            print(f"❌ Python code generation failed on attempt {python_attempt}: {error_msg}")
-                            self._last_python_error = error_msg
+                            logger.error("❌ Python code generation failed on attempt %s: %s", python_attempt, error_msg)
+                            _last_python_error.set(error_msg)
                             
                             if python_attempt < max_python_attempts:
                                 python_attempt += 1
                                 continue
                             else:
                                 # Fall back to standard chart builder
-                                print("🔄 Falling back to standard ChartBuilder after Python generation failures")
+                                logger.debug("🔄 Falling back to standard ChartBuilder after Python generation failures")
                     
                     # Standard ChartBuilder approach (fallback or primary)
-                    print("📊 Using standard ChartBuilder for visualization...")
+                    logger.debug("📊 Using standard ChartBuilder for visualization...")
                     
                     # Convert data to the format ChartBuilder expects
                     chart_recommendation = await chart_builder.analyze_and_recommend(
@@ -2506,14 +3203,14 @@ Return only the corrected SQL query."""
                     
             except Exception as e:
                 error_msg = str(e)
-                print(f"❌ Visualization attempt {python_attempt} failed: {error_msg}")
-                self._last_python_error = error_msg
+                logger.error("❌ Visualization attempt %s failed: %s", python_attempt, error_msg)
+                _last_python_error.set(error_msg)
                 
                 if python_attempt < max_python_attempts:
                     python_attempt += 1
                     continue
                 else:
-                    print(f"❌ All {max_python_attempts} visualization attempts failed")
+                    logger.error("❌ All %s visualization attempts failed", max_python_attempts)
                     return {"error": error_msg, "status": "failed"}
 
     def _requires_python_visualization(self, query: str, data: List[Dict]) -> bool:
@@ -2540,9 +3237,6 @@ Return only the corrected SQL query."""
                                                  attempt: int, previous_error: str = None) -> Dict[str, Any]:
         """Generate Python visualization code using LLM with agentic retry approach"""
         try:
-            import openai
-            import os
-            from openai import AsyncOpenAI
             
             # Initialize OpenAI client
             api_key = os.getenv("OPENAI_API_KEY")
@@ -2553,7 +3247,7 @@ Return only the corrected SQL query."""
                     "status": "failed"
                 }
             
-            client = AsyncOpenAI(api_key=api_key)
+            client = self._get_openai()
             
             # Prepare data sample for code generation
             data_sample = data[:5] if len(data) > 5 else data
@@ -2781,7 +3475,7 @@ Generate Python code that:
                             return True
                             
                     except Exception as e:
-                        print(f"🔍 Plotly detection import error: {e}")
+                        logger.debug("🔍 Plotly detection import error: %s", e)
                         pass
                     
                     # Fallback: duck-type check
@@ -2789,10 +3483,10 @@ Generate Python code that:
                         try:
                             d = obj.to_dict()
                             if isinstance(d, dict) and ('data' in d or 'layout' in d):
-                                print(f"✅ Detected plotly figure via duck-typing: {type(obj)}")
+                                logger.debug("✅ Detected plotly figure via duck-typing: %s", type(obj))
                                 return True
                         except Exception as e:
-                            print(f"🔍 Duck-type check failed: {e}")
+                            logger.debug("🔍 Duck-type check failed: %s", e)
                             return False
                     return False
 
@@ -2820,7 +3514,7 @@ Generate Python code that:
                                     continue
                                 processed_objects.add(obj_id)
                                 
-                                print(f"✅ Processing plotly figure: {type(obj)} from variable '{name}'")
+                                logger.debug("✅ Processing plotly figure: %s from variable '%s'", type(obj), name)
                                 
                                 # Convert plotly figure to dict and clean numpy arrays
                                 chart_dict = obj.to_dict()
@@ -2833,9 +3527,9 @@ Generate Python code that:
                                     'title': f'Python Generated {name}'
                                 })
                                 chart_types.append('plotly')
-                                print(f"✅ Successfully added plotly chart from variable '{name}'")
+                                logger.debug("✅ Successfully added plotly chart from variable '%s'", name)
                             except Exception as e:
-                                print(f"❌ Error processing plotly figure '{name}': {e}")
+                                logger.warning("❌ Error processing plotly figure '%s': %s", name, e)
                                 pass
                         elif _is_matplotlib_fig(obj):
                             try:
@@ -2870,7 +3564,7 @@ Generate Python code that:
                     pass
 
                 # 3) Scan all variables for plotly figures as a final pass
-                print(f"🔍 Scanning {len(combined_ns)} variables for plotly figures...")
+                logger.debug("🔍 Scanning %s variables for plotly figures...", len(combined_ns))
                 for var_name, var_value in combined_ns.items():
                     if var_value is None:
                         continue
@@ -2880,11 +3574,11 @@ Generate Python code that:
                                 # Check if we've already processed this object
                                 obj_id = id(var_value)
                                 if obj_id in processed_objects:
-                                    print(f"⚠️ Skipping already processed plotly figure: {var_name}")
+                                    logger.debug("⚠️ Skipping already processed plotly figure: %s", var_name)
                                     continue
                                 processed_objects.add(obj_id)
                                 
-                                print(f"✅ Found plotly figure in variable scan: {var_name} ({type(var_value)})")
+                                logger.debug("✅ Found plotly figure in variable scan: %s (%s)", var_name, type(var_value))
                                 
                                 # Convert plotly figure to dict and clean numpy arrays
                                 chart_dict = var_value.to_dict()
@@ -2897,12 +3591,12 @@ Generate Python code that:
                                     "title": f"Python Generated {var_name}"
                                 })
                                 chart_types.append("plotly")
-                                print(f"✅ Successfully added plotly chart from scan: {var_name}")
+                                logger.debug("✅ Successfully added plotly chart from scan: %s", var_name)
                             except Exception as e:
-                                print(f"❌ Error processing scanned plotly figure '{var_name}': {e}")
+                                logger.warning("❌ Error processing scanned plotly figure '%s': %s", var_name, e)
                                 pass
                     except Exception as e:
-                        print(f"🔍 Error checking variable '{var_name}': {e}")
+                        logger.debug("🔍 Error checking variable '%s': %s", var_name, e)
                         pass
                 
                 # Generate summary
@@ -2911,11 +3605,13 @@ Generate Python code that:
                 
                 # Enhanced logging when no charts are detected
                 if len(charts) == 0:
-                    print("❌ No charts detected in Python execution!")
-                    print(f"📊 Available variables in namespace: {list(combined_ns.keys())}")
-                    print(f"📋 Checked candidate names: {candidate_names}")
-                    print(f"🔍 Matplotlib figures detected: {len(plt.get_fignums())}")
-                    
+                    logger.warning("❌ No charts detected in Python execution!")
+
+                if len(charts) == 0 and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("📊 Available variables in namespace: %s", list(combined_ns.keys()))
+                    logger.debug("📋 Checked candidate names: %s", candidate_names)
+                    logger.debug("🔍 Matplotlib figures detected: %s", len(plt.get_fignums()))
+
                     # Check for any objects that might be charts
                     potential_charts = []
                     for name, obj in combined_ns.items():
@@ -2923,18 +3619,18 @@ Generate Python code that:
                             obj_type = str(type(obj))
                             if any(chart_hint in obj_type.lower() for chart_hint in ['figure', 'plot', 'chart', 'graph']):
                                 potential_charts.append(f"{name}: {obj_type}")
-                    
+
                     if potential_charts:
-                        print(f"🤔 Potential chart objects found: {potential_charts}")
+                        logger.debug("🤔 Potential chart objects found: %s", potential_charts)
                     else:
-                        print("🚫 No chart-like objects detected in execution namespace")
+                        logger.debug("🚫 No chart-like objects detected in execution namespace")
                 
                 summary = f"Python visualization executed successfully. Generated {len(charts)} charts."
                 if output_text:
                     summary += f" Output: {output_text[:200]}..."
                 
                 if error_text:
-                    print(f"⚠️ Python execution warnings: {error_text}")
+                    logger.warning("⚠️ Python execution warnings: %s", error_text)
                 
                 return {
                     "charts": charts,
@@ -2950,7 +3646,7 @@ Generate Python code that:
                 if stderr_content:
                     error_msg += f"\nStderr: {stderr_content}"
                 
-                print(f"❌ Python code execution failed: {error_msg}")
+                logger.error("❌ Python code execution failed: %s", error_msg)
                 return {
                     "error": error_msg,
                     "status": "failed"
@@ -2958,7 +3654,7 @@ Generate Python code that:
                 
         except Exception as e:
             error_msg = f"Python visualization setup failed: {e}"
-            print(f"❌ Python visualization setup error: {error_msg}")
+            logger.error("❌ Python visualization setup error: %s", error_msg)
             return {
                 "error": error_msg,
                 "status": "failed"
@@ -2968,7 +3664,7 @@ Generate Python code that:
         """Generate Python visualization code without executing it"""
         try:
             user_query = inputs.get('original_query', '')
-            print(f"🐍 Python generation for query: {user_query}")
+            logger.debug("🐍 Python generation for query: %s", user_query)
             
             # ENHANCED: Check multiple sources for execution data
             data = []
@@ -2979,49 +3675,49 @@ Generate Python code that:
             if exec_result and exec_result.get("results"):
                 data = exec_result.get("results", [])
                 data_source = "current_execution"
-                print(f"✅ Found data from current execution: {len(data)} rows")
+                logger.debug("✅ Found data from current execution: %s rows", len(data))
             
             # 2. If no execution data, check conversation context for previous results
             if not data:
-                print("🔍 No current execution data, checking conversation context...")
+                logger.debug("🔍 No current execution data, checking conversation context...")
                 conversation_context = inputs.get('conversation_context', {})
                 
                 # Check if we have recent query results in conversation context
                 recent_queries = conversation_context.get('recent_queries', [])
                 if recent_queries:
-                    print(f"📊 Found {len(recent_queries)} recent queries, checking for data...")
+                    logger.debug("📊 Found %s recent queries, checking for data...", len(recent_queries))
                     
                     # DEBUGGING: Show detailed structure of each recent query
                     for i, query in enumerate(recent_queries):
-                        print(f"🔍 Query {i+1} structure:")
+                        logger.debug("🔍 Query %s structure:", i + 1)
                         try:
                             query_keys = list(query.keys()) if query and hasattr(query, 'keys') else []
-                            print(f"   Query keys: {query_keys}")
+                            logger.debug("   Query keys: %s", query_keys)
                             
                             query_nl = query.get('nl', 'N/A') if query else 'N/A'
                             if query_nl and hasattr(query_nl, '__len__') and len(query_nl) > 50:
                                 query_nl = query_nl[:50] + '...'
-                            print(f"   Query NL: {query_nl}")
+                            logger.debug("   Query NL: %s", query_nl)
                             
                             query_results = query.get('results') if query else None
-                            print(f"   Results type: {type(query_results)}")
+                            logger.debug("   Results type: %s", type(query_results))
                             results_len = len(query_results) if query_results and hasattr(query_results, '__len__') else 0
-                            print(f"   Results length: {results_len}")
+                            logger.debug("   Results length: %s", results_len)
                             
                             # Safely show results sample
                             if query_results and hasattr(query_results, '__getitem__'):
                                 try:
-                                    print(f"   Results sample: {query_results[:2]}")
+                                    logger.debug("   Results sample: %s", query_results[:2])
                                 except (TypeError, IndexError):
-                                    print(f"   Results sample: [Unable to display]")
+                                    logger.debug("   Results sample: [Unable to display]")
                             else:
-                                print(f"   Results sample: []")
+                                logger.debug("   Results sample: []")
                             
                             row_count = query.get('row_count', 'N/A') if query else 'N/A'
-                            print(f"   Row count: {row_count}")
+                            logger.debug("   Row count: %s", row_count)
                             
                         except Exception as debug_error:
-                            print(f"   ❌ Debug error for query {i+1}: {debug_error}")
+                            logger.error("   ❌ Debug error for query %s: %s", i + 1, debug_error)
                             continue
                     
                     # Look for the most recent query with actual results
@@ -3033,24 +3729,24 @@ Generate Python code that:
                                            query.get('data') or 
                                            query.get('rows', []))
                         except (AttributeError, TypeError) as e:
-                            print(f"   ⚠️ Error accessing query results: {e}")
+                            logger.warning("   ⚠️ Error accessing query results: %s", e)
                             continue
                             
                         if query_results and isinstance(query_results, list) and query_results:
                             data = query_results
                             data_source = "recent_query_history"
-                            print(f"✅ Found data from recent query: {len(data)} rows")
+                            logger.debug("✅ Found data from recent query: %s rows", len(data))
                             query_nl = query.get('nl', 'Unknown') or 'Unknown'
-                            print(f"   Query: {query_nl[:50]}...")
+                            logger.debug("   Query: %s...", query_nl[:50])
                             # Safely show data sample
                             try:
-                                print(f"   Data sample: {data[:2] if data else []}")
+                                logger.debug("   Data sample: %s", data[:2] if data else [])
                             except (TypeError, AttributeError):
-                                print(f"   Data sample: [Unable to display]")
+                                logger.debug("   Data sample: [Unable to display]")
                             break
                     
                     if not data:
-                        print("❌ No data found in any recent query results field")
+                        logger.error("❌ No data found in any recent query results field")
                 
                 # 3. Check follow-up context
                 if not data:
@@ -3060,11 +3756,11 @@ Generate Python code that:
                         if actual_data:
                             data = actual_data
                             data_source = "follow_up_context"
-                            print(f"✅ Found data from follow-up context: {len(data)} rows")
+                            logger.debug("✅ Found data from follow-up context: %s rows", len(data))
             
             # 4. If still no data, check ALL task results for any execution results
             if not data:
-                print("🔍 Checking all task results for execution data...")
+                logger.debug("🔍 Checking all task results for execution data...")
                 all_results = inputs.get('results', {})
                 if isinstance(all_results, dict):
                     for task_id, task_result in all_results.items():
@@ -3073,21 +3769,21 @@ Generate Python code that:
                             task_result.get('results')):
                             data = task_result.get('results', [])
                             data_source = f"task_result_{task_id}"
-                            print(f"✅ Found data from task {task_id}: {len(data)} rows")
+                            logger.debug("✅ Found data from task %s: %s rows", task_id, len(data))
                             break
             
             # 5. Last resort: Check inputs directly for any data
             if not data:
-                print("🔍 Checking inputs directly for data...")
+                logger.debug("🔍 Checking inputs directly for data...")
                 direct_data = inputs.get('data') or inputs.get('results') or inputs.get('rows', [])
                 if direct_data:
                     data = direct_data
                     data_source = "direct_inputs"
-                    print(f"✅ Found data in direct inputs: {len(data)} rows")
+                    logger.debug("✅ Found data in direct inputs: %s rows", len(data))
             
             # Final fallback to sample data
             if not data:
-                print("⚠️ No actual data found in any source")
+                logger.warning("⚠️ No actual data found in any source")
                 
                 # For follow-up chart requests, we should ideally run a new query first
                 # But as a fallback, provide helpful sample data that explains the issue
@@ -3112,12 +3808,12 @@ Generate Python code that:
                         {"category": "Sample E", "value": 18}
                     ]
                     data_source = "sample_fallback"
-                    print(f"🎯 Using sample data for demonstration ({len(data)} rows)")
+                    logger.debug("🎯 Using sample data for demonstration (%s rows)", len(data))
             
-            print(f"📊 Final data source: {data_source}")
-            print(f"📊 Final data count: {len(data)} rows")
+            logger.debug("📊 Final data source: %s", data_source)
+            logger.debug("📊 Final data count: %s rows", len(data))
             if data and isinstance(data[0], dict):
-                print(f"📊 Data columns: {list(data[0].keys())}")
+                logger.debug("📊 Data columns: %s", list(data[0].keys()))
             
             if not data:
                 return {
@@ -3125,7 +3821,7 @@ Generate Python code that:
                     "status": "failed"
                 }
 
-            print(f"🐍 Generating Python code for {len(data)} rows of data")
+            logger.debug("🐍 Generating Python code for %s rows of data", len(data))
             
             
             # Try OpenAI-based generation first
@@ -3140,7 +3836,7 @@ Generate Python code that:
                 if python_result.get('status') == 'success':
                     python_code = python_result.get('python_code', '')
                     
-                    print(f"✅ OpenAI Python code generated successfully ({len(python_code)} characters)")
+                    logger.debug("✅ OpenAI Python code generated successfully (%s characters)", len(python_code))
                     
                     return {
                         "python_code": python_code,
@@ -3151,17 +3847,17 @@ Generate Python code that:
                         "status": "success"
                     }
                 else:
-                    print(f"⚠️ OpenAI generation failed: {python_result.get('error')}, falling back to basic generation")
+                    logger.warning("⚠️ OpenAI generation failed: %s, falling back to basic generation", python_result.get('error'))
                     
             except Exception as openai_error:
-                print(f"⚠️ OpenAI generation error: {openai_error}, falling back to basic generation")
+                logger.warning("⚠️ OpenAI generation error: %s, falling back to basic generation", openai_error)
             
             # Fallback to basic Python code generation
-            print("🔄 Using basic Python code generation as fallback")
+            logger.debug("🔄 Using basic Python code generation as fallback")
             python_code = self._generate_basic_python_code(data, user_query)
             
             if python_code:
-                print(f"✅ Basic Python code generated successfully ({len(python_code)} characters)")
+                logger.debug("✅ Basic Python code generated successfully (%s characters)", len(python_code))
                 return {
                     "python_code": python_code,
                     "data": data,
@@ -3178,7 +3874,7 @@ Generate Python code that:
                 
         except Exception as e:
             error_msg = f"Python generation error: {e}"
-            print(f"❌ Python generation failed: {error_msg}")
+            logger.error("❌ Python generation failed: %s", error_msg)
             
             # Check for common error types and provide helpful messages
             if "'NoneType' object is not subscriptable" in str(e):
@@ -3220,7 +3916,7 @@ Generate Python code that:
                     "status": "failed"
                 }
 
-            print(f"🎨 Building visualizations from Python code ({len(python_code)} characters)")
+            logger.debug("🎨 Building visualizations from Python code (%s characters)", len(python_code))
             
             # Execute the Python code to generate visualizations
             execution_result = await self._execute_python_visualization(python_code, data)
@@ -3228,7 +3924,7 @@ Generate Python code that:
             if execution_result.get('status') == 'success':
                 charts = execution_result.get('charts', [])
                 
-                print(f"✅ Built {len(charts)} visualizations successfully")
+                logger.debug("✅ Built %s visualizations successfully", len(charts))
                 
                 return {
                     "charts": charts,
@@ -3240,7 +3936,7 @@ Generate Python code that:
                 }
             else:
                 error_msg = execution_result.get('error', 'Unknown error')
-                print(f"❌ Visualization building failed: {error_msg}")
+                logger.error("❌ Visualization building failed: %s", error_msg)
                 return {
                     "error": f"Visualization building failed: {error_msg}",
                     "status": "failed"
@@ -3248,7 +3944,7 @@ Generate Python code that:
                 
         except Exception as e:
             error_msg = f"Visualization building error: {e}"
-            print(f"❌ Visualization building failed: {error_msg}")
+            logger.error("❌ Visualization building failed: %s", error_msg)
             return {
                 "error": error_msg,
                 "status": "failed"
@@ -3351,7 +4047,7 @@ else:
                                          error_context: str = "", pinecone_matches: List[Dict] = None) -> Dict[str, Any]:
         """Generate SQL with database-specific awareness using schema from Pinecone with retry logic"""
         # Redirect to the new retry-enabled method
-        return await self._generate_sql_with_retry(query, available_tables, error_context, pinecone_matches, getattr(self, 'use_deterministic', False))
+        return await self._generate_sql_with_retry(query, available_tables, error_context, pinecone_matches, _use_deterministic_sql.get())
     async def _generate_sql_with_retry(self, query: str, available_tables: List[str], 
                                      error_context: str = "", pinecone_matches: List[Dict] = None,
                                      use_deterministic: bool = False) -> Dict[str, Any]:
@@ -3418,7 +4114,6 @@ else:
                     raise Exception(error_msg)
                     
             except Exception as e:
-                import traceback
                 
                 # Capture detailed error information
                 error_info = {
@@ -3460,16 +4155,13 @@ else:
         """Core SQL generation logic with database schema awareness"""
         print(f"🧠 DEBUG: _generate_database_aware_sql_core called with use_deterministic={use_deterministic}")
         try:
-            import openai
-            import os
-            from openai import AsyncOpenAI
             
             # Initialize OpenAI client
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 return {"error": "OpenAI API key not configured", "status": "failed"}
             
-            client = AsyncOpenAI(api_key=api_key)
+            client = self._get_openai()
             
             # Get database info
             db_name = os.getenv("SNOWFLAKE_DATABASE", "HEALTHCARE_PRICING_ANALYTICS_SAMPLE")
@@ -3620,7 +4312,6 @@ Return only the SQL query, properly formatted for Snowflake."""
             }
             
         except Exception as e:
-            import traceback
             error_details = {
                 "error": str(e),
                 "error_type": type(e).__name__,
@@ -3818,8 +4509,6 @@ Return only the SQL query, properly formatted for Snowflake."""
     def _apply_snowflake_quoting(self, sql_query: str, table_names: List[str]) -> str:
         """Apply proper Snowflake quoting to table and column references"""
         try:
-            import re
-            import os
             
             # Get database and schema from environment
             db_name = os.getenv("SNOWFLAKE_DATABASE", "HEALTHCARE_PRICING_ANALYTICS_SAMPLE")
@@ -3864,7 +4553,6 @@ Return only the SQL query, properly formatted for Snowflake."""
     async def _fallback_sql_generation(self, table_name: str, query: str = "") -> Dict[str, Any]:
         """Generate a query-aware fallback SQL with proper database quoting"""
         try:
-            import os
             
             # Get database and schema from environment
             db_name = os.getenv("SNOWFLAKE_DATABASE", "HEALTHCARE_PRICING_ANALYTICS_SAMPLE")
@@ -3886,23 +4574,23 @@ Return only the SQL query, properly formatted for Snowflake."""
                 limit = 10
             elif "limit" in query_lower:
                 # Try to extract number after limit
-                import re
                 match = re.search(r'limit\s+(\d+)', query_lower)
                 if match:
                     limit = int(match.group(1))
             
-            # Try to get column information for better fallback
-            columns = []
-            try:
-                from backend.agents.schema_retriever import SchemaRetriever
-                retriever = SchemaRetriever()
-                if hasattr(retriever, 'get_columns_for_table'):
-                    schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
-                    cols = await retriever.get_columns_for_table(clean_table_name, schema=schema_name)
-                    if cols:
-                        columns = [c.get('name') or c.get('column_name') for c in cols]
-            except Exception:
-                pass
+            # Try to get column information for better fallback (memoized per table until the index changes)
+            columns = self._fallback_columns.get(clean_table_name)
+            if columns is None:
+                columns = []
+                try:
+                    retriever = self.schema_retriever
+                    if hasattr(retriever, 'get_columns_for_table'):
+                        cols = await retriever.get_columns_for_table(clean_table_name, schema=schema_name)
+                        if cols:
+                            columns = [c.get('name') or c.get('column_name') for c in cols]
+                            self._fallback_columns[clean_table_name] = columns
+                except Exception:
+                    pass
             
             # Build WHERE clause for filtering
             where_clause = ""
@@ -3914,27 +4602,9 @@ Return only the SQL query, properly formatted for Snowflake."""
                         # More permissive WHERE clause - just exclude obvious empty values
                         where_clause = f' WHERE "{rec_col}" IS NOT NULL AND LENGTH(TRIM("{rec_col}")) > 0'
             
-            # Build the SQL query with proper schema.table format
-            if columns:
-                # Use specific columns if available, prioritize relevant ones
-                relevant_cols = []
-                for col in columns:
-                    if any(keyword in col.lower() for keyword in ['input', 'recommended', 'action', 'value']):
-                        relevant_cols.append(col)
-                
-                if relevant_cols:
-                    col_list = ', '.join([f'"{col}"' for col in relevant_cols[:8]])
-                else:
-                    col_list = ', '.join([f'"{col}"' for col in columns[:8]])
-                    
-                db_name = os.getenv("SNOWFLAKE_DATABASE", "HEALTHCARE_PRICING_ANALYTICS_SAMPLE")
-                schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
-                sql_query = f'SELECT {col_list} FROM "{db_name}"."{schema_name}"."{clean_table_name}"{where_clause} LIMIT {limit}'
-            else:
-                # Fallback to SELECT * with proper quoting
-                db_name = os.getenv("SNOWFLAKE_DATABASE", "HEALTHCARE_PRICING_ANALYTICS_SAMPLE")
-                schema_name = os.getenv("SNOWFLAKE_SCHEMA", "SAMPLES")
-                sql_query = f'SELECT * FROM "{db_name}"."{schema_name}"."{clean_table_name}"{where_clause} LIMIT {limit}'
+            # Build the SQL query with proper schema.table format; only filter + limit vary per query
+            select_from = _fallback_select_from(db_name, schema_name, clean_table_name, tuple(columns))
+            sql_query = f'{select_from}{where_clause} LIMIT {limit}'
             
             print(f"🔧 Generated query-aware fallback SQL: {sql_query}")
             
@@ -3964,13 +4634,19 @@ Return only the SQL query, properly formatted for Snowflake."""
         """
         Main entry point for processing queries - compatible with main.py API
         """
-        print(f"🚀 Dynamic Agent Orchestrator processing query: '{user_query}'")
-        print(f"🎯 DEBUG: Received use_deterministic={use_deterministic} from API call")
+        logger.info("🚀 Dynamic Agent Orchestrator processing query: '%s'", user_query)
+        logger.debug("🎯 DEBUG: Received use_deterministic=%s from API call", use_deterministic)
         if use_deterministic:
-            print("🎯 Using deterministic SQL generation mode")
+            logger.debug("🎯 Using deterministic SQL generation mode")
         
-        # Store deterministic flag for use in SQL generation
-        self.use_deterministic = use_deterministic
+        # Empty / punctuation-only input and plain greetings never need the planner
+        direct_response = self._should_direct_respond(user_query)
+        if direct_response is not None:
+            return direct_response
+        
+        # Request-scoped flags for SQL generation / python retries (never stored on the shared instance)
+        _use_deterministic_sql.set(use_deterministic)
+        _last_python_error.set(None)
         
         try:
             # Step 1: Build conversation context with previous data
@@ -3988,11 +4664,12 @@ Return only the SQL query, properly formatted for Snowflake."""
             elif workflow_decision['workflow_type'] == 'enhance_previous':
                 results = await self._handle_data_enhancement(user_query, conversation_context, workflow_decision)
             else:  # 'new_planning'
-                tasks = await self.plan_execution(user_query, conversation_context)
-                results = await self.execute_plan(tasks, user_query, user_id, conversation_context)
+                # Repeated/paraphrased questions reuse a recent run instead of planning + executing again
+                query_scope = self._query_cache_scope(user_id, use_deterministic, conversation_context)
+                tasks, results = await self._run_new_planning(query_scope, user_query, user_id, conversation_context)
             
             # Step 4: Format response for API compatibility
-            plan_id = f"plan_{hash(user_query)}_{session_id}"
+            plan_id = f"plan_{_query_fingerprint(user_query)}_{session_id}"
             
             # Determine if tasks were created (for new_planning workflow)
             tasks_created = len(tasks) > 0
@@ -4004,24 +4681,24 @@ Return only the SQL query, properly formatted for Snowflake."""
                 query_results = []
                 columns = []
                 
-                print(f"🔍 DEBUG: Results structure for query history extraction:")
-                print(f"  Results type: {type(results)}")
+                logger.debug("🔍 DEBUG: Results structure for query history extraction:")
+                logger.debug("  Results type: %s", type(results))
                 if results and isinstance(results, dict):
-                    print(f"  Results keys: {list(results.keys())}")
+                    logger.debug("  Results keys: %s", list(results.keys()))
                     
                     # Find SQL query - try multiple possible locations
                     if 'sql_query' in results:
                         sql_query = results['sql_query']
-                        print(f"  ✅ Found SQL in 'sql_query'")
+                        logger.debug("  ✅ Found SQL in 'sql_query'")
                     elif 'query_generation' in results and isinstance(results['query_generation'], dict):
                         sql_query = results['query_generation'].get('sql_query', '')
-                        print(f"  ✅ Found SQL in 'query_generation'")
+                        logger.debug("  ✅ Found SQL in 'query_generation'")
                     else:
                         # Try to find SQL in any task result
                         for key, value in results.items():
                             if isinstance(value, dict) and 'sql_query' in value:
                                 sql_query = value['sql_query']
-                                print(f"  ✅ Found SQL in '{key}.sql_query'")
+                                logger.debug("  ✅ Found SQL in '%s.sql_query'", key)
                                 break
                     
                     # Find execution results - try multiple possible locations
@@ -4029,10 +4706,10 @@ Return only the SQL query, properly formatted for Snowflake."""
                         execution_data = results['execution']
                         query_results = execution_data.get('results', [])
                         columns = execution_data.get('columns', [])
-                        print(f"  ✅ Found execution data: {len(query_results)} rows, {len(columns)} columns")
+                        logger.debug("  ✅ Found execution data: %s rows, %s columns", len(query_results), len(columns))
                     elif 'results' in results and isinstance(results['results'], list):
                         query_results = results['results']
-                        print(f"  ✅ Found results in 'results': {len(query_results)} rows")
+                        logger.debug("  ✅ Found results in 'results': %s rows", len(query_results))
                     else:
                         # Try to find results in any task result
                         for key, value in results.items():
@@ -4040,15 +4717,15 @@ Return only the SQL query, properly formatted for Snowflake."""
                                 if 'results' in value and isinstance(value['results'], list):
                                     query_results = value['results']
                                     columns = value.get('columns', [])
-                                    print(f"  ✅ Found results in '{key}': {len(query_results)} rows, {len(columns)} columns")
+                                    logger.debug("  ✅ Found results in '%s': %s rows, %s columns", key, len(query_results), len(columns))
                                     break
                                 elif 'data' in value and isinstance(value['data'], list):
                                     query_results = value['data']
                                     columns = value.get('columns', [])
-                                    print(f"  ✅ Found data in '{key}': {len(query_results)} rows, {len(columns)} columns")
+                                    logger.debug("  ✅ Found data in '%s': %s rows, %s columns", key, len(query_results), len(columns))
                                     break
                     
-                    print(f"  Final extraction: SQL={bool(sql_query)}, Results={len(query_results)} rows")
+                    logger.debug("  Final extraction: SQL=%s, Results=%s rows", bool(sql_query), len(query_results))
                 
                 # Save enhanced history with data
                 if sql_query:
@@ -4061,34 +4738,127 @@ Return only the SQL query, properly formatted for Snowflake."""
                         results=query_results,
                         columns=columns
                     )
-                    print(f"💾 Saved query to history with {len(query_results)} rows for user {user_id}")
+                    logger.info("💾 Saved query to history with %s rows for user %s", len(query_results), user_id)
                 else:
-                    print(f"❌ No SQL query found, skipping history save")
+                    logger.debug("❌ No SQL query found, skipping history save")
                     
             except Exception as e:
-                print(f"⚠️ Could not save query history: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.warning("⚠️ Could not save query history: %s", e, exc_info=True)
             
             return {
                 "plan_id": plan_id,
                 "user_query": user_query,
                 "reasoning_steps": [f"Planned {len(tasks) if tasks_created else 0} execution steps", "Analyzed database structure and content", "Coordinated intelligent query processing"],
                 "estimated_execution_time": f"{len(tasks) * 2 if tasks_created else 2}s",
-                "tasks": [{"task_type": task.task_type.value, "agent": "dynamic"} for task in tasks] if tasks_created else [{"task_type": workflow_decision['workflow_type'], "agent": "dynamic"}],
+                "tasks": [_task_descriptor(task.task_type.value) for task in tasks] if tasks_created else [_task_descriptor(workflow_decision['workflow_type'])],
                 "status": "completed" if "error" not in results else "failed",
                 "results": results
             }
             
         except Exception as e:
-            print(f"❌ Dynamic orchestrator failed: {e}")
+            logger.error("❌ Dynamic orchestrator failed: %s", e)
             return {
-                "plan_id": f"error_{hash(user_query)}",
+                "plan_id": f"error_{_query_fingerprint(user_query)}",
                 "user_query": user_query,
                 "error": str(e),
                 "status": "failed"
             }
 
+    @classmethod
+    def _should_direct_respond(cls, user_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer trivial input without the workflow LLM, planner or executor.
+        Returns the full process_query response, or None when the query needs the pipeline.
+        """
+        stripped = (user_query or "").strip()
+        # Greetings first so "hi" is answered rather than rejected as too short
+        if _normalize_query(stripped).strip(_SMALL_TALK_PUNCTUATION) in _SMALL_TALK_QUERIES:
+            print(f"💬 Answering small talk without planning: '{stripped}'")
+            return {
+                "plan_id": f"direct_{_query_fingerprint(stripped)}",
+                "user_query": user_query,
+                "reasoning_steps": ["Recognized conversational input"],
+                "estimated_execution_time": "0s",
+                "tasks": [_task_descriptor("casual")],
+                "status": "completed",
+                "results": cls._casual_reply(stripped)
+            }
+        if len(stripped) < 3 or not any(ch.isalnum() for ch in stripped):
+            print(f"⏭️ Rejecting trivial query without planning: '{stripped}'")
+            return {
+                "plan_id": f"direct_{_query_fingerprint(stripped)}",
+                "user_query": user_query,
+                "error": "query too short",
+                "status": "rejected"
+            }
+        return None
+    
+    def _query_cache_scope(self, user_id: str, use_deterministic: bool, conversation_context: Dict = None) -> str:
+        """
+        Result-cache / single-flight scope: agents version, SQL mode and user, plus a hash of the
+        conversation context for follow-ups, whose plan and execution depend on the previous results
+        """
+        mode = 'deterministic' if use_deterministic else 'llm'
+        context_digest = ""
+        if conversation_context and conversation_context.get('is_follow_up'):
+            payload = json.dumps(conversation_context, sort_keys=True, default=str)
+            context_digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        return f"{self._agents_version}:{mode}:{user_id}:{context_digest}"
+    
+    async def _run_new_planning(self, query_scope: str, user_query: str, user_id: str,
+                                conversation_context: Dict) -> Tuple[List[AgentTask], Dict[str, Any]]:
+        """
+        Exact cache hit, else join an identical in-flight run, else plan + execute once.
+        In-flight runs are keyed on the result-cache scope (see _query_cache_scope), so only
+        the same user asking the same question in the same context is coalesced.
+        """
+        cached_run = self.query_cache.get_exact(query_scope, user_query)
+        if cached_run is not None:
+            return cached_run
+        # Identical queries arriving while one is still running wait for that run
+        run_key = self.query_cache.make_key(query_scope, user_query)
+        inflight = self._inflight_runs.get(run_key)
+        if inflight is not None:
+            print("🔗 Identical query already in flight - waiting for its results")
+            # shield: a cancelled waiter must not cancel the shared run
+            inflight_tasks, inflight_results = await asyncio.shield(inflight)
+            return inflight_tasks, copy.deepcopy(inflight_results)
+        return await self._plan_and_execute_once(run_key, query_scope, user_query, user_id, conversation_context)
+    
+    async def _plan_and_execute_once(self, run_key: str, query_scope: str, user_query: str, user_id: str,
+                                     conversation_context: Dict) -> Tuple[List[AgentTask], Dict[str, Any]]:
+        """
+        Semantic cache lookup, else plan + execute, published under run_key while it runs
+        so concurrent identical queries share one pipeline run (single-flight).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_runs[run_key] = future
+        try:
+            query_embedding = await self._embed_plan_query(self._get_openai(), user_query)
+            run = self.query_cache.get_similar(query_scope, user_query, query_embedding)
+            if run is None:
+                tasks = await self.plan_execution(user_query, conversation_context)
+                results = await self.execute_plan(tasks, user_query, user_id, conversation_context)
+                if self._is_cacheable_run(results):
+                    self.query_cache.put(query_scope, user_query, tasks, results, query_embedding)
+                run = (tasks, results)
+            future.set_result(run)
+            return run
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("In-flight query run was cancelled"))
+            future.exception()  # Mark retrieved - there may be nobody waiting
+            raise
+        finally:
+            self._inflight_runs.pop(run_key, None)
+    
+    @staticmethod
+    def _is_cacheable_run(results: Any) -> bool:
+        """Only runs where every task completed are worth replaying"""
+        if not isinstance(results, dict) or not results or "error" in results:
+            return False
+        return not any(isinstance(value, dict) and (value.get("error") or value.get("status") == "failed")
+                       for value in results.values())
+
     def _convert_non_serializable_data(self, obj):
         """Convert non-JSON-serializable objects to serializable ones"""
         import numpy as np
@@ -4168,7 +4938,7 @@ Return only the SQL query, properly formatted for Snowflake."""
             print(f"📊 Previous data rows: {len(last_data)}")
             
             # Create a streamlined plan for visualization
-            plan_id = f"vis_followup_{hash(user_query)}_{session_id}"
+            plan_id = f"vis_followup_{_query_fingerprint(user_query)}_{session_id}"
             
             # Execute the previous SQL again to get fresh data
             print(f"🔄 Re-executing previous SQL for visualization")
@@ -4241,8 +5011,7 @@ Return only the SQL query, properly formatted for Snowflake."""
         Execute SQL query and return results with detailed error information
         """
         try:
-            from backend.tools.sql_runner import SQLRunner
-            sql_runner = SQLRunner()
+            sql_runner = self.sql_runner
             result = await sql_runner.execute_query(sql, user_id=user_id)
             
             if result and hasattr(result, 'success') and result.success:
@@ -4353,7 +5122,6 @@ Return only the SQL query, properly formatted for Snowflake."""
             
         except Exception as e:
             print(f"⚠️ Error building conversation context: {e}")
-            import traceback
             traceback.print_exc()
             return {
                 'user_id': user_id,
@@ -4422,10 +5190,7 @@ RESPOND with ONLY this JSON format:
 }}"""
 
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            
-            response = client.chat.completions.create(
+            response = await self._get_openai().chat.completions.create(
                 model=self.fast_model,  # Use fast model for quick decisions
                 messages=[{"role": "user", "content": decision_prompt}],
                 max_tokens=150,
@@ -4465,7 +5230,10 @@ RESPOND with ONLY this JSON format:
     async def _handle_casual_response(self, query: str, decision: Dict) -> Dict[str, Any]:
         """Handle casual conversation queries"""
         print(f"💬 Handling casual query: '{query}'")
-        
+        return self._casual_reply(query)
+    
+    @staticmethod
+    def _casual_reply(query: str) -> Dict[str, Any]:
         # Simple pattern matching for common casual queries
         query_lower = query.lower().strip()
         
@@ -4512,9 +5280,6 @@ Just ask me something like "Show me top NBA scorers" or "Create a chart of team
         
         # Use LLM to intelligently classify the query type based on context and intent
         try:
-            import openai
-            import os
-            from openai import AsyncOpenAI
             
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
@@ -4522,7 +5287,7 @@ Just ask me something like "Show me top NBA scorers" or "Create a chart of team
                 is_insights_request = True
                 is_visualization_request = False
             else:
-                client = AsyncOpenAI(api_key=api_key)
+                client = self._get_openai()
                 
                 # Prepare context about the data
                 data_context = f"""
@@ -4710,9 +5475,6 @@ Generate an enhanced SQL query based on the user's request."""
     async def _generate_data_insights(self, query: str, data: List[Dict], original_query_context: Dict) -> Dict[str, Any]:
         """Generate textual insights from data using LLM analysis"""
         try:
-            import openai
-            import os
-            from openai import AsyncOpenAI
             
             # Initialize OpenAI client
             api_key = os.getenv("OPENAI_API_KEY")
@@ -4722,7 +5484,7 @@ Generate an enhanced SQL query based on the user's request."""
                     "status": "failed"
                 }
             
-            client = AsyncOpenAI(api_key=api_key)
+            client = self._get_openai()
             
             # Prepare data summary for analysis
             data_sample = data[:10] if len(data) > 10 else data
@@ -4885,10 +5647,7 @@ Current query analysis: Does this query need NEW data from the database or can i
 Response with ONE WORD: "yes" (if follow-up) or "no" (if new independent query)"""
 
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            
-            response = client.chat.completions.create(
+            response = self._get_openai_sync().chat.completions.create(
                 model=self.fast_model,
                 messages=[{"role": "user", "content": classification_prompt}],
                 max_tokens=5,
@@ -4962,7 +5721,6 @@ Response with ONE WORD: "yes" (if follow-up) or "no" (if new independent query)"
                             
                     # EMERGENCY EXTRACTION: If OVERALL_PCT_OF_AVG is found anywhere in the match,
                     # extract it using regex as a fallback
-                    import re
                     column_pattern = r'\b([A-Z]+(?:_[A-Z]+)*)\b'
                     potential_columns = re.findall(column_pattern, match_str)
                     overall_pct_columns = [col for col in potential_columns if 'OVERALL' in col and 'PCT' in col and 'AVG' in col]
@@ -5050,7 +5808,6 @@ Response with ONE WORD: "yes" (if follow-up) or "no" (if new independent query)"
                                     print(f"⚠️ Error: {e}")
                                     
                                     # COMPREHENSIVE REGEX FALLBACK - extract any uppercase words that look like column names
-                                    import re
                                     # Pattern for typical database column names (uppercase with underscores)
                                     column_pattern = r'\b([A-Z][A-Z0-9_]{2,})\b'
                                     potential_columns = re.findall(column_pattern, meta_str)
@@ -0,0 +1,223 @@
+"""
+Plan Cache for the Dynamic Agent Orchestrator
+Skips the planner LLM round trip for repeated or paraphrased queries
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+PLAN_CACHE_DIR = os.getenv("NL2Q_PLAN_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".nl2q_plan_cache"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+# Plans only encode task shape (types + dependencies), so paraphrases can match more loosely
+# than the result cache's answers; the entity guard below still separates different metrics.
+PLAN_CACHE_SIMILARITY = float(os.getenv("PLAN_CACHE_SIMILARITY", "0.90"))
+
+# Tokens that identify *what* is being asked for: acronyms (CPC, NBA),
+# snake_case identifiers (table/column names), codes with digits and numbers.
+# Two queries can embed almost identically yet differ only in these.
+_ENTITY_RE = re.compile(r"\b(?:[A-Z][A-Z0-9_]+|\w+_\w+|\w*\d\w*)\b|\"[^\"]+\"|'[^']+'")
+_WORD_RE = re.compile(r"[a-z]+")
+
+# Words that change the *shape* of the plan (adds python/visualization steps)
+_PLAN_SHAPING_TERMS = frozenset({
+    "chart", "charts", "graph", "graphs", "plot", "plots", "visualize", "visualization",
+    "dashboard", "trend", "trends", "compare", "distribution", "insight", "insights",
+    "above", "previous", "earlier", "this", "that",
+})
+
+
+def extract_plan_entities(query: str) -> frozenset:
+    """Entities that must match exactly before a semantic hit is accepted"""
+    entities = {match.lower() for match in _ENTITY_RE.findall(query)}
+    entities.update(_PLAN_SHAPING_TERMS.intersection(_WORD_RE.findall(query.lower())))
+    return frozenset(entities)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+class PlanCache:
+    """
+    Exact + semantic cache of planner responses.
+
+    Entries are grouped by a *scope* (model, registered agents, prompt context)
+    so a hit is only possible when everything except the user query is identical.
+    Exact hits are keyed by SHA-256 of scope + normalized query; on an exact miss
+    the query embedding is compared against cached embeddings in the same scope.
+    Scopes and keys start with "<agents_version>:" so entries for another agent
+    registry can be evicted by prefix.
+
+    put() only updates memory; flush() writes pending changes to disk and is
+    blocking, so async callers run it via asyncio.to_thread.
+    """
+
+    def __init__(self, cache_dir: str = PLAN_CACHE_DIR, max_entries: int = PLAN_CACHE_MAX_ENTRIES,
+                 similarity_threshold: float = PLAN_CACHE_SIMILARITY):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.plans_file = os.path.join(cache_dir, "plans.json")
+        self.embeddings_file = os.path.join(cache_dir, "query_embeddings.npy")
+
+        self._lock = threading.Lock()
+        # Serializes file writes so a slow flush never holds _lock during I/O
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._embeddings: Dict[str, np.ndarray] = {}
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def make_scope(model: str, agents_version: str, prompt_context: str = "") -> str:
+        """Hash everything besides the user query that shapes the planning prompt"""
+        digest = hashlib.sha256(f"{model}\0{prompt_context}".encode("utf-8")).hexdigest()
+        return f"{agents_version}:{digest}"
+
+    @staticmethod
+    def make_key(scope: str, user_query: str) -> str:
+        agents_version = scope.partition(":")[0]
+        digest = hashlib.sha256(f"{scope}\0{_normalize_query(user_query)}".encode("utf-8")).hexdigest()
+        return f"{agents_version}:{digest}"
+
+    def evict_other_agent_versions(self, agents_version: str) -> int:
+        """Drop entries cached for a different agent registry; returns how many were evicted"""
+        prefix = f"{agents_version}:"
+        with self._lock:
+            stale = [key for key in self._entries if not key.startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+                self._embeddings.pop(key, None)
+            if stale:
+                print(f"🧹 Evicted {len(stale)} cached plans built for other agent versions")
+                self._dirty = True
+        self.flush()
+        return len(stale)
+
+    def get_exact(self, scope: str, user_query: str) -> Optional[List[Dict]]:
+        """Exact lookup on normalized query text (no embedding needed)"""
+        key = self.make_key(scope, user_query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            print(f"⚡ Plan cache exact hit ({self.stats_line()})")
+            # Entries are stored as JSON text so every hit hands out fresh dicts
+            return json.loads(entry["tasks"])
+
+    def get_similar(self, scope: str, user_query: str, query_embedding: Optional[np.ndarray]) -> Optional[List[Dict]]:
+        """Semantic lookup within the same scope; counts a miss when nothing qualifies"""
+        with self._lock:
+            key, similarity = self._best_match(scope, query_embedding)
+            if key is None or similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[key]
+            # Guard against near-identical embeddings for different metrics ("CPC" vs "CPM")
+            if frozenset(entry["entities"]) != extract_plan_entities(user_query):
+                print(f"🔍 Plan cache semantic candidate rejected (entity mismatch, similarity {similarity:.3f})")
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            print(f"⚡ Plan cache semantic hit: '{entry['query'][:60]}' (similarity {similarity:.3f}, {self.stats_line()})")
+            return json.loads(entry["tasks"])
+
+    def _best_match(self, scope: str, query_embedding: Optional[np.ndarray]) -> Tuple[Optional[str], float]:
+        """Key of the most similar cached entry in scope; caller holds the lock"""
+        if query_embedding is None:
+            return None, 0.0
+        keys = [k for k, e in self._entries.items() if e["scope"] == scope and k in self._embeddings]
+        if not keys:
+            return None, 0.0
+        sims = np.stack([self._embeddings[k] for k in keys]) @ query_embedding
+        best = int(np.argmax(sims))
+        return keys[best], float(sims[best])
+
+    def put(self, scope: str, user_query: str, tasks_data: List[Dict],
+            query_embedding: Optional[np.ndarray] = None):
+        """Store a successfully parsed planner response; call flush() to persist it"""
+        key = self.make_key(scope, user_query)
+        with self._lock:
+            self._entries[key] = {
+                "scope": scope,
+                "query": user_query,
+                "entities": sorted(extract_plan_entities(user_query)),
+                "tasks": json.dumps(tasks_data),
+            }
+            self._entries.move_to_end(key)
+            if query_embedding is not None:
+                self._embeddings[key] = np.asarray(query_embedding, dtype=np.float32)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._embeddings.pop(evicted, None)
+            self._dirty = True
+
+    def flush(self):
+        """Persist pending changes, if any (blocking file I/O)"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                embedded_keys = [k for k in self._entries if k in self._embeddings]
+                matrix = np.stack([self._embeddings[k] for k in embedded_keys]) if embedded_keys else None
+                payload = {
+                    "entries": [{"key": k, **e} for k, e in self._entries.items()],
+                    "embedded_keys": embedded_keys,
+                }
+                self._dirty = False
+            if not self._save(payload, matrix):
+                with self._lock:
+                    self._dirty = True
+
+    def stats_line(self) -> str:
+        return f"exact={self.exact_hits} semantic={self.semantic_hits} miss={self.misses} size={len(self._entries)}"
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.plans_file):
+                return
+            with open(self.plans_file, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            entries = payload.get("entries", [])
+            embedded_keys = payload.get("embedded_keys", [])
+            for entry in entries:
+                self._entries[entry.pop("key")] = entry
+            if embedded_keys and os.path.exists(self.embeddings_file):
+                matrix = np.load(self.embeddings_file)
+                if len(matrix) == len(embedded_keys):
+                    self._embeddings = {k: row for k, row in zip(embedded_keys, matrix) if k in self._entries}
+            print(f"📂 Loaded {len(self._entries)} cached plans from {self.cache_dir}")
+        except Exception as e:
+            print(f"⚠️ Could not load plan cache: {e}")
+            self._entries.clear()
+            self._embeddings.clear()
+
+    def _save(self, payload: Dict, matrix: Optional[np.ndarray]) -> bool:
+        """Write both files via temp + rename; caller holds _save_lock"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if matrix is not None:
+                tmp_embeddings = self.embeddings_file + ".tmp.npy"
+                np.save(tmp_embeddings, matrix)
+                os.replace(tmp_embeddings, self.embeddings_file)
+            tmp_plans = self.plans_file + ".tmp"
+            with open(tmp_plans, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_plans, self.plans_file)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not persist plan cache: {e}")
+            return False
@@ -0,0 +1,135 @@
+"""
+Semantic Query Result Cache for the Dynamic Agent Orchestrator
+Answers repeated or paraphrased questions without re-planning and re-executing
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.orchestrators.plan_cache import _normalize_query, extract_plan_entities
+
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+QUERY_CACHE_SIMILARITY = float(os.getenv("QUERY_CACHE_SIMILARITY", "0.87"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "600"))  # Seconds; rows go stale as the warehouse changes
+
+
+class SemanticQueryCache:
+    """
+    Two-tier (exact, then semantic) in-memory cache of executed query pipelines.
+
+    The exact tier is a dict keyed by SHA-256 of scope + normalized query; on a miss
+    the query embedding is compared against cached embeddings of the same scope
+    (one matmul over unit vectors). Like the plan cache, a semantic hit also needs
+    identical entities so "CPC by region" never answers "CPM by region".
+    Entries hold the planned tasks and execute_plan results; both are handed out
+    as copies since callers decorate the results before returning them.
+
+    Hits never cross scopes, so the scope must cover everything besides the query
+    that shapes the answer: the orchestrator folds in the agents version, SQL mode,
+    user_id and, for follow-ups, a hash of the conversation context. Otherwise one
+    user's rows would be replayed to another for up to ttl (10 minutes by default).
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 similarity_threshold: float = QUERY_CACHE_SIMILARITY, ttl: float = QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(scope: str, user_query: str) -> str:
+        return hashlib.sha256(f"{scope}\0{_normalize_query(user_query)}".encode("utf-8")).hexdigest()
+
+    def get_exact(self, scope: str, user_query: str) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+        """(tasks, results) for the same normalized query in scope (no embedding needed)"""
+        key = self.make_key(scope, user_query)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            print(f"⚡ Query cache exact hit ({self.stats_line()})")
+            return list(entry["tasks"]), copy.deepcopy(entry["results"])
+
+    def get_similar(self, scope: str, user_query: str,
+                    query_embedding: Optional[np.ndarray]) -> Optional[Tuple[List[Any], Dict[str, Any]]]:
+        """Semantic lookup within the same scope; counts a miss when nothing qualifies"""
+        with self._lock:
+            self._expire()
+            key, similarity = self._best_match(scope, query_embedding)
+            if key is None or similarity < self.similarity_threshold:
+                self.misses += 1
+                return None
+            entry = self._entries[key]
+            # Guard against near-identical embeddings for different metrics ("CPC" vs "CPM")
+            if entry["entities"] != extract_plan_entities(user_query):
+                print(f"🔍 Query cache semantic candidate rejected (entity mismatch, similarity {similarity:.3f})")
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            print(f"⚡ Query cache semantic hit: '{entry['query'][:60]}' (similarity {similarity:.3f}, {self.stats_line()})")
+            return list(entry["tasks"]), copy.deepcopy(entry["results"])
+
+    def _best_match(self, scope: str, query_embedding: Optional[np.ndarray]) -> Tuple[Optional[str], float]:
+        """Key of the most similar cached entry in scope; caller holds the lock"""
+        if query_embedding is None:
+            return None, 0.0
+        keys = [k for k, e in self._entries.items() if e["scope"] == scope and e["embedding"] is not None]
+        if not keys:
+            return None, 0.0
+        sims = np.stack([self._entries[k]["embedding"] for k in keys]) @ query_embedding
+        best = int(np.argmax(sims))
+        return keys[best], float(sims[best])
+
+    def put(self, scope: str, user_query: str, tasks: List[Any], results: Dict[str, Any],
+            query_embedding: Optional[np.ndarray] = None):
+        """Store a successful pipeline run (tasks must be immutable, results are copied)"""
+        key = self.make_key(scope, user_query)
+        try:
+            snapshot = copy.deepcopy(results)
+        except Exception as e:
+            print(f"⚠️ Query results not cacheable: {e}")
+            return
+        with self._lock:
+            self._entries[key] = {
+                "scope": scope,
+                "query": user_query,
+                "entities": extract_plan_entities(user_query),
+                "tasks": tuple(tasks),
+                "results": snapshot,
+                "embedding": None if query_embedding is None else np.asarray(query_embedding, dtype=np.float32),
+                "stored_at": time.monotonic(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expire(self):
+        """Drop entries older than ttl; caller holds the lock"""
+        cutoff = time.monotonic() - self.ttl
+        stale = [k for k, e in self._entries.items() if e["stored_at"] < cutoff]
+        for key in stale:
+            del self._entries[key]
+
+    def stats_line(self) -> str:
+        return f"exact={self.exact_hits} semantic={self.semantic_hits} miss={self.misses} size={len(self._entries)}"
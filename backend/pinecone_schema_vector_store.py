@@ -4,6 +4,7 @@ Handles chunking, embedding, and similarity search of database schemas
 """
 import os
 import json
+import re
 import asyncio
 from pinecone import Pinecone, ServerlessSpec
 import openai
@@ -24,6 +25,10 @@ def get_database_config():
         'schema': os.getenv('SNOWFLAKE_SCHEMA', 'SAMPLES')
     }
 
+# Vector IDs are "{table}_{suffix}" (see chunk_schema_information); every table has an overview chunk
+_OVERVIEW_ID_RE = re.compile(r"^(?P<table>.+)_overview(?:_\d+)?$")
+_CHUNK_ID_SUFFIX_RE = re.compile(r"^(?:(?:overview|business_context|relationships)(?:_\d+)?|columns_.+)$")
+
 @dataclass
 class SchemaChunk:
     chunk_id: str
@@ -40,6 +45,8 @@ class PineconeSchemaVectorStore:
     EMBEDDING_BATCH_SIZE = int(os.getenv("INDEX_EMBEDDING_BATCH_SIZE", "10"))  # Embeddings per API call
     UPSERT_BATCH_SIZE = int(os.getenv("INDEX_UPSERT_BATCH_SIZE", "100"))  # Vectors per Pinecone upsert
     SKIP_ROW_COUNTS = os.getenv("INDEX_SKIP_ROW_COUNTS", "true").lower() == "true"  # Skip slow COUNT queries
+    POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "30"))  # Connection pool threads for parallel requests
+    DELETE_BATCH_SIZE = 1000  # Pinecone limit for IDs per delete request
     
     def clear_index(self):
         """Delete all vectors from the Pinecone index"""
@@ -70,7 +77,7 @@ class PineconeSchemaVectorStore:
         except Exception as e:
             print(f"⚠️ Index creation info: {e}")
         
-        self.index = self.pc.Index(self.index_name)
+        self.index = self.pc.Index(self.index_name, pool_threads=self.POOL_THREADS)
         
         # Initialize OpenAI client with v1.0+ API
         from openai import AsyncOpenAI
@@ -548,7 +555,11 @@ JOIN Data Type Compatibility:
         tables_to_index = [table for table in all_tables if table not in existing_tables]
         print(f"🎯 Need to index {len(tables_to_index)} new tables")
         
+        # Vectors for tables that no longer exist (never on an empty listing) are dropped after indexing
+        stale_tables = sorted(existing_tables.difference(all_tables)) if all_tables else []
+        
         if not tables_to_index:
+            await self._delete_stale_tables(stale_tables)
             print("✅ All tables already indexed!")
             if progress_callback:
                 if asyncio.iscoroutinefunction(progress_callback):
@@ -560,17 +571,42 @@ JOIN Data Type Compatibility:
         # Performance configuration info
         print(f"⚙️ Performance config: {self.TABLE_BATCH_SIZE} tables/batch, {self.EMBEDDING_BATCH_SIZE} embeddings/batch, {self.UPSERT_BATCH_SIZE} vectors/upsert")
         
+        total_chunks = await self.index_tables(db_adapter, tables_to_index, progress_callback=progress_callback,
+                                               total_tables=len(all_tables), already_indexed=len(existing_tables))
+        await self._delete_stale_tables(stale_tables)
+        
+        total_time = time.time() - start_time
+        avg_time_per_table = total_time / len(tables_to_index) if tables_to_index else 0
+        
+        if progress_callback:
+            if asyncio.iscoroutinefunction(progress_callback):
+                await progress_callback("complete")
+            else:
+                progress_callback("complete")
+        
+        print(f"🎉 Pinecone schema indexing complete!")
+        print(f"📈 Performance summary:")
+        print(f"   • Indexed: {len(tables_to_index)} tables, Skipped: {len(existing_tables)}")
+        print(f"   • Total vectors: {total_chunks}")
+        print(f"   • Total time: {total_time:.1f}s")
+        print(f"   • Average: {avg_time_per_table:.1f}s per table")
+
+    async def index_tables(self, db_adapter, table_names: List[str], progress_callback=None,
+                           total_tables: int = None, already_indexed: int = 0) -> int:
+        """Chunk, embed and upsert the given tables in batches; returns the number of vectors written"""
+        import time
+        total_tables = total_tables if total_tables is not None else len(table_names)
+        
         # Process tables in batches for optimal performance
         batch_size = self.TABLE_BATCH_SIZE  # Configurable batch size
-        indexed_count = 0
         total_chunks = 0
-        processed_tables = len(existing_tables)  # Start with already indexed count
+        processed_tables = already_indexed  # Start with already indexed count
         
-        for i in range(0, len(tables_to_index), batch_size):
+        for i in range(0, len(table_names), batch_size):
             batch_start = time.time()
-            batch = tables_to_index[i:i + batch_size]
+            batch = table_names[i:i + batch_size]
             batch_num = i//batch_size + 1
-            total_batches = (len(tables_to_index) + batch_size - 1)//batch_size
+            total_batches = (len(table_names) + batch_size - 1)//batch_size
             
             print(f"🔄 Processing batch {batch_num}/{total_batches}: {batch}")
             
@@ -600,9 +636,9 @@ JOIN Data Type Compatibility:
                         
                         if progress_callback:
                             if asyncio.iscoroutinefunction(progress_callback):
-                                await progress_callback("table_complete", current_table=table_name, processed=processed_tables, total=len(all_tables))
+                                await progress_callback("table_complete", current_table=table_name, processed=processed_tables, total=total_tables)
                             else:
-                                progress_callback("table_complete", current_table=table_name, processed=processed_tables, total=len(all_tables))
+                                progress_callback("table_complete", current_table=table_name, processed=processed_tables, total=total_tables)
                 except Exception as e:
                     print(f"   ⚠️ Failed to process {table_name}: {e}")
                     if progress_callback:
@@ -639,21 +675,53 @@ JOIN Data Type Compatibility:
                 
                 print(f"   📤 Batch {batch_num} complete: {len(all_chunks)} vectors (embed: {embed_time:.1f}s, upsert: {upsert_time:.1f}s, total: {batch_time:.1f}s)")
         
-        total_time = time.time() - start_time
-        avg_time_per_table = total_time / len(tables_to_index) if tables_to_index else 0
-        
-        if progress_callback:
-            if asyncio.iscoroutinefunction(progress_callback):
-                await progress_callback("complete")
-            else:
-                progress_callback("complete")
+        return total_chunks
+
+    async def delete_tables(self, table_names: List[str]):
+        """Remove every vector belonging to the given tables (raises if the index supports neither delete path)"""
+        if not table_names:
+            return
+        try:
+            ids = await asyncio.to_thread(self._vector_ids_for_tables, table_names)
+        except Exception as e:
+            # Pod-based indexes (and clients before 3.1) have no list(); pods support delete by
+            # metadata filter instead. Serverless indexes reject filter deletes, so this re-raises there.
+            print(f"⚠️ Vector ID listing unavailable ({e}) - deleting by metadata filter")
+            await asyncio.to_thread(self.index.delete, filter={"table_name": {"$in": list(table_names)}})
+            print(f"🗑️ Deleted vectors for {len(table_names)} removed tables")
+            return
         
-        print(f"🎉 Pinecone schema indexing complete!")
-        print(f"📈 Performance summary:")
-        print(f"   • Indexed: {len(tables_to_index)} tables, Skipped: {len(existing_tables)}")
-        print(f"   • Total vectors: {total_chunks}")
-        print(f"   • Total time: {total_time:.1f}s")
-        print(f"   • Average: {avg_time_per_table:.1f}s per table")
+        for i in range(0, len(ids), self.DELETE_BATCH_SIZE):
+            await asyncio.to_thread(self.index.delete, ids=ids[i:i + self.DELETE_BATCH_SIZE])
+        print(f"🗑️ Deleted {len(ids)} vectors for {len(table_names)} removed tables")
+
+    async def _delete_stale_tables(self, table_names: List[str]) -> bool:
+        """delete_tables() that logs instead of raising - a failed cleanup must not abort indexing"""
+        try:
+            await self.delete_tables(table_names)
+            return True
+        except Exception as e:
+            print(f"⚠️ Could not delete vectors for {len(table_names)} removed tables: {e}")
+            return False
+
+    def _list_vector_ids(self, prefix: str = None) -> List[str]:
+        """Vector IDs in the index (optionally under prefix) via paginated list() - serverless indexes only"""
+        if not hasattr(self.index, "list"):
+            raise NotImplementedError("Index.list() requires pinecone-client >= 3.1")
+        kwargs = {"prefix": prefix} if prefix else {}
+        ids = []
+        for page in self.index.list(**kwargs):
+            ids.extend(page)
+        return ids
+
+    def _vector_ids_for_tables(self, table_names: List[str]) -> List[str]:
+        """IDs of all chunks of the given tables; "{table}_" also prefixes longer table names, so check the suffix"""
+        ids = []
+        for table_name in table_names:
+            prefix = f"{table_name}_"
+            ids.extend(vector_id for vector_id in self._list_vector_ids(prefix)
+                       if _CHUNK_ID_SUFFIX_RE.match(vector_id[len(prefix):]))
+        return ids
 
     async def _process_table_optimized(self, db_adapter, table_name: str):
         """Process a single table and return chunks (without embeddings yet)"""
@@ -701,6 +769,7 @@ JOIN Data Type Compatibility:
     async def _batch_upsert_chunks(self, chunks):
         """Upsert multiple chunks to Pinecone in batches"""
         batch_size = self.UPSERT_BATCH_SIZE  # Configurable batch size
+        async_results = []
         
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i:i + batch_size]
@@ -718,11 +787,21 @@ JOIN Data Type Compatibility:
                     }
                 ))
             
-            # Batch upsert
-            self.index.upsert(vectors)
+            # async_req hands each batch to the index's pool_threads so batches upload in parallel
+            async_results.append(self.index.upsert(vectors=vectors, async_req=True))
+        
+        # Wait for all uploads off the event loop (get() re-raises any upsert error)
+        await asyncio.to_thread(lambda: [result.get() for result in async_results])
 
     async def _get_indexed_tables_fast(self) -> set:
         """Get list of tables that are already indexed in Pinecone efficiently"""
+        try:
+            # Listing vector IDs covers the whole index; the query scan below only sees the top 1000 vectors
+            ids = await asyncio.to_thread(self._list_vector_ids)
+            return {match.group("table") for match in map(_OVERVIEW_ID_RE.match, ids) if match}
+        except Exception as e:
+            print(f"⚠️ Vector ID listing unavailable, falling back to query scan: {e}")
+        
         try:
             # Get index stats first to check if there are any vectors
             stats = self.index.describe_index_stats()
@@ -908,8 +987,24 @@ JOIN Data Type Compatibility:
         return ranked_tables[:top_k]
 
     async def get_table_details(self, table_name: str) -> Dict[str, Any]:
-        import json
-        
+        # index.query is blocking - run it off the event loop so lookups can overlap
+        return await asyncio.to_thread(self._fetch_table_details, table_name)
+
+    async def get_table_details_batch(self, table_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch details for several tables concurrently; failed lookups are logged and omitted"""
+        details_list = await asyncio.gather(
+            *[self.get_table_details(table_name) for table_name in table_names],
+            return_exceptions=True
+        )
+        details_by_table = {}
+        for table_name, details in zip(table_names, details_list):
+            if isinstance(details, Exception):
+                print(f"⚠️ Failed to get detailed metadata for {table_name}: {details}")
+            else:
+                details_by_table[table_name] = details
+        return details_by_table
+
+    def _fetch_table_details(self, table_name: str) -> Dict[str, Any]:
         # Use dummy vector for filter-only query (Pinecone requires either vector or ID)
         dummy_vector = [0.0] * 3072  # text-embedding-3-large dimension
         results = self.index.query(
@@ -4,11 +4,14 @@ The SQL generation is handled by LLM agents, this just executes safely
 """
 
 import asyncio
+import re
 import time
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from datetime import datetime
 
+from backend.nl2sql.guardrails import apply_row_limit
+
 @dataclass
 class QueryValidationResult:
     is_valid: bool
@@ -24,6 +27,17 @@ class QueryExecutionResult:
     row_count: int = 0
     error_message: Optional[str] = None
     job_id: Optional[str] = None
+    was_sampled: bool = False  # True when max_rows truncated the result
+
+# Write/DDL statements validate_query rejects, matched in one pass over the SQL
+DANGEROUS_SQL_PATTERNS = ("DROP TABLE", "DELETE FROM", "TRUNCATE", "ALTER TABLE")
+# Word boundaries keep identifiers such as truncated_at from matching
+_DANGEROUS_SQL_RE = re.compile(r"\b(?:" + "|".join(re.escape(p).replace("\\ ", r"\s+") for p in DANGEROUS_SQL_PATTERNS) + r")\b", re.IGNORECASE)
+
+def find_dangerous_pattern(sql: str) -> Optional[str]:
+    """First entry of DANGEROUS_SQL_PATTERNS found in sql (list order), or None"""
+    hits = {" ".join(match.group(0).upper().split()) for match in _DANGEROUS_SQL_RE.finditer(sql)}
+    return next((pattern for pattern in DANGEROUS_SQL_PATTERNS if pattern in hits), None)
 
 class SQLRunner:
     """
@@ -44,6 +58,7 @@ class SQLRunner:
     async def execute_query(self, 
                           sql: str, 
                           user_id: str = "default_user",
+                          max_rows: Optional[int] = None,
                           **kwargs) -> QueryExecutionResult:
         """
         Execute LLM-generated SQL query safely
@@ -51,6 +66,8 @@ class SQLRunner:
         Args:
             sql: SQL query generated by LLM agents
             user_id: User identifier
+            max_rows: Row cap pushed into the SQL as LIMIT (None = no cap).
+                One extra row is requested so a result of exactly max_rows is not flagged as sampled.
             
         Returns:
             QueryExecutionResult with data and metadata
@@ -63,8 +80,9 @@ class SQLRunner:
                 from backend.db.engine import get_adapter
                 self.db_adapter = get_adapter()
             
-            # Execute the SQL query
-            result = self.db_adapter.run(sql, dry_run=False)
+            # Execute the SQL query, probing one row past the cap to detect truncation
+            limited_sql, _ = apply_row_limit(sql, max_rows + 1) if max_rows else (sql, False)
+            result = self.db_adapter.run(limited_sql, dry_run=False)
             
             execution_time = time.time() - start_time
             
@@ -75,19 +93,26 @@ class SQLRunner:
                     execution_time=execution_time
                 )
             
+            rows = result.rows or []
+            was_sampled = bool(max_rows) and len(rows) > max_rows
+            if was_sampled:
+                rows = rows[:max_rows]
+            
             # Convert rows to list of dictionaries
             data = []
-            if result.rows and result.columns:
-                for row in result.rows:
+            if rows and result.columns:
+                for row in rows:
                     row_dict = dict(zip(result.columns, row))
                     data.append(row_dict)
             
+            row_count = len(data) if was_sampled else getattr(result, 'row_count', len(data))
             return QueryExecutionResult(
                 success=True,
                 data=data,
                 columns=result.columns or [],
                 execution_time=execution_time,
-                row_count=len(data) if data else 0
+                row_count=row_count,
+                was_sampled=was_sampled
             )
             
         except Exception as e:
@@ -115,14 +140,12 @@ class SQLRunner:
                     )
                     
                 # Check for obviously dangerous patterns
-                sql_upper = sql.upper()
-                dangerous_patterns = ["DROP TABLE", "DELETE FROM", "TRUNCATE", "ALTER TABLE"]
-                for pattern in dangerous_patterns:
-                    if pattern in sql_upper:
-                        return QueryValidationResult(
-                            is_valid=False,
-                            error_message=f"Dangerous SQL pattern detected: {pattern}"
-                        )
+                pattern = find_dangerous_pattern(sql)
+                if pattern:
+                    return QueryValidationResult(
+                        is_valid=False,
+                        error_message=f"Dangerous SQL pattern detected: {pattern}"
+                    )
                         
                 return QueryValidationResult(is_valid=True)
                 
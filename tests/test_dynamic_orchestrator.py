@@ -0,0 +1,131 @@
+import asyncio
+from backend.orchestrators.dynamic_agent_orchestrator import DynamicAgentOrchestrator
+
+def test_task_semaphore_created_per_running_loop():
+    orchestrator = DynamicAgentOrchestrator()
+    assert orchestrator._task_semaphore is None
+
+    async def acquire():
+        async with orchestrator._get_task_semaphore():
+            return orchestrator._task_semaphore
+
+    first = asyncio.run(acquire())
+    second = asyncio.run(acquire())
+    assert first is not None and second is not first
+
+QUERY = "average CPC by region"
+
+def _single_flight_orchestrator(execute):
+    orchestrator = DynamicAgentOrchestrator()
+    orchestrator.plan_calls = 0
+
+    async def plan_execution(user_query, context=None):
+        orchestrator.plan_calls += 1
+        return ["1_execution"]
+
+    async def embed_plan_query(client, user_query):
+        return None
+
+    orchestrator.plan_execution = plan_execution
+    orchestrator.execute_plan = execute
+    orchestrator._embed_plan_query = embed_plan_query
+    orchestrator._get_openai = lambda: None
+    return orchestrator
+
+def _run(orchestrator, user_id, context):
+    scope = orchestrator._query_cache_scope(user_id, False, context)
+    return orchestrator._run_new_planning(scope, QUERY, user_id, context)
+
+async def _leader_and_waiter(orchestrator, release, waiter_user="u1", waiter_context=None):
+    leader = asyncio.create_task(_run(orchestrator, "u1", {}))
+    while not orchestrator._inflight_runs:
+        await asyncio.sleep(0)
+    waiter = asyncio.create_task(_run(orchestrator, waiter_user, waiter_context or {}))
+    await asyncio.sleep(0)
+    release(leader)
+    return await asyncio.gather(leader, waiter, return_exceptions=True)
+
+def test_identical_inflight_queries_run_pipeline_once():
+    gate = {}
+
+    async def execute_plan(tasks, user_query, user_id, context=None):
+        await gate["event"].wait()
+        return {"1_execution": {"status": "completed", "results": [{"cpc": 1.5}]}}
+
+    orchestrator = _single_flight_orchestrator(execute_plan)
+
+    async def run():
+        gate["event"] = asyncio.Event()
+        return await _leader_and_waiter(orchestrator, lambda leader: gate["event"].set())
+
+    (leader_tasks, leader_results), (waiter_tasks, waiter_results) = asyncio.run(run())
+    assert orchestrator.plan_calls == 1
+    assert waiter_tasks == leader_tasks
+    assert waiter_results == leader_results
+    assert waiter_results is not leader_results
+    assert waiter_results["1_execution"]["results"] is not leader_results["1_execution"]["results"]
+    assert orchestrator._inflight_runs == {}
+
+def test_failing_leader_propagates_to_waiters():
+    gate = {}
+
+    async def execute_plan(tasks, user_query, user_id, context=None):
+        await gate["event"].wait()
+        raise ValueError("warehouse unavailable")
+
+    orchestrator = _single_flight_orchestrator(execute_plan)
+
+    async def run():
+        gate["event"] = asyncio.Event()
+        return await _leader_and_waiter(orchestrator, lambda leader: gate["event"].set())
+
+    leader_outcome, waiter_outcome = asyncio.run(run())
+    assert isinstance(leader_outcome, ValueError)
+    assert isinstance(waiter_outcome, ValueError)
+    assert orchestrator.plan_calls == 1
+    assert orchestrator._inflight_runs == {}
+
+def test_cancelled_leader_propagates_to_waiters():
+    async def execute_plan(tasks, user_query, user_id, context=None):
+        await asyncio.Event().wait()
+
+    orchestrator = _single_flight_orchestrator(execute_plan)
+    leader_outcome, waiter_outcome = asyncio.run(_leader_and_waiter(orchestrator, lambda leader: leader.cancel()))
+    assert isinstance(leader_outcome, asyncio.CancelledError)
+    assert isinstance(waiter_outcome, RuntimeError)
+    assert orchestrator._inflight_runs == {}
+
+def test_query_cache_scope_isolates_users_and_follow_up_context():
+    orchestrator = DynamicAgentOrchestrator()
+    plain = {"is_follow_up": False, "recent_queries": [{"nl": "earlier question"}]}
+    follow_up_a = {"is_follow_up": True, "recent_queries": [{"nl": "sales by region"}]}
+    follow_up_b = {"is_follow_up": True, "recent_queries": [{"nl": "sales by product"}]}
+
+    assert orchestrator._query_cache_scope("u1", False, plain) == orchestrator._query_cache_scope("u1", False, {})
+    assert orchestrator._query_cache_scope("u1", False, plain) != orchestrator._query_cache_scope("u2", False, plain)
+    assert orchestrator._query_cache_scope("u1", False, plain) != orchestrator._query_cache_scope("u1", True, plain)
+    assert orchestrator._query_cache_scope("u1", False, follow_up_a) != orchestrator._query_cache_scope("u1", False, plain)
+    assert orchestrator._query_cache_scope("u1", False, follow_up_a) != orchestrator._query_cache_scope("u1", False, follow_up_b)
+    assert orchestrator._query_cache_scope("u1", False, follow_up_a) == orchestrator._query_cache_scope("u1", False, dict(follow_up_a))
+
+def test_different_users_or_contexts_are_not_coalesced():
+    gate = {}
+
+    async def execute_plan(tasks, user_query, user_id, context=None):
+        await gate["event"].wait()
+        return {"1_execution": {"status": "completed", "results": [{"user": user_id}]}}
+
+    follow_up = {"is_follow_up": True, "recent_queries": [{"nl": "sales by region"}]}
+    for waiter_user, waiter_context in [("u2", None), ("u1", follow_up)]:
+        orchestrator = _single_flight_orchestrator(execute_plan)
+
+        async def run():
+            gate["event"] = asyncio.Event()
+            return await _leader_and_waiter(orchestrator, lambda leader: gate["event"].set(),
+                                            waiter_user, waiter_context)
+
+        (_, leader_results), (_, waiter_results) = asyncio.run(run())
+        assert orchestrator.plan_calls == 2
+        assert leader_results["1_execution"]["results"] == [{"user": "u1"}]
+        assert waiter_results["1_execution"]["results"] == [{"user": waiter_user}]
+        assert orchestrator._inflight_runs == {}
@@ -1,5 +1,5 @@
 import pytest
-from backend.nl2sql.guardrails import sanitize_sql, GuardrailConfig
+from backend.nl2sql.guardrails import sanitize_sql, apply_row_limit, GuardrailConfig
 
 def test_block_ddl_dml():
     cfg = GuardrailConfig(enable_write=False, allowed_schemas=["public"], default_limit=100)
@@ -23,3 +23,67 @@ def test_no_limit_if_present():
     sql, added = sanitize_sql("SELECT * FROM users LIMIT 50", cfg)
     assert "LIMIT 50" in sql
     assert not added
+
+def test_no_second_statement_from_trailing_comment():
+    cfg = GuardrailConfig(enable_write=False, allowed_schemas=["public"], default_limit=100)
+    sql, added = sanitize_sql("SELECT * FROM users;  -- done", cfg)
+    assert sql == "SELECT * FROM users LIMIT 100"
+    assert added
+
+def test_row_limit_appended():
+    sql, capped = apply_row_limit("SELECT * FROM users", 100)
+    assert sql == "SELECT * FROM users LIMIT 100"
+    assert capped
+
+def test_row_limit_lowers_limit_above_cap():
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT 50000", 100)
+    assert sql == "SELECT * FROM users LIMIT 100"
+    assert capped
+
+def test_row_limit_keeps_limit_within_cap():
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT 50", 100)
+    assert sql == "SELECT * FROM users LIMIT 50"
+    assert not capped
+
+def test_row_limit_keeps_offset():
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT 500 OFFSET 20", 100)
+    assert sql == "SELECT * FROM users LIMIT 100 OFFSET 20"
+    assert capped
+
+def test_row_limit_skips_non_select():
+    for statement in ["SHOW TABLES", "DESCRIBE users", "INSERT INTO users VALUES (1)"]:
+        assert apply_row_limit(statement, 100) == (statement, False)
+
+def test_row_limit_skips_top_and_fetch_first():
+    for statement in ["SELECT TOP 10000 * FROM users", "SELECT * FROM users ORDER BY id FETCH FIRST 10 ROWS ONLY"]:
+        assert apply_row_limit(statement, 100) == (statement, False)
+
+def test_row_limit_strips_semicolon_and_comments():
+    sql, capped = apply_row_limit("SELECT * FROM users;  -- done", 100)
+    assert sql == "SELECT * FROM users LIMIT 100"
+    sql, capped = apply_row_limit("SELECT id /* pk */ FROM users -- all\n;", 100)
+    assert sql.endswith("FROM users LIMIT 100")
+    assert "--" not in sql and "/*" not in sql
+
+def test_row_limit_keeps_comment_markers_inside_literals():
+    sql, capped = apply_row_limit("SELECT * FROM users WHERE note = '-- keep'", 100)
+    assert sql == "SELECT * FROM users WHERE note = '-- keep' LIMIT 100"
+
+def test_row_limit_leaves_multi_statement_unchanged():
+    statement = "SELECT * FROM users; SELECT * FROM orders"
+    assert apply_row_limit(statement, 100) == (statement, False)
+
+def test_row_limit_caps_limit_all():
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT ALL", 100)
+    assert sql == "SELECT * FROM users LIMIT 100"
+    assert capped
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT ALL OFFSET 20", 100)
+    assert sql == "SELECT * FROM users LIMIT 100 OFFSET 20"
+
+def test_row_limit_keeps_placeholder_limit():
+    for statement in ["SELECT * FROM users LIMIT :n", "SELECT * FROM users LIMIT ?",
+                      "SELECT * FROM users LIMIT %s OFFSET %s", "SELECT * FROM users LIMIT $1",
+                      "SELECT * FROM users LIMIT {n}"]:
+        assert apply_row_limit(statement, 100) == (statement, False)
+    sql, capped = apply_row_limit("SELECT * FROM users LIMIT 500 OFFSET :offset", 100)
+    assert sql == "SELECT * FROM users LIMIT 100 OFFSET :offset"
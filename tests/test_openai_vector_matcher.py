@@ -0,0 +1,214 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from backend.agents import openai_vector_matcher
+from backend.agents.openai_vector_matcher import OpenAIVectorMatcher, SchemaItem, _count_tokens
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+TABLES = {
+    "orders": _unit(1.0, 0.0, 0.0, 0.0),
+    "customers": _unit(0.0, 1.0, 0.0, 0.0),
+    "order_items": _unit(0.8, 0.2, 0.0, 0.0),
+}
+COLUMNS = {
+    "orders.order_id": _unit(1.0, 0.0, 0.1, 0.0),
+    "orders.order_date": _unit(0.6, 0.0, 0.8, 0.0),
+    "orders.total_amount": _unit(0.0, 0.0, 0.0, 1.0),
+    "customers.customer_id": _unit(0.9, 0.1, 0.0, 0.0),
+    "customers.name": _unit(0.0, 1.0, 0.0, 0.0),
+}
+
+@pytest.fixture
+def matcher(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    matcher = OpenAIVectorMatcher(cache_dir=str(tmp_path))
+    matcher.table_embeddings = dict(TABLES)
+    matcher.column_embeddings = dict(COLUMNS)
+    matcher.schema_items = [SchemaItem(name=name, type="table") for name in TABLES]
+    matcher._build_similarity_index()
+    return matcher
+
+def _stub_query(matcher, vector):
+    matcher._get_embeddings = lambda texts: [vector for _ in texts]
+
+class _FakeEmbeddings:
+    """Stands in for client.embeddings; raises the queued errors first, then succeeds"""
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    async def create(self, model, input):
+        self.calls.append((asyncio.get_running_loop().time(), list(input)))
+        await asyncio.sleep(0.01)  # Yield like a real request, so other batches can queue meanwhile
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0, 0.0, 0.0]) for _ in input])
+
+def _fake_client(matcher, errors=()):
+    matcher._client = SimpleNamespace(embeddings=_FakeEmbeddings(errors))
+    return matcher._client.embeddings
+
+def test_top_k_threshold_filtering():
+    sims = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    scores, positions = OpenAIVectorMatcher._top_k(sims, 3, threshold=0.6)
+    assert positions.tolist() == [1, 3]
+    assert scores.tolist() == pytest.approx([0.9, 0.7])
+
+def test_top_k_k_at_least_n():
+    sims = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    for k in (4, 10):
+        _, positions = OpenAIVectorMatcher._top_k(sims, k)
+        assert positions.tolist() == [1, 3, 2, 0]
+
+def test_top_k_and_search_on_empty_input():
+    scores, positions = OpenAIVectorMatcher._top_k(np.empty(0, dtype=np.float32), 3)
+    assert len(scores) == 0 and len(positions) == 0
+    scores, rows = OpenAIVectorMatcher._search(None, np.empty((0, 4), dtype=np.float32), _unit(1, 0, 0, 0), 5)
+    assert len(scores) == 0 and len(rows) == 0
+
+def test_search_threshold_and_k(matcher):
+    q = _unit(1.0, 0.0, 0.0, 0.0)
+    scores, rows = OpenAIVectorMatcher._search(None, matcher._table_matrix, q, 10, threshold=0.5)
+    assert [matcher._table_names[row] for row in rows] == ["orders", "order_items"]
+    assert all(score >= 0.5 for score in scores)
+
+def test_faiss_and_numpy_paths_rank_alike(matcher):
+    pytest.importorskip("faiss")
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((200, 16)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    q = OpenAIVectorMatcher._normalize_query(rng.standard_normal(16))
+    index = OpenAIVectorMatcher._build_faiss_index(matrix)
+    faiss_scores, faiss_rows = OpenAIVectorMatcher._search(index, matrix, q, 10, threshold=0.1)
+    numpy_scores, numpy_rows = OpenAIVectorMatcher._search(None, matrix, q, 10, threshold=0.1)
+    assert faiss_rows.tolist() == numpy_rows.tolist()
+    assert faiss_scores == pytest.approx(numpy_scores, abs=1e-5)
+
+def test_find_similar_tables(matcher):
+    _stub_query(matcher, _unit(1.0, 0.0, 0.0, 0.0))
+    results = matcher.find_similar_tables("orders", top_k=5, threshold=0.5)
+    assert [r["table_name"] for r in results] == ["orders", "order_items"]
+
+def test_find_relevant_columns_for_table(matcher):
+    _stub_query(matcher, _unit(1.0, 0.0, 0.0, 0.0))
+    results = matcher.find_relevant_columns("order id", table_name="orders", top_k=2)
+    assert [(r["table_name"], r["column_name"]) for r in results] == [("orders", "order_id"), ("orders", "order_date")]
+    assert matcher.find_relevant_columns("order id", table_name="missing") == []
+
+    overall = matcher.find_relevant_columns("order id", top_k=2)
+    assert [r["column_name"] for r in overall] == ["order_id", "customer_id"]
+
+def test_save_load_roundtrip(matcher, tmp_path):
+    for item in matcher.schema_items:
+        item.description = matcher._generate_description(item)
+    matcher._desc_cache = {matcher._desc_key(item.description): matcher.table_embeddings[item.name]
+                           for item in matcher.schema_items}
+    matcher._save_cached_embeddings()
+
+    reloaded = OpenAIVectorMatcher(cache_dir=str(tmp_path))
+    assert reloaded._load_cached_embeddings()
+    assert reloaded._table_names == matcher._table_names
+    assert reloaded._column_keys == matcher._column_keys
+    np.testing.assert_allclose(reloaded._table_matrix, matcher._table_matrix, atol=1e-3)
+    np.testing.assert_allclose(reloaded._column_matrix, matcher._column_matrix, atol=1e-3)
+    assert [item.name for item in reloaded.schema_items] == list(TABLES)
+    assert set(reloaded._desc_cache) == set(matcher._desc_cache)
+    assert reloaded._column_rows_by_table["orders"].tolist() == [0, 1, 2]
+
+def test_pack_batches_respects_token_budget(monkeypatch):
+    monkeypatch.setattr(openai_vector_matcher, "EMBEDDING_TOKEN_BUDGET", 20)
+    texts = [f"text number {i} " * 3 for i in range(12)]
+    batches = OpenAIVectorMatcher._pack_batches(texts)
+    assert len(batches) > 1
+    assert [text for batch in batches for text in batch] == texts
+    assert all(sum(_count_tokens(text) for text in batch) <= 20 for batch in batches)
+
+def test_pack_batches_respects_item_limit(monkeypatch):
+    monkeypatch.setattr(openai_vector_matcher, "EMBEDDING_MAX_INPUTS", 3)
+    batches = OpenAIVectorMatcher._pack_batches([f"t{i}" for i in range(7)])
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+
+def test_over_long_input_truncated_and_cached_under_original(matcher, monkeypatch):
+    monkeypatch.setattr(openai_vector_matcher, "EMBEDDING_MAX_INPUT_TOKENS", 10)
+    embeddings = _fake_client(matcher)
+    long_text = "revenue by quarter " * 50
+    asyncio.run(matcher._embed_misses([long_text, "short"]))
+    (_, sent), = embeddings.calls
+    assert sent[1] == "short"
+    assert _count_tokens(sent[0]) <= 10 and long_text.startswith(sent[0])
+    assert matcher._desc_key(long_text) in matcher._desc_cache
+
+def test_failed_query_embedding_returns_no_matches(matcher):
+    _stub_query(matcher, np.zeros(4, dtype=np.float32))
+    assert matcher._embed_query("orders") is None
+    assert matcher.find_similar_tables("orders") == []
+    assert matcher.find_relevant_columns("orders") == []
+    assert matcher.hybrid_search("orders")["relevant_columns"] == []
+
+def _numba_case(case):
+    rng = np.random.default_rng(1)
+    matrix = rng.standard_normal((300, 8)).astype(np.float32)
+    if case == "ties":
+        matrix[100:200] = matrix[:100]  # Every score appears twice
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    q = OpenAIVectorMatcher._normalize_query(rng.standard_normal(8))
+    top_k = {"k_above_n": 500}.get(case, 10)
+    threshold = {"threshold": 0.4}.get(case)
+    return matrix, q, top_k, threshold
+
+@pytest.mark.parametrize("case", ["random", "ties", "threshold", "k_above_n"])
+def test_numba_kernel_matches_numpy_path(monkeypatch, case):
+    pytest.importorskip("numba")
+    matrix, q, top_k, threshold = _numba_case(case)
+
+    monkeypatch.setattr(openai_vector_matcher, "NUMBA_MIN_ROWS", 0)
+    numba_scores, numba_rows = OpenAIVectorMatcher._search(None, matrix, q, top_k, threshold)
+    monkeypatch.setattr(openai_vector_matcher, "NUMBA_AVAILABLE", False)
+    numpy_scores, numpy_rows = OpenAIVectorMatcher._search(None, matrix, q, top_k, threshold)
+
+    assert len(numba_rows) == len(numpy_rows) == min(top_k, int((matrix @ q >= (threshold or -np.inf)).sum()))
+    np.testing.assert_allclose(numba_scores, numpy_scores, atol=1e-5)
+    np.testing.assert_allclose(matrix[numba_rows] @ q, numba_scores, atol=1e-5)
+    if case != "ties":  # Equal scores may come back in either order
+        assert numba_rows.tolist() == numpy_rows.tolist()
+
+def _rate_limit_error():
+    import httpx
+    from openai import RateLimitError
+    response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+    return RateLimitError("rate limited", response=response, body=None)
+
+def test_rate_limited_batch_retries_with_backoff(matcher, monkeypatch):
+    monkeypatch.setattr(openai_vector_matcher.random, "uniform", lambda a, b: 0.0)
+    embeddings = _fake_client(matcher, errors=[_rate_limit_error(), _rate_limit_error()])
+
+    async def run():
+        return await matcher._embed_batch(asyncio.Semaphore(1), ["orders"], 1, 1)
+
+    vectors = asyncio.run(run())
+    assert len(vectors) == 1
+    assert len(embeddings.calls) == 3
+    call_times = [when for when, _ in embeddings.calls]
+    # Exponential backoff: 1s after the first 429, 2s after the second
+    assert call_times[1] - call_times[0] == pytest.approx(1.0, abs=0.2)
+    assert call_times[2] - call_times[1] == pytest.approx(2.0, abs=0.2)
+
+def test_queued_batch_waits_out_shared_backoff(matcher, monkeypatch):
+    monkeypatch.setattr(openai_vector_matcher.random, "uniform", lambda a, b: 0.0)
+    monkeypatch.setattr(openai_vector_matcher, "EMBEDDING_MAX_BACKOFF", 0.3)
+    embeddings = _fake_client(matcher, errors=[_rate_limit_error()])
+
+    async def run():
+        semaphore = asyncio.Semaphore(1)
+        return await asyncio.gather(matcher._embed_batch(semaphore, ["a"], 1, 2),
+                                    matcher._embed_batch(semaphore, ["b"], 2, 2))
+
+    asyncio.run(run())
+    (first_at, first), (second_at, _), _ = embeddings.calls
+    assert first == ["a"]
+    # "b" was already queued on the semaphore when "a" hit the 429, yet still waits out the backoff
+    assert second_at - first_at >= 0.25
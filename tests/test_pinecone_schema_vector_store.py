@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from backend.pinecone_schema_vector_store import PineconeSchemaVectorStore
+
+class _PodIndex:
+    """Fake pod-based index: no list(), deletes by id or metadata filter"""
+    def __init__(self, ids=(), filter_error=None):
+        self.ids = list(ids)
+        self.filter_error = filter_error
+        self.deleted_ids = []
+        self.deleted_filters = []
+
+    def delete(self, ids=None, filter=None):
+        if filter is not None:
+            if self.filter_error:
+                raise self.filter_error
+            self.deleted_filters.append(filter)
+        else:
+            self.deleted_ids.extend(ids)
+
+class _ServerlessIndex(_PodIndex):
+    """Fake serverless index: paginated list(prefix=...)"""
+    def list(self, prefix=None):
+        matching = [vector_id for vector_id in self.ids if vector_id.startswith(prefix or "")]
+        for i in range(0, len(matching), 2):
+            yield matching[i:i + 2]
+
+def _store(index):
+    store = PineconeSchemaVectorStore.__new__(PineconeSchemaVectorStore)
+    store.index = index
+    return store
+
+IDS = ["orders_overview", "orders_columns_1", "orders_relationships",
+       "orders_archive_overview", "customers_overview"]
+
+def test_delete_tables_by_listed_ids():
+    index = _ServerlessIndex(IDS)
+    asyncio.run(_store(index).delete_tables(["orders"]))
+    # "orders_" also prefixes orders_archive's vectors; those must survive
+    assert sorted(index.deleted_ids) == ["orders_columns_1", "orders_overview", "orders_relationships"]
+    assert index.deleted_filters == []
+
+def test_delete_tables_falls_back_to_metadata_filter():
+    index = _PodIndex(IDS)
+    asyncio.run(_store(index).delete_tables(["orders", "customers"]))
+    assert index.deleted_filters == [{"table_name": {"$in": ["orders", "customers"]}}]
+    assert index.deleted_ids == []
+
+def test_indexed_tables_from_listed_overview_ids():
+    assert asyncio.run(_store(_ServerlessIndex(IDS))._get_indexed_tables_fast()) == {"orders", "orders_archive", "customers"}
+
+def test_failing_delete_raises_and_stale_cleanup_logs():
+    index = _PodIndex(IDS, filter_error=RuntimeError("filter deletes unsupported on serverless"))
+    store = _store(index)
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.delete_tables(["orders"]))
+    assert asyncio.run(store._delete_stale_tables(["orders"])) is False
+
+def test_sync_indexes_new_tables_when_delete_fails():
+    from backend.orchestrators.dynamic_agent_orchestrator import DynamicAgentOrchestrator
+
+    class _Store:
+        indexed = None
+
+        async def _get_indexed_tables_fast(self):
+            return {"orders", "dropped_table"}
+
+        async def index_tables(self, db_adapter, table_names, **kwargs):
+            self.indexed = table_names
+
+        async def delete_tables(self, table_names):
+            raise RuntimeError("filter deletes unsupported on serverless")
+
+    async def available_tables():
+        return [("db", "orders"), ("db", "new_table")]
+
+    orchestrator = DynamicAgentOrchestrator()
+    orchestrator.pinecone_store = _Store()
+    orchestrator._cached_available_tables = available_tables
+    asyncio.run(orchestrator._check_and_perform_comprehensive_indexing())
+    assert orchestrator.pinecone_store.indexed == ["new_table"]
+    assert orchestrator._index_initialized
@@ -0,0 +1,82 @@
+import numpy as np
+from backend.orchestrators.plan_cache import PlanCache
+
+TASKS = [{"task_id": "1_schema_discovery", "task_type": "schema_discovery", "dependencies": []}]
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def _cache(tmp_path, **kwargs):
+    return PlanCache(cache_dir=str(tmp_path), **kwargs)
+
+def test_exact_hit_on_normalized_query(tmp_path):
+    cache = _cache(tmp_path)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "Show top prescribers", TASKS)
+    assert cache.get_exact(scope, "  show   TOP prescribers ") == TASKS
+    assert cache.get_exact(PlanCache.make_scope("o3-mini", "v1", "other context"), "Show top prescribers") is None
+
+def test_exact_hit_returns_fresh_copies(tmp_path):
+    cache = _cache(tmp_path)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "Show top prescribers", TASKS)
+    cache.get_exact(scope, "Show top prescribers")[0]["task_id"] = "mutated"
+    assert cache.get_exact(scope, "Show top prescribers") == TASKS
+
+def test_semantic_hit(tmp_path):
+    cache = _cache(tmp_path, similarity_threshold=0.9)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "show the top prescribers", TASKS, _unit(1.0, 0.0))
+    assert cache.get_similar(scope, "list the top prescribers", _unit(1.0, 0.1)) == TASKS
+    assert cache.get_similar(scope, "list the top prescribers", _unit(0.0, 1.0)) is None
+    assert cache.semantic_hits == 1 and cache.misses == 1
+
+def test_semantic_hit_rejected_on_entity_mismatch(tmp_path):
+    cache = _cache(tmp_path, similarity_threshold=0.9)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "average CPC by campaign", TASKS, _unit(1.0, 0.0))
+    assert cache.get_similar(scope, "average CPM by campaign", _unit(1.0, 0.0)) is None
+    assert cache.get_similar(scope, "average CPC per campaign", _unit(1.0, 0.0)) == TASKS
+
+def test_lru_eviction(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "first", TASKS)
+    cache.put(scope, "second", TASKS)
+    cache.get_exact(scope, "first")
+    cache.put(scope, "third", TASKS)
+    assert cache.get_exact(scope, "second") is None
+    assert cache.get_exact(scope, "first") == TASKS
+    assert cache.get_exact(scope, "third") == TASKS
+
+def test_evict_other_agent_versions(tmp_path):
+    cache = _cache(tmp_path)
+    old_scope = PlanCache.make_scope("o3-mini", "v1")
+    new_scope = PlanCache.make_scope("o3-mini", "v2")
+    cache.put(old_scope, "show prescribers", TASKS, _unit(1.0, 0.0))
+    cache.put(new_scope, "show prescribers", TASKS, _unit(1.0, 0.0))
+    assert cache.evict_other_agent_versions("v2") == 1
+    assert cache.get_exact(old_scope, "show prescribers") is None
+    assert cache.get_exact(new_scope, "show prescribers") == TASKS
+    assert cache.evict_other_agent_versions("v2") == 0
+    assert len(_cache(tmp_path)._entries) == 1
+
+def test_put_defers_writes_until_flush(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put(PlanCache.make_scope("o3-mini", "v1"), "show prescribers", TASKS)
+    assert not (tmp_path / "plans.json").exists()
+    cache.flush()
+    assert (tmp_path / "plans.json").exists()
+
+def test_load_save_round_trip(tmp_path):
+    cache = _cache(tmp_path, similarity_threshold=0.9)
+    scope = PlanCache.make_scope("o3-mini", "v1")
+    cache.put(scope, "show the top prescribers", TASKS, _unit(1.0, 0.0))
+    cache.put(scope, "count NBA events", TASKS)
+    cache.flush()
+
+    reloaded = _cache(tmp_path, similarity_threshold=0.9)
+    assert list(reloaded._entries) == list(cache._entries)
+    assert reloaded.get_exact(scope, "count NBA events") == TASKS
+    assert reloaded.get_similar(scope, "list the top prescribers", _unit(1.0, 0.1)) == TASKS
@@ -0,0 +1,76 @@
+import numpy as np
+from backend.orchestrators import query_result_cache
+from backend.orchestrators.query_result_cache import SemanticQueryCache
+
+TASKS = ["1_schema_discovery", "2_execution"]
+
+def _results():
+    return {"2_execution": {"status": "completed", "results": [{"region": "east", "cpc": 1.5}]}}
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_exact_hit_on_normalized_query():
+    cache = SemanticQueryCache()
+    cache.put("v1:llm", "Average CPC by region", TASKS, _results())
+    tasks, results = cache.get_exact("v1:llm", "  average cpc BY region ")
+    assert tasks == TASKS
+    assert results == _results()
+
+def test_ttl_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(query_result_cache.time, "monotonic", clock)
+    cache = SemanticQueryCache(ttl=600)
+    cache.put("v1:llm", "average CPC by region", TASKS, _results(), _unit(1.0, 0.0))
+    clock.now += 599
+    assert cache.get_exact("v1:llm", "average CPC by region") is not None
+    clock.now += 2
+    assert cache.get_exact("v1:llm", "average CPC by region") is None
+    assert cache.get_similar("v1:llm", "average CPC per region", _unit(1.0, 0.0)) is None
+    assert len(cache._entries) == 0
+
+def test_lru_eviction():
+    cache = SemanticQueryCache(max_entries=2)
+    cache.put("v1:llm", "first", TASKS, _results())
+    cache.put("v1:llm", "second", TASKS, _results())
+    cache.get_exact("v1:llm", "first")
+    cache.put("v1:llm", "third", TASKS, _results())
+    assert cache.get_exact("v1:llm", "second") is None
+    assert cache.get_exact("v1:llm", "first") is not None
+    assert cache.get_exact("v1:llm", "third") is not None
+
+def test_scope_isolation():
+    cache = SemanticQueryCache()
+    cache.put("v1:llm", "average CPC by region", TASKS, _results(), _unit(1.0, 0.0))
+    assert cache.get_exact("v1:deterministic", "average CPC by region") is None
+    assert cache.get_exact("v2:llm", "average CPC by region") is None
+    assert cache.get_similar("v1:deterministic", "average CPC per region", _unit(1.0, 0.0)) is None
+
+def test_semantic_hit_and_entity_guard():
+    cache = SemanticQueryCache(similarity_threshold=0.9)
+    cache.put("v1:llm", "average CPC by region", TASKS, _results(), _unit(1.0, 0.0))
+    assert cache.get_similar("v1:llm", "average CPC per region", _unit(1.0, 0.1)) is not None
+    assert cache.get_similar("v1:llm", "average CPM by region", _unit(1.0, 0.0)) is None
+    assert cache.get_similar("v1:llm", "average CPC per region", _unit(0.0, 1.0)) is None
+    assert cache.semantic_hits == 1 and cache.misses == 2
+
+def test_results_are_deep_copied():
+    cache = SemanticQueryCache()
+    results = _results()
+    cache.put("v1:llm", "average CPC by region", TASKS, results)
+    results["2_execution"]["results"].append({"region": "west"})
+
+    _, first = cache.get_exact("v1:llm", "average CPC by region")
+    first["2_execution"]["results"][0]["cpc"] = 99
+    first["2_execution"]["status"] = "decorated"
+
+    _, second = cache.get_exact("v1:llm", "average CPC by region")
+    assert second == _results()
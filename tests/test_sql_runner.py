@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+from backend.tools.sql_runner import SQLRunner, find_dangerous_pattern
+
+class _FakeAdapter:
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+        self.executed = []
+
+    def run(self, sql, dry_run=False):
+        self.executed.append(sql)
+        limit = int(sql.rsplit("LIMIT", 1)[1]) if "LIMIT" in sql else self.total_rows
+        rows = [(i,) for i in range(min(limit, self.total_rows))]
+        return SimpleNamespace(rows=rows, columns=["id"], execution_time=0.0, error=None, row_count=len(rows))
+
+def _execute(total_rows, max_rows):
+    runner = SQLRunner()
+    runner.db_adapter = _FakeAdapter(total_rows)
+    result = asyncio.run(runner.execute_query("SELECT id FROM users", max_rows=max_rows))
+    return runner.db_adapter, result
+
+def test_probe_row_pushed_past_cap():
+    adapter, _ = _execute(total_rows=10, max_rows=5)
+    assert adapter.executed == ["SELECT id FROM users LIMIT 6"]
+
+def test_exact_cap_not_flagged_as_sampled():
+    _, result = _execute(total_rows=5, max_rows=5)
+    assert result.row_count == 5
+    assert not result.was_sampled
+
+def test_overflow_trimmed_and_flagged():
+    _, result = _execute(total_rows=10, max_rows=5)
+    assert len(result.data) == 5
+    assert result.row_count == 5
+    assert result.was_sampled
+
+def test_no_cap_when_max_rows_unset():
+    adapter, result = _execute(total_rows=10, max_rows=None)
+    assert adapter.executed == ["SELECT id FROM users"]
+    assert len(result.data) == 10
+    assert not result.was_sampled
+
+def test_dangerous_pattern_whitespace_variants():
+    assert find_dangerous_pattern("DROP\n TABLE users") == "DROP TABLE"
+    assert find_dangerous_pattern("delete\t\tfrom users") == "DELETE FROM"
+    assert find_dangerous_pattern("ALTER   TABLE users ADD c INT") == "ALTER TABLE"
+
+def test_dangerous_pattern_case_insensitive():
+    assert find_dangerous_pattern("drop table users") == "DROP TABLE"
+    assert find_dangerous_pattern("Truncate users") == "TRUNCATE"
+
+def test_dangerous_pattern_list_order():
+    # TRUNCATE appears first in the SQL but DROP TABLE comes first in DANGEROUS_SQL_PATTERNS
+    assert find_dangerous_pattern("TRUNCATE a; DROP TABLE b") == "DROP TABLE"
+    assert find_dangerous_pattern("ALTER TABLE a; DELETE FROM b") == "DELETE FROM"
+
+def test_dangerous_pattern_benign_sql():
+    assert find_dangerous_pattern("SELECT * FROM deleted_items") is None
+    assert find_dangerous_pattern("SELECT dropped_at FROM table_stats") is None
+    assert find_dangerous_pattern("SELECT truncated_at, undeleted_from FROM audit") is None